@@ -0,0 +1,49 @@
+"""quota_counters: FREE-plan analyses reserved per user and month
+
+Rows are created on first use each month (seeded from usage_daily), so
+nothing is backfilled. analysis_jobs.quota_month records the slot a queued
+job reserved, so a failed job can hand it back.
+
+Revision ID: a9b0c1d2e3f4
+Revises: f8a9b0c1d2e3
+Create Date: 2026-10-17 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a9b0c1d2e3f4"
+down_revision: Union[str, None] = "f8a9b0c1d2e3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if "quota_counters" not in inspector.get_table_names():
+        op.create_table(
+            "quota_counters",
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+            sa.Column("month", sa.Date(), nullable=False),
+            sa.Column("used", sa.Integer(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+            sa.PrimaryKeyConstraint("user_id", "month"),
+        )
+    columns = {c["name"] for c in inspector.get_columns("analysis_jobs")}
+    if "quota_month" not in columns:
+        with op.batch_alter_table("analysis_jobs") as batch_op:
+            batch_op.add_column(sa.Column("quota_month", sa.Date(), nullable=True))
+
+
+def downgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    columns = {c["name"] for c in inspector.get_columns("analysis_jobs")}
+    if "quota_month" in columns:
+        with op.batch_alter_table("analysis_jobs") as batch_op:
+            batch_op.drop_column("quota_month")
+    if "quota_counters" in inspector.get_table_names():
+        op.drop_table("quota_counters")
@@ -0,0 +1,40 @@
+"""users.data_version / data_changed_at for conditional GETs
+
+Bumped in the same transaction as every write to a user's emails or
+analytics; the listing and usage endpoints derive ETag and Last-Modified
+from them.
+
+Revision ID: b0c1d2e3f4a5
+Revises: a9b0c1d2e3f4
+Create Date: 2026-10-17 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b0c1d2e3f4a5"
+down_revision: Union[str, None] = "a9b0c1d2e3f4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    columns = {c["name"] for c in sa.inspect(op.get_bind()).get_columns("users")}
+    with op.batch_alter_table("users") as batch_op:
+        if "data_version" not in columns:
+            batch_op.add_column(sa.Column("data_version", sa.Integer(), nullable=False, server_default="0"))
+        if "data_changed_at" not in columns:
+            batch_op.add_column(sa.Column("data_changed_at", sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    columns = {c["name"] for c in sa.inspect(op.get_bind()).get_columns("users")}
+    with op.batch_alter_table("users") as batch_op:
+        if "data_changed_at" in columns:
+            batch_op.drop_column("data_changed_at")
+        if "data_version" in columns:
+            batch_op.drop_column("data_version")
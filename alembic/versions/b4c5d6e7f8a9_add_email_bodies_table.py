@@ -0,0 +1,148 @@
+"""add content-addressed email_bodies table and backfill
+
+Moves emails.content and email_analytics.email_content into email_bodies
+(one row per distinct body, keyed by sha256, zlib-compressed from 1 KiB),
+sets body_hash on both tables and clears the inline copies.
+
+Revision ID: b4c5d6e7f8a9
+Revises: a3b4c5d6e7f8
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+import hashlib
+import zlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b4c5d6e7f8a9"
+down_revision: Union[str, None] = "a3b4c5d6e7f8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH = 500
+COMPRESS_MIN_BYTES = 1024
+
+bodies = sa.table(
+    "email_bodies",
+    sa.column("hash", sa.String),
+    sa.column("codec", sa.String),
+    sa.column("data", sa.LargeBinary),
+    sa.column("size", sa.Integer),
+)
+
+
+def _body_row(text: str) -> dict:
+    raw = text.encode("utf-8")
+    data, codec = raw, ""
+    if len(raw) >= COMPRESS_MIN_BYTES:
+        packed = zlib.compress(raw, 6)
+        if len(packed) < len(raw):
+            data, codec = packed, "zlib"
+    return {"hash": hashlib.sha256(raw).hexdigest(), "codec": codec, "data": data, "size": len(raw)}
+
+
+def _backfill(bind, table_name: str, column: str) -> None:
+    table = sa.table(table_name, sa.column("id", sa.Integer), sa.column(column, sa.Text), sa.column("body_hash", sa.String))
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(table.c.id, table.c[column])
+            .where(table.c.id > last_id, table.c.body_hash.is_(None), table.c[column].isnot(None))
+            .order_by(table.c.id)
+            .limit(BATCH)
+        ).all()
+        if not rows:
+            return
+        new = {}
+        for _, text in rows:
+            row = _body_row(text)
+            new.setdefault(row["hash"], row)
+        existing = set(bind.execute(sa.select(bodies.c.hash).where(bodies.c.hash.in_(list(new)))).scalars())
+        missing = [row for h, row in new.items() if h not in existing]
+        if missing:
+            bind.execute(bodies.insert(), missing)
+        for row_id, text in rows:
+            bind.execute(
+                table.update()
+                .where(table.c.id == row_id)
+                .values(body_hash=hashlib.sha256(text.encode("utf-8")).hexdigest(), **{column: None})
+            )
+        last_id = rows[-1][0]
+
+
+def _restore(bind, table_name: str, column: str) -> None:
+    table = sa.table(table_name, sa.column("id", sa.Integer), sa.column(column, sa.Text), sa.column("body_hash", sa.String))
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(table.c.id, bodies.c.codec, bodies.c.data)
+            .join(bodies, bodies.c.hash == table.c.body_hash)
+            .where(table.c.id > last_id, table.c[column].is_(None))
+            .order_by(table.c.id)
+            .limit(BATCH)
+        ).all()
+        if not rows:
+            return
+        for row_id, codec, data in rows:
+            raw = zlib.decompress(data) if codec == "zlib" else bytes(data)
+            bind.execute(table.update().where(table.c.id == row_id).values(**{column: raw.decode("utf-8")}))
+        last_id = rows[-1][0]
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "email_bodies" not in inspector.get_table_names():
+        op.create_table(
+            "email_bodies",
+            sa.Column("hash", sa.String(length=64), primary_key=True),
+            sa.Column("codec", sa.String(length=16), nullable=False, server_default=""),
+            sa.Column("data", sa.LargeBinary(), nullable=False),
+            sa.Column("size", sa.Integer(), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+
+    email_cols = {c["name"]: c for c in inspector.get_columns("emails")}
+    with op.batch_alter_table("emails") as batch_op:
+        if "body_hash" not in email_cols:
+            batch_op.add_column(sa.Column("body_hash", sa.String(length=64), nullable=True))
+            batch_op.create_index("ix_emails_body_hash", ["body_hash"])
+            batch_op.create_foreign_key("fk_emails_body_hash", "email_bodies", ["body_hash"], ["hash"])
+        if not email_cols["content"]["nullable"]:
+            batch_op.alter_column("content", existing_type=sa.Text(), nullable=True)
+
+    analytics_cols = {c["name"] for c in inspector.get_columns("email_analytics")}
+    if "body_hash" not in analytics_cols:
+        with op.batch_alter_table("email_analytics") as batch_op:
+            batch_op.add_column(sa.Column("body_hash", sa.String(length=64), nullable=True))
+            batch_op.create_index("ix_email_analytics_body_hash", ["body_hash"])
+            batch_op.create_foreign_key("fk_email_analytics_body_hash", "email_bodies", ["body_hash"], ["hash"])
+
+    _backfill(bind, "emails", "content")
+    _backfill(bind, "email_analytics", "email_content")
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "email_bodies" not in inspector.get_table_names():
+        return
+    _restore(bind, "emails", "content")
+    _restore(bind, "email_analytics", "email_content")
+
+    if "body_hash" in {c["name"] for c in inspector.get_columns("email_analytics")}:
+        with op.batch_alter_table("email_analytics") as batch_op:
+            batch_op.drop_index("ix_email_analytics_body_hash")
+            batch_op.drop_constraint("fk_email_analytics_body_hash", type_="foreignkey")
+            batch_op.drop_column("body_hash")
+    if "body_hash" in {c["name"] for c in inspector.get_columns("emails")}:
+        with op.batch_alter_table("emails") as batch_op:
+            batch_op.drop_index("ix_emails_body_hash")
+            batch_op.drop_constraint("fk_emails_body_hash", type_="foreignkey")
+            batch_op.drop_column("body_hash")
+            batch_op.alter_column("content", existing_type=sa.Text(), nullable=False)
+    op.drop_table("email_bodies")
@@ -0,0 +1,48 @@
+"""expires_at indexes on the token tables
+
+The maintenance purge (app/services/maintenance.py) deletes expired rows
+in small batches picked by expires_at; without an index every batch scans
+the whole table. On Postgres the indexes are built CONCURRENTLY.
+
+Revision ID: c1d2e3f4a5b6
+Revises: b0c1d2e3f4a5
+Create Date: 2026-10-17 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c1d2e3f4a5b6"
+down_revision: Union[str, None] = "b0c1d2e3f4a5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ["blacklisted_tokens", "refresh_tokens", "verification_tokens", "password_reset_tokens"]
+
+
+def _existing_indexes(inspector, table: str) -> set:
+    return {ix["name"] for ix in inspector.get_indexes(table)}
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    missing = [t for t in TABLES if f"ix_{t}_expires_at" not in _existing_indexes(inspector, t)]
+    if bind.dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            for table in missing:
+                op.create_index(f"ix_{table}_expires_at", table, ["expires_at"], postgresql_concurrently=True)
+    else:
+        for table in missing:
+            op.create_index(f"ix_{table}_expires_at", table, ["expires_at"])
+
+
+def downgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    for table in reversed(TABLES):
+        if f"ix_{table}_expires_at" in _existing_indexes(inspector, table):
+            op.drop_index(f"ix_{table}_expires_at", table_name=table)
@@ -0,0 +1,109 @@
+"""store large text columns as CompressedText (binary)
+
+Changes emails.content, email_analytics.email_content and
+analysis_jobs.content to a binary type. Existing values become their plain
+UTF-8 bytes, which CompressedText reads as-is; run
+scripts/compress_text_columns.py afterwards to compress them in place.
+
+Revision ID: c5d6e7f8a9b0
+Revises: b4c5d6e7f8a9
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c5d6e7f8a9b0"
+down_revision: Union[str, None] = "b4c5d6e7f8a9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = [
+    ("emails", "content"),
+    ("email_analytics", "email_content"),
+    ("analysis_jobs", "content"),
+]
+BATCH = 500
+
+
+def _unpack(value):
+    # Same framing as app.core.compression.unpack_text, kept here so the
+    # migration does not depend on application code
+    import zlib
+
+    if value is None or isinstance(value, str):
+        return value
+    data = bytes(value)
+    if not data.startswith(b"\x00"):
+        return data.decode("utf-8")
+    codec, payload = data[1:2], data[2:]
+    if codec == b"z":
+        payload = zlib.decompress(payload)
+    elif codec == b"s":
+        import zstandard
+
+        payload = zstandard.ZstdDecompressor().decompress(payload)
+    return payload.decode("utf-8")
+
+
+def _columns(bind):
+    inspector = sa.inspect(bind)
+    tables = set(inspector.get_table_names())
+    for table, column in COLUMNS:
+        if table in tables and column in {c["name"] for c in inspector.get_columns(table)}:
+            yield table, column
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    for table, column in _columns(bind):
+        if bind.dialect.name == "postgresql":
+            op.alter_column(
+                table,
+                column,
+                existing_type=sa.Text(),
+                type_=sa.LargeBinary(),
+                postgresql_using=f"convert_to({column}, 'UTF8')",
+            )
+        else:
+            with op.batch_alter_table(table) as batch_op:
+                batch_op.alter_column(column, existing_type=sa.Text(), type_=sa.LargeBinary())
+
+
+def _decompress_rows(bind, table_name: str, column: str) -> None:
+    table = sa.table(table_name, sa.column("id"), sa.column(column))
+    last_id = None
+    while True:
+        query = sa.select(table.c.id, table.c[column]).where(table.c[column].isnot(None))
+        if last_id is not None:
+            query = query.where(table.c.id > last_id)
+        rows = bind.execute(query.order_by(table.c.id).limit(BATCH)).all()
+        if not rows:
+            return
+        for row_id, value in rows:
+            if not isinstance(value, str):
+                plain = _unpack(value).encode("utf-8")
+                if plain != bytes(value):
+                    bind.execute(table.update().where(table.c.id == row_id).values(**{column: plain}))
+        last_id = rows[-1][0]
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    for table, column in _columns(bind):
+        _decompress_rows(bind, table, column)
+        if bind.dialect.name == "postgresql":
+            op.alter_column(
+                table,
+                column,
+                existing_type=sa.LargeBinary(),
+                type_=sa.Text(),
+                postgresql_using=f"convert_from({column}, 'UTF8')",
+            )
+        else:
+            with op.batch_alter_table(table) as batch_op:
+                batch_op.alter_column(column, existing_type=sa.LargeBinary(), type_=sa.Text())
@@ -0,0 +1,46 @@
+"""created_at index on analysis_cache_entries
+
+The maintenance purge deletes analysis cache rows older than
+ANALYSIS_CACHE_TTL_SECONDS in small batches picked by created_at; without
+an index every batch scans the whole table. On Postgres the index is built
+CONCURRENTLY.
+
+Revision ID: d2e3f4a5b6c7
+Revises: c1d2e3f4a5b6
+Create Date: 2026-10-17 23:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d2e3f4a5b6c7"
+down_revision: Union[str, None] = "c1d2e3f4a5b6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLE = "analysis_cache_entries"
+INDEX = "ix_analysis_cache_entries_created_at"
+
+
+def _existing_indexes(inspector, table: str) -> set:
+    return {ix["name"] for ix in inspector.get_indexes(table)}
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if INDEX in _existing_indexes(sa.inspect(bind), TABLE):
+        return
+    if bind.dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.create_index(INDEX, TABLE, ["created_at"], postgresql_concurrently=True)
+    else:
+        op.create_index(INDEX, TABLE, ["created_at"])
+
+
+def downgrade() -> None:
+    if INDEX in _existing_indexes(sa.inspect(op.get_bind()), TABLE):
+        op.drop_index(INDEX, table_name=TABLE)
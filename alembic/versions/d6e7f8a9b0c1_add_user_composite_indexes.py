@@ -0,0 +1,79 @@
+"""composite (user_id, ...) indexes on emails and email_analytics
+
+Matches the hot query shapes: list/search (user_id, created_at|confidence,
+id), category filters (user_id, category, created_at), quota and usage
+counts (user_id, created_at) and the global usage series (created_at).
+Also makes emails.created_at NOT NULL so ordering on it needs no NULLS LAST
+and the index serves both sort directions. On Postgres the indexes are
+built CONCURRENTLY.
+
+Revision ID: d6e7f8a9b0c1
+Revises: c5d6e7f8a9b0
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d6e7f8a9b0c1"
+down_revision: Union[str, None] = "c5d6e7f8a9b0"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("emails", "ix_emails_user_created", ["user_id", "created_at", "id"]),
+    ("emails", "ix_emails_user_category_created", ["user_id", "category", "created_at"]),
+    ("emails", "ix_emails_user_confidence", ["user_id", "confidence_score", "id"]),
+    ("email_analytics", "ix_email_analytics_user_created", ["user_id", "created_at"]),
+    ("email_analytics", "ix_email_analytics_user_category_created", ["user_id", "category", "created_at"]),
+    ("email_analytics", "ix_email_analytics_created_at", ["created_at"]),
+]
+
+
+def _existing_indexes(inspector, table: str) -> set:
+    return {ix["name"] for ix in inspector.get_indexes(table)}
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    emails = sa.table("emails", sa.column("created_at"))
+    op.execute(emails.update().where(emails.c.created_at.is_(None)).values(created_at=sa.func.now()))
+    created = next(c for c in inspector.get_columns("emails") if c["name"] == "created_at")
+    if created["nullable"]:
+        with op.batch_alter_table("emails") as batch_op:
+            batch_op.alter_column(
+                "created_at",
+                existing_type=sa.DateTime(timezone=True),
+                existing_server_default=sa.func.now(),
+                nullable=False,
+            )
+
+    missing = [(t, n, c) for t, n, c in INDEXES if n not in _existing_indexes(inspector, t)]
+    if bind.dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            for table, name, columns in missing:
+                op.create_index(name, table, columns, postgresql_concurrently=True)
+    else:
+        for table, name, columns in missing:
+            op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    for table, name, _ in reversed(INDEXES):
+        if name in _existing_indexes(inspector, table):
+            op.drop_index(name, table_name=table)
+    with op.batch_alter_table("emails") as batch_op:
+        batch_op.alter_column(
+            "created_at",
+            existing_type=sa.DateTime(timezone=True),
+            existing_server_default=sa.func.now(),
+            nullable=True,
+        )
@@ -0,0 +1,40 @@
+"""add analysis cache entries table
+
+Revision ID: e1f2a3b4c5d6
+Revises: d5e6f7a8b9c0
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e1f2a3b4c5d6"
+down_revision: Union[str, None] = "d5e6f7a8b9c0"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "analysis_cache_entries" not in inspector.get_table_names():
+        op.create_table(
+            "analysis_cache_entries",
+            sa.Column("id", sa.Integer(), primary_key=True, index=True),
+            sa.Column("cache_key", sa.String(length=64), nullable=False, unique=True, index=True),
+            sa.Column("summary", sa.Text(), nullable=False),
+            sa.Column("category", sa.String(length=50), nullable=False),
+            sa.Column("confidence_score", sa.Integer(), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "analysis_cache_entries" in inspector.get_table_names():
+        op.drop_table("analysis_cache_entries")
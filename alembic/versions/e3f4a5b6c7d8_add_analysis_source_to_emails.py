@@ -0,0 +1,47 @@
+"""add analysis_source to emails
+
+Records whether an email's label came from the LLM, the local classifier or
+the keyword rules, so scripts/train_classifier.py trains on LLM labels only.
+Existing rows whose summary is the local fallback's ("Email about ..." /
+"Email received...") are backfilled as keywords (confidence 30) or
+classifier; the rest stay NULL (unknown).
+
+Revision ID: e3f4a5b6c7d8
+Revises: d2e3f4a5b6c7
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e3f4a5b6c7d8"
+down_revision: Union[str, None] = "d2e3f4a5b6c7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    cols = {c["name"] for c in inspector.get_columns("emails")}
+    if "analysis_source" not in cols:
+        op.add_column("emails", sa.Column("analysis_source", sa.String(length=20), nullable=True))
+    op.execute(
+        sa.text(
+            "UPDATE emails SET analysis_source = CASE WHEN confidence_score = 30 THEN 'keywords' ELSE 'classifier' END "
+            "WHERE analysis_source IS NULL AND (summary LIKE 'Email about %' OR summary LIKE 'Email received%')"
+        )
+    )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    cols = {c["name"] for c in inspector.get_columns("emails")}
+    if "analysis_source" in cols:
+        with op.batch_alter_table("emails") as batch_op:
+            batch_op.drop_column("analysis_source")
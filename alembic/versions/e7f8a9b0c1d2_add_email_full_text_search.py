@@ -0,0 +1,67 @@
+"""full-text search index over emails.subject and summary
+
+SQLite: external-content FTS5 table emails_fts plus insert/update/delete
+triggers, rebuilt from existing rows. Postgres: stored generated tsvector
+column search_vector (subject weighted above summary) with a GIN index,
+built CONCURRENTLY. Adding the generated column rewrites the emails table.
+Same DDL as EMAIL_SEARCH_DDL in app/models/models.py.
+
+Revision ID: e7f8a9b0c1d2
+Revises: d6e7f8a9b0c1
+Create Date: 2026-10-17 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e7f8a9b0c1d2"
+down_revision: Union[str, None] = "d6e7f8a9b0c1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SQLITE_UPGRADE = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS emails_fts USING fts5("
+    "subject, summary, user_id, content='emails', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS emails_fts_ai AFTER INSERT ON emails BEGIN "
+    "INSERT INTO emails_fts(rowid, subject, summary, user_id) VALUES (new.id, new.subject, new.summary, new.user_id); END",
+    "CREATE TRIGGER IF NOT EXISTS emails_fts_ad AFTER DELETE ON emails BEGIN "
+    "INSERT INTO emails_fts(emails_fts, rowid, subject, summary, user_id) VALUES ('delete', old.id, old.subject, old.summary, old.user_id); END",
+    "CREATE TRIGGER IF NOT EXISTS emails_fts_au AFTER UPDATE OF subject, summary, user_id ON emails BEGIN "
+    "INSERT INTO emails_fts(emails_fts, rowid, subject, summary, user_id) VALUES ('delete', old.id, old.subject, old.summary, old.user_id); "
+    "INSERT INTO emails_fts(rowid, subject, summary, user_id) VALUES (new.id, new.subject, new.summary, new.user_id); END",
+    "INSERT INTO emails_fts(emails_fts) VALUES ('rebuild')",
+]
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS emails_fts_au",
+    "DROP TRIGGER IF EXISTS emails_fts_ad",
+    "DROP TRIGGER IF EXISTS emails_fts_ai",
+    "DROP TABLE IF EXISTS emails_fts",
+]
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == "sqlite":
+        for statement in SQLITE_UPGRADE:
+            op.execute(statement)
+    elif bind.dialect.name == "postgresql":
+        op.execute(
+            "ALTER TABLE emails ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS "
+            "(setweight(to_tsvector('simple', coalesce(subject, '')), 'A') || "
+            "setweight(to_tsvector('simple', coalesce(summary, '')), 'B')) STORED"
+        )
+        with op.get_context().autocommit_block():
+            op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_emails_search_vector ON emails USING gin (search_vector)")
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == "sqlite":
+        for statement in SQLITE_DOWNGRADE:
+            op.execute(statement)
+    elif bind.dialect.name == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_emails_search_vector")
+        op.execute("ALTER TABLE emails DROP COLUMN IF EXISTS search_vector")
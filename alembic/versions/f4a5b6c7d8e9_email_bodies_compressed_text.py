@@ -0,0 +1,81 @@
+"""store email_bodies.data as CompressedText
+
+email_bodies kept the codec in a column of its own next to the payload.
+The data column now holds CompressedText frames (NUL, codec id, payload),
+like the other compressed text columns, and the codec column is dropped.
+Existing rows are rewritten in batches by prefixing the frame for their
+codec; payloads are not recompressed.
+
+Revision ID: f4a5b6c7d8e9
+Revises: e3f4a5b6c7d8
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f4a5b6c7d8e9"
+down_revision: Union[str, None] = "e3f4a5b6c7d8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH = 500
+# Same framing as app.core.compression.pack_text, kept here so the
+# migration does not depend on application code
+FRAME_MAGIC = b"\x00"
+FRAME_IDS = {"": b"r", "zlib": b"z", "zstd": b"s"}
+FRAME_CODECS = {v: k for k, v in FRAME_IDS.items()}
+
+
+def _columns(bind) -> set:
+    return {c["name"] for c in sa.inspect(bind).get_columns("email_bodies")}
+
+
+def _rewrite(bind, table, columns, convert) -> None:
+    last_hash = None
+    while True:
+        query = sa.select(*columns)
+        if last_hash is not None:
+            query = query.where(table.c.hash > last_hash)
+        rows = bind.execute(query.order_by(table.c.hash).limit(BATCH)).all()
+        if not rows:
+            return
+        for row in rows:
+            bind.execute(table.update().where(table.c.hash == row.hash).values(**convert(row)))
+        last_hash = rows[-1].hash
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if "codec" not in _columns(bind):
+        return
+    table = sa.table("email_bodies", sa.column("hash"), sa.column("codec"), sa.column("data"))
+    _rewrite(
+        bind,
+        table,
+        [table.c.hash, table.c.codec, table.c.data],
+        lambda row: {"data": FRAME_MAGIC + FRAME_IDS[row.codec or ""] + bytes(row.data)},
+    )
+    with op.batch_alter_table("email_bodies") as batch_op:
+        batch_op.drop_column("codec")
+
+
+def _unframe(row) -> dict:
+    data = bytes(row.data)
+    if not data.startswith(FRAME_MAGIC):
+        return {"codec": "", "data": data}
+    return {"codec": FRAME_CODECS[data[1:2]], "data": data[2:]}
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if "codec" in _columns(bind):
+        return
+    with op.batch_alter_table("email_bodies") as batch_op:
+        batch_op.add_column(sa.Column("codec", sa.String(length=16), nullable=False, server_default=""))
+    table = sa.table("email_bodies", sa.column("hash"), sa.column("codec"), sa.column("data"))
+    _rewrite(bind, table, [table.c.hash, table.c.data], _unframe)
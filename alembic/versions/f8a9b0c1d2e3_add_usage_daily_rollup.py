@@ -0,0 +1,70 @@
+"""usage_daily rollup: analyses per user, UTC day and category
+
+Backfilled from email_analytics with one GROUP BY. From here on the app
+adds to it in the same transaction as every analytics insert; the usage
+endpoints and the FREE quota read it instead of counting email_analytics.
+
+Revision ID: f8a9b0c1d2e3
+Revises: e7f8a9b0c1d2
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f8a9b0c1d2e3"
+down_revision: Union[str, None] = "e7f8a9b0c1d2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "usage_daily" not in inspector.get_table_names():
+        op.create_table(
+            "usage_daily",
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+            sa.Column("day", sa.Date(), nullable=False),
+            sa.Column("category", sa.String(length=50), nullable=False),
+            sa.Column("count", sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint("user_id", "day", "category"),
+        )
+        op.create_index("ix_usage_daily_day", "usage_daily", ["day"])
+
+    analytics = sa.table(
+        "email_analytics",
+        sa.column("user_id", sa.Integer()),
+        sa.column("category", sa.String()),
+        sa.column("created_at", sa.DateTime(timezone=True)),
+    )
+    usage = sa.table(
+        "usage_daily",
+        sa.column("user_id"),
+        sa.column("day"),
+        sa.column("category"),
+        sa.column("count"),
+    )
+    if bind.dialect.name == "postgresql":
+        day = sa.func.date(sa.func.timezone("UTC", analytics.c.created_at))
+    else:
+        day = sa.func.date(analytics.c.created_at)
+    category = sa.func.coalesce(analytics.c.category, sa.literal(""))
+    source = (
+        sa.select(analytics.c.user_id, day, category, sa.func.count())
+        .where(analytics.c.created_at.isnot(None))
+        .group_by(analytics.c.user_id, day, category)
+    )
+    op.execute(usage.delete())
+    op.execute(usage.insert().from_select(["user_id", "day", "category", "count"], source))
+
+
+def downgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if "usage_daily" in inspector.get_table_names():
+        op.drop_index("ix_usage_daily_day", table_name="usage_daily")
+        op.drop_table("usage_daily")
@@ -1,27 +1,30 @@
 from datetime import datetime, timezone, timedelta
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 
-from app.api.auth import get_current_user
+from app.api.auth import get_current_principal
 from app.database.database import get_db
 from app.models.models import User, Subscription
 from sqlalchemy import func
 from app.schemas.api_responses import ApiMessage, AdminOverview, DailyBucket, UsageTimeSeries
 from app.schemas.schemas import AdminSetSubscription, AdminUpdateUser, UserResponse
+from app.services.principal import Principal, forget_user
+from app.services.response_cache import cached_json, get_response_cache
+from app.services.usage_rollup import active_users_since, usage_by_day, usage_total
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
 
-def _ensure_admin(user: User):
+def _ensure_admin(user: Principal):
     if not getattr(user, "is_admin", False):
         raise HTTPException(status_code=403, detail="Admin privileges required")
 
 
 @router.get("/users", response_model=list[UserResponse], summary="List users")
 def list_users(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db),
 ):
     _ensure_admin(current_user)
@@ -31,7 +34,7 @@ def list_users(
 @router.get("/users/{user_id}", response_model=UserResponse, summary="Get user")
 def get_user(
     user_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db),
 ):
     _ensure_admin(current_user)
@@ -45,18 +48,20 @@ def get_user(
 def update_user(
     user_id: int,
     payload: AdminUpdateUser,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db),
 ):
     _ensure_admin(current_user)
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    previous_email = user.email
     for field, value in payload.model_dump(exclude_unset=True).items():
         setattr(user, field, value)
     db.add(user)
     db.commit()
     db.refresh(user)
+    forget_user(previous_email)
     return user
 
 
@@ -64,7 +69,7 @@ def update_user(
 def set_subscription(
     user_id: int,
     payload: AdminSetSubscription,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db),
 ):
     _ensure_admin(current_user)
@@ -94,7 +99,7 @@ def set_subscription(
 @router.delete("/users/{user_id}", summary="Delete user")
 def delete_user(
     user_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db),
 ):
     _ensure_admin(current_user)
@@ -103,48 +108,46 @@ def delete_user(
         raise HTTPException(status_code=404, detail="User not found")
     db.delete(user)
     db.commit()
+    forget_user(user.email)
+    get_response_cache().invalidate_user(user_id)
     return ApiMessage(message="User deleted")
 
 @router.get("/overview", response_model=AdminOverview, summary="Platform overview metrics")
 def platform_overview(
-    current_user: User = Depends(get_current_user),
+    response: Response,
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db),
 ):
     _ensure_admin(current_user)
-    total_users = db.query(func.count(User.id)).scalar() or 0
-    total_analyses = db.query(func.count()).select_from(Subscription).session.query(func.count()).scalar() if False else None  # placeholder
-    # Prefer counting from EmailAnalytics for usage
-    from app.models.models import EmailAnalytics
-    total_analyses = db.query(func.count(EmailAnalytics.id)).scalar() or 0
-    active_users_last_30 = (
-        db.query(func.count(func.distinct(EmailAnalytics.user_id)))
-        .filter(EmailAnalytics.created_at >= datetime.now(timezone.utc) - timedelta(days=30))
-        .scalar()
-        or 0
-    )
-    data = {
-        "total_users": total_users,
-        "total_analyses": total_analyses,
-        "active_users_last_30d": active_users_last_30,
-    }
-    return AdminOverview(data=data)
+    today = datetime.now(timezone.utc).date()
+
+    def build() -> AdminOverview:
+        total_users = db.query(func.count(User.id)).scalar() or 0
+        total_analyses = usage_total(db)
+        active_users_last_30 = active_users_since(db, today - timedelta(days=30))
+        data = {
+            "total_users": total_users,
+            "total_analyses": total_analyses,
+            "active_users_last_30d": active_users_last_30,
+        }
+        return AdminOverview(data=data)
+
+    # Platform-wide numbers: no version to key on, so they are up to RESPONSE_CACHE_TTL_SECONDS old
+    return cached_json(response, "admin-overview", None, (today,), build)
 
 @router.get("/usage/daily", response_model=UsageTimeSeries, summary="Global last 30 days usage")
 def global_usage_daily(
-    current_user: User = Depends(get_current_user),
+    response: Response,
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db),
 ):
     _ensure_admin(current_user)
-    from app.models.models import EmailAnalytics
     today = datetime.now(timezone.utc).date()
     start_date = today - timedelta(days=29)
-    rows = (
-        db.query(func.date(EmailAnalytics.created_at), func.count(EmailAnalytics.id))
-        .filter(EmailAnalytics.created_at >= datetime.combine(start_date, datetime.min.time(), tzinfo=timezone.utc))
-        .group_by(func.date(EmailAnalytics.created_at))
-        .order_by(func.date(EmailAnalytics.created_at))
-        .all()
-    )
-    counts = {str(r[0]): int(r[1]) for r in rows}
-    series = [DailyBucket(date=(start_date + timedelta(days=i)).isoformat(), count=counts.get((start_date + timedelta(days=i)).isoformat(), 0)) for i in range(30)]
-    return UsageTimeSeries(data=series)
+
+    def build() -> UsageTimeSeries:
+        counts = usage_by_day(db, start_date)
+        series = [DailyBucket(date=(start_date + timedelta(days=i)).isoformat(), count=counts.get((start_date + timedelta(days=i)).isoformat(), 0)) for i in range(30)]
+        return UsageTimeSeries(data=series)
+
+    return cached_json(response, "admin-usage-daily", None, (today,), build)
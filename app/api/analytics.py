@@ -1,15 +1,19 @@
-from datetime import datetime, timedelta, timezone
-from typing import List
+from datetime import datetime, time, timezone
+from typing import Literal
 
-from fastapi import APIRouter, Depends
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 
-from app.api.auth import get_current_user
+from app.api.auth import get_current_principal
+from app.core.conditional import conditional_get, make_etag
 from app.core.config import settings
 from app.database.database import get_db
-from app.models.models import EmailAnalytics, User
 from app.schemas.api_responses import DailyBucket, UsageTimeSeries, UsageTotals
+from app.services.data_version import data_version
+from app.services.principal import Principal
+from app.services.response_cache import cached_json
+from app.services.usage_rollup import usage_total
+from app.services.usage_series import MAX_HOURLY_WINDOW_DAYS, WINDOWS, period_start, usage_series, user_zone
 
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
@@ -17,51 +21,66 @@ router = APIRouter(prefix="/analytics", tags=["analytics"])
 
 @router.get("/usage/summary", response_model=UsageTotals, summary="My usage summary")
 def my_usage_summary(
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    response: Response,
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db),
 ):
-    now = datetime.now(timezone.utc)
-    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    total = (
-        db.query(func.count(EmailAnalytics.id))
-        .filter(EmailAnalytics.user_id == current_user.id)
-        .scalar()
-        or 0
-    )
-    month = (
-        db.query(func.count(EmailAnalytics.id))
-        .filter(EmailAnalytics.user_id == current_user.id, EmailAnalytics.created_at >= month_start)
-        .scalar()
-        or 0
+    month_start = datetime.now(timezone.utc).date().replace(day=1)
+    version, changed_at = data_version(db, current_user.id)
+    period = datetime.combine(month_start, time(), tzinfo=timezone.utc)
+    not_modified = conditional_get(
+        request,
+        response,
+        make_etag("usage-summary", current_user.id, version, month_start, settings.free_monthly_analysis_limit),
+        max(filter(None, [changed_at, period])),
     )
+    if not_modified is not None:
+        return not_modified
     return UsageTotals(
         user_id=current_user.id,
-        total_analyses=total,
-        month_analyses=month,
+        total_analyses=usage_total(db, current_user.id),
+        month_analyses=usage_total(db, current_user.id, since=month_start),
         quota_limit=settings.free_monthly_analysis_limit,
     )
 
 
-@router.get("/usage/daily", response_model=UsageTimeSeries, summary="My last 30 days usage")
+@router.get(
+    "/usage/daily",
+    response_model=UsageTimeSeries,
+    summary="My usage over time",
+    description="Analyses per hour, day or week (Monday first) of the user's timezone, over the last 7, 30, 90 or 365 days.",
+)
 def my_usage_daily(
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    response: Response,
+    days: int = Query(30, description="Window: 7, 30, 90 or 365 days"),
+    granularity: Literal["hour", "day", "week"] = Query("day"),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db),
 ):
-    # Build last 30 day window
-    today = datetime.now(timezone.utc).date()
-    start_date = today - timedelta(days=29)
-    # Query counts grouped by date
-    rows = (
-        db.query(func.date(EmailAnalytics.created_at), func.count(EmailAnalytics.id))
-        .filter(EmailAnalytics.user_id == current_user.id, EmailAnalytics.created_at >= datetime.combine(start_date, datetime.min.time(), tzinfo=timezone.utc))
-        .group_by(func.date(EmailAnalytics.created_at))
-        .order_by(func.date(EmailAnalytics.created_at))
-        .all()
+    if days not in WINDOWS:
+        raise HTTPException(status_code=400, detail=f"days must be one of {', '.join(map(str, WINDOWS))}")
+    if granularity == "hour" and days > MAX_HOURLY_WINDOW_DAYS:
+        raise HTTPException(status_code=400, detail=f"Hourly buckets cover at most {MAX_HOURLY_WINDOW_DAYS} days")
+    zone = user_zone(current_user.timezone)
+    version, changed_at = data_version(db, current_user.id)
+    period = period_start(zone, granularity)
+    not_modified = conditional_get(
+        request,
+        response,
+        make_etag("usage-series", current_user.id, version, zone.key, days, granularity, period),
+        max(filter(None, [changed_at, period])),
     )
-    counts = {str(r[0]): int(r[1]) for r in rows}
-    series: List[DailyBucket] = []
-    for i in range(30):
-        d = start_date + timedelta(days=i)
-        key = d.isoformat()
-        series.append(DailyBucket(date=key, count=counts.get(key, 0)))
-    return UsageTimeSeries(data=series)
+    if not_modified is not None:
+        return not_modified
+
+    def build() -> UsageTimeSeries:
+        series = usage_series(db, current_user.id, zone.key, days=days, granularity=granularity)
+        return UsageTimeSeries(
+            data=[DailyBucket(date=label, count=count) for label, count in series],
+            timezone=zone.key,
+            granularity=granularity,
+        )
+
+    return cached_json(response, "usage-series", current_user.id, (version, zone.key, days, granularity, period), build)
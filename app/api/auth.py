@@ -24,10 +24,29 @@ import uuid
 from app.core.cookies import set_refresh_cookie, clear_refresh_cookie
 from app.schemas.api_responses import ApiMessage
 from app.core.captcha import verify_turnstile_token
+from app.core.auth_context import auth_context
+from app.services.password_hashing import PasswordHashingBusy
+from app.services.principal import Principal, cached_principal, forget_token, forget_user, remember_principal
 
 router = APIRouter(prefix="/api/auth", tags=["authentication"])
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
+def _hashing_busy() -> HTTPException:
+    # The password hashing queue is full (see app.services.password_hashing)
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many sign-in requests in progress, retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
+async def _hash_password(db: Session, password: str) -> str:
+    # Hand the pooled connection back while waiting for the hash; loaded rows reload on next access
+    db.rollback()
+    try:
+        return await AuthService.get_password_hash_async(password)
+    except PasswordHashingBusy:
+        raise _hashing_busy()
+
 @router.post("/register", response_model=UserResponse, summary="Register a new user", description="Create a new user account with email and password.")
 async def register(request: Request, user_data: UserCreate, db: Session = Depends(get_db)):
     # Optional CAPTCHA verification
@@ -46,12 +65,14 @@ async def register(request: Request, user_data: UserCreate, db: Session = Depend
         )
     
     # Create new user
+    hashed = await _hash_password(db, user_data.password)
     user = AuthService.create_user(
         db=db,
         email=user_data.email,
         password=user_data.password,
         full_name=user_data.full_name,
         timezone_str=user_data.timezone,
+        hashed_password=hashed,
     )
     
     return user
@@ -66,7 +87,10 @@ async def login(request: Request, response: Response, form_data: OAuth2PasswordR
         ok = await verify_turnstile_token(token, request.client.host if request.client else None)
         if not ok:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Captcha validation failed")
-    user = AuthService.authenticate_user(db, form_data.username, form_data.password)
+    try:
+        user = await AuthService.authenticate_user_async(db, form_data.username, form_data.password)
+    except PasswordHashingBusy:
+        raise _hashing_busy()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -97,54 +121,71 @@ async def login(request: Request, response: Response, form_data: OAuth2PasswordR
         pass
     return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
-    token_data = AuthService.verify_token(token, expected_type="access")
+
+async def get_current_principal(request: Request, token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> Principal:
+    """The authenticated user's id, plan and flags; for endpoints that do not modify the user row."""
+    claims = auth_context(request).claims_for(token)
+    token_data = AuthService.token_data_from_claims(claims, expected_type="access")
     if token_data is None:
-        raise credentials_exception
-    
-    user = AuthService.get_user_by_email(db, email=token_data.email)
+        raise _credentials_exception()
+
+    principal = cached_principal(token_data.email, token_data.jti)
+    if principal is None:
+        user = AuthService.get_user_by_email(db, email=token_data.email)
+        if user is None:
+            raise _credentials_exception()
+        principal = Principal.from_user(user)
+        remember_principal(token_data.email, token_data.jti, principal)
+    return principal
+
+async def get_current_user(principal: Principal = Depends(get_current_principal), db: Session = Depends(get_db)):
+    """The authenticated user as an ORM instance of the request's session."""
+    user = db.get(User, principal.id)
     if user is None:
-        raise credentials_exception
-    
+        forget_user(principal.email)
+        raise _credentials_exception()
     return user
 
 @router.get("/me", response_model=UserResponse, summary="Get current user", description="Return the profile of the authenticated user.")
 async def read_users_me(current_user = Depends(get_current_user)):
     return current_user
 
+def _claims_expiry(payload: dict) -> datetime | None:
+    exp = payload.get("exp")
+    return datetime.fromtimestamp(exp, tz=timezone.utc) if exp else None
+
 @router.post("/logout", summary="Logout and revoke tokens", description="Blacklists the current access token and optional provided refresh token; clears refresh cookie.", response_model=ApiMessage)
-async def logout(response: Response, body: LogoutRequest = None, token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    # Blacklist current access token jti and optional refresh token jti
-    try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-        jti = payload.get("jti")
-        if jti:
-            blacklist_jti(jti)
-            blacklist_jti_db(db, jti)
-    except JWTError:
-        pass
+async def logout(request: Request, response: Response, body: LogoutRequest = None, token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    ctx = auth_context(request)
+    # Blacklist current access token jti and optional refresh token jti, each until its own exp
+    payload = ctx.claims_for(token)
+    jti = payload.get("jti") if payload else None
+    if jti:
+        expires_at = _claims_expiry(payload)
+        blacklist_jti(jti, expires_at)
+        blacklist_jti_db(db, jti, expires_at)
+        forget_token(jti)
     if body and body.refresh_token:
-        try:
-            payload = jwt.decode(body.refresh_token, settings.secret_key, algorithms=[settings.algorithm])
-            rjti = payload.get("jti")
-            if rjti:
-                blacklist_jti(rjti)
-                blacklist_jti_db(db, rjti)
-        except JWTError:
-            pass
+        payload = ctx.claims_for(body.refresh_token)
+        rjti = payload.get("jti") if payload else None
+        if rjti:
+            expires_at = _claims_expiry(payload)
+            blacklist_jti(rjti, expires_at)
+            blacklist_jti_db(db, rjti, expires_at)
     clear_refresh_cookie(response)
     return ApiMessage(message="Logged out")
 
 @router.post("/refresh-token", response_model=Token, summary="Refresh tokens (rotation)", description="Issue a new access token and rotate the refresh token. Accepts token in body or from httpOnly cookie.")
-async def refresh_token(response: Response, body: RefreshTokenRequest | None = None, rt: str | None = Cookie(default=None, alias=settings.refresh_cookie_name), db: Session = Depends(get_db)):
+async def refresh_token(request: Request, response: Response, body: RefreshTokenRequest | None = None, rt: str | None = Cookie(default=None, alias=settings.refresh_cookie_name), db: Session = Depends(get_db)):
     raw_refresh = body.refresh_token if body else rt
-    data = AuthService.verify_token(raw_refresh or "", expected_type="refresh")
+    claims = auth_context(request).claims_for(raw_refresh) if raw_refresh else None
+    data = AuthService.token_data_from_claims(claims, expected_type="refresh")
     if not data or not data.email:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
     # Server-side revocation/rotation check
@@ -208,7 +249,7 @@ async def reset_password(body: ResetPasswordRequest, db: Session = Depends(get_d
         raise HTTPException(status_code=404, detail="User not found")
 
     # Reuse password hashing policy
-    hashed = AuthService.get_password_hash(body.new_password)
+    hashed = await _hash_password(db, body.new_password)
     user.hashed_password = hashed
     prt.used = True
     db.commit()
@@ -2,143 +2,476 @@ import time
 from datetime import datetime, timezone
 from typing import List, Optional, Literal
 
-from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
 from slowapi.util import get_remote_address
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload, undefer
+from starlette.concurrency import run_in_threadpool
 
-from app.api.auth import get_current_user
+from app.api.auth import get_current_principal
+from app.core.conditional import conditional_get, make_etag
 from app.core.config import settings
 from app.core.limits import limiter, user_rate_limit_key
+from app.core.pagination import after_row, decode_cursor, keyset_order, next_cursor
 from app.core.security import sanitize_text
-from app.database.database import get_db
+from app.core.sse import SSE_HEADERS, format_sse, sse_comment
+from app.database.database import SessionLocal, get_db
 from app.models.models import (
     Email,
-    EmailAnalytics,
     EmailCategory,
     SubscriptionStatus,
-    User,
 )
-from app.schemas.api_responses import EmailsPageResponse, PaginationMeta
-from app.schemas.schemas import EmailAnalysis, EmailCreate, EmailResponse
+from app.schemas.api_responses import (
+    AnalysisJobAccepted,
+    AnalysisJobStatus,
+    BatchAnalyzeItem,
+    BatchAnalyzeResponse,
+    EmailsPageResponse,
+    PaginationMeta,
+)
+from app.schemas.schemas import EmailAnalysis, EmailBatchCreate, EmailCreate, EmailResponse
+from app.services.analysis_jobs import DONE, TERMINAL_STATUSES, Job, JobQueue, get_job_queue
+from app.services.data_version import bump_data_version, data_version
+from app.services.email_search import apply_text_search
+from app.services.email_service import EmailAnalysisService, get_analysis_service
+from app.services.email_store import (
+    AnalyzedEmail,
+    bulk_persist_analyses,
+    persist_analysis,
+    persist_analysis_detached,
+    release_bodies,
+)
+from app.services.principal import Principal
+from app.services.quota import (
+    QuotaExceeded,
+    QuotaReservation,
+    release_quota,
+    release_quota_detached,
+    reserve_quota,
+)
+from app.services.response_cache import cache_response, cached_response
 
 router = APIRouter(prefix="/emails", tags=["emails"])
 
+def _enforce_free_quota(db: Session, user: Principal, requested: int = 1) -> Optional[QuotaReservation]:
+    """Reserve `requested` of a FREE user's monthly analyses, or raise 402 if they do not fit.
+
+    Returns None for paid plans. Hand unused slots back with _release_unused.
+    """
+    if user.subscription_status != SubscriptionStatus.FREE:
+        return None
+    try:
+        return reserve_quota(db, user.id, settings.free_monthly_analysis_limit, requested)
+    except QuotaExceeded as exc:
+        raise HTTPException(
+            status_code=402,
+            detail=f"Monthly quota exceeded: {exc.used}/{exc.limit}. Upgrade to increase limits.",
+        )
+
+def _release_unused(db: Session, reservation: Optional[QuotaReservation], count: Optional[int] = None) -> None:
+    """Return reserved quota for analyses that were not stored (discards the session's pending work)."""
+    if reservation is None or count == 0:
+        return
+    db.rollback()
+    release_quota(db, reservation, count)
+
 # Per-user rate limit on analyze (e.g., 10/min per user); fallback to IP when unauthenticated
 @limiter.limit("10/minute", key_func=user_rate_limit_key)
 @router.post("/analyze", response_model=EmailResponse, summary="Analyze an email", description="Analyze email content with AI and persist the result and analytics.")
 async def analyze_email(
     request: Request,
     email_data: EmailCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db),
+    analysis_service: EmailAnalysisService = Depends(get_analysis_service),
 ):
     # Enforce FREE plan monthly quota
-    if current_user.subscription_status == SubscriptionStatus.FREE:
-        now = datetime.now(timezone.utc)
-        month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        used = (
-            db.query(EmailAnalytics)
-            .filter(
-                EmailAnalytics.user_id == current_user.id,
-                EmailAnalytics.created_at >= month_start,
-            )
-            .count()
-        )
-        if used >= settings.free_monthly_analysis_limit:
-            raise HTTPException(
-                status_code=402,
-                detail=(
-                    f"Monthly quota exceeded: {used}/{settings.free_monthly_analysis_limit}. "
-                    "Upgrade to increase limits."
-                ),
-            )
+    reservation = _enforce_free_quota(db, current_user)
 
     start_time = time.time()
 
-    # Initialize the email analysis service
-    from app.services.email_service import EmailAnalysisService
-    analysis_service = EmailAnalysisService()
-
     # Sanitize inputs to prevent XSS persistence
     safe_subject = sanitize_text(email_data.subject) if email_data.subject else None
     safe_content = sanitize_text(email_data.content)
 
     try:
-        analysis = analysis_service.analyze_email(content=safe_content, subject=safe_subject)
+        analysis = await analysis_service.analyze_email_async(content=safe_content, subject=safe_subject)
         processing_time = int((time.time() - start_time) * 1000)
-
-        email_record = Email(
-            user_id=current_user.id,
-            subject=safe_subject,
-            content=safe_content,
-            summary=analysis.summary,
-            category=analysis.category,
-            confidence_score=analysis.confidence_score,
-            processing_time_ms=processing_time,
+        return persist_analysis(
+            db,
+            current_user.id,
+            AnalyzedEmail(safe_subject, safe_content, analysis, processing_time),
         )
+    except Exception as exc:
+        _release_unused(db, reservation)
+        if isinstance(exc, HTTPException):
+            raise
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to analyze email",
+        )
+
+async def _analysis_events(
+    request: Request,
+    analysis_service: EmailAnalysisService,
+    safe_subject: Optional[str],
+    safe_content: str,
+    on_result=None,
+):
+    """SSE body shared by the streaming analyze endpoints.
+
+    Emits `token` events with summary text as the model produces it, then a
+    single `result` event (or `error`). `on_result(analysis, processing_time)`
+    runs before the result event, so a stored record exists when it arrives.
+    """
+    start_time = time.time()
+    # Flush headers right away so proxies and browsers open the stream
+    yield sse_comment("analyzing")
+    try:
+        async for part in analysis_service.stream_analysis(content=safe_content, subject=safe_subject):
+            if isinstance(part, EmailAnalysis):
+                processing_time = int((time.time() - start_time) * 1000)
+                result = part.model_dump(mode="json")
+                if on_result is not None:
+                    result = await on_result(part, processing_time)
+                yield format_sse("result", result)
+                return
+            yield format_sse("token", {"text": part})
+            if await request.is_disconnected():
+                return
+    except Exception:
+        yield format_sse("error", {"detail": "Failed to analyze email"})
+
+@limiter.limit("10/minute", key_func=user_rate_limit_key)
+@router.post(
+    "/analyze/stream",
+    summary="Analyze an email (streaming)",
+    description="Like /emails/analyze, but streams Server-Sent Events: `token` events carry summary text as it is generated; the final `result` event carries the stored email (category, confidence) and is sent after it is persisted.",
+)
+async def analyze_email_stream(
+    request: Request,
+    email_data: EmailCreate,
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db),
+    analysis_service: EmailAnalysisService = Depends(get_analysis_service),
+):
+    reservation = _enforce_free_quota(db, current_user)
+    safe_subject = sanitize_text(email_data.subject) if email_data.subject else None
+    safe_content = sanitize_text(email_data.content)
+    user_id = current_user.id
+    stored = False
+
+    async def store(analysis: EmailAnalysis, processing_time: int) -> dict:
+        nonlocal stored
+        item = AnalyzedEmail(safe_subject, safe_content, analysis, processing_time)
+        record = await run_in_threadpool(persist_analysis_detached, user_id, item)
+        stored = True
+        return record.model_dump(mode="json")
+
+    async def events():
+        try:
+            async for chunk in _analysis_events(request, analysis_service, safe_subject, safe_content, on_result=store):
+                yield chunk
+        finally:
+            # Failed, or the client went away before the result was stored
+            if reservation is not None and not stored:
+                await run_in_threadpool(release_quota_detached, reservation)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+@limiter.limit("5/minute", key_func=user_rate_limit_key)
+@router.post(
+    "/analyze/batch",
+    response_model=BatchAnalyzeResponse,
+    summary="Analyze a batch of emails",
+    description="Analyze up to ANALYSIS_BATCH_MAX_ITEMS emails in one request; rows are stored with a single bulk insert.",
+)
+async def analyze_email_batch(
+    request: Request,
+    batch: EmailBatchCreate,
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db),
+    analysis_service: EmailAnalysisService = Depends(get_analysis_service),
+):
+    # One quota reservation for the whole batch; slots of items not stored are handed back
+    reservation = _enforce_free_quota(db, current_user, requested=len(batch.items))
 
-        analytics_record = EmailAnalytics(
-            user_id=current_user.id,
-            sender=None,  # optional: populate if available in future
-            subject=safe_subject,
-            email_content=safe_content,
-            received_date=None,  # optional: set if available
-            priority=None,  # optional: set if available
-            category=analysis.category,
-            summary=analysis.summary,
+    results: list[BatchAnalyzeItem] = [BatchAnalyzeItem(index=i, success=False) for i in range(len(batch.items))]
+    pending: list[tuple[int, Optional[str], str]] = []
+    for index, item in enumerate(batch.items):
+        safe_subject = sanitize_text(item.subject) if item.subject else None
+        safe_content = sanitize_text(item.content)
+        if not safe_content:
+            results[index].error = "Email content is empty after sanitization"
+            continue
+        pending.append((index, safe_subject, safe_content))
+
+    # Short emails are packed several per completion; see analyze_many_async
+    started = time.time()
+    try:
+        analyses = await analysis_service.analyze_many_async(
+            [(content, subject) for _, subject, content in pending],
+            concurrency=settings.analysis_batch_concurrency,
+        )
+    except Exception:
+        _release_unused(db, reservation)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to analyze emails",
         )
+    # Calls overlap, so attribute the batch wall time evenly
+    processing_time = int((time.time() - started) * 1000 / max(1, len(pending)))
+    analyzed = [
+        (index, AnalyzedEmail(subject, content, analysis, processing_time))
+        for (index, subject, content), analysis in zip(pending, analyses)
+    ]
 
-        db.add(email_record)
-        db.add(analytics_record)
+    try:
+        records = bulk_persist_analyses(db, current_user.id, [a for _, a in analyzed])
+        # Serialize before commit: committed instances expire and would reload one by one
+        for (index, _), record in zip(analyzed, records):
+            results[index].success = True
+            results[index].data = EmailResponse.model_validate(record)
         db.commit()
-        db.refresh(email_record)
-        return email_record
-    except HTTPException:
-        raise
     except Exception:
+        _release_unused(db, reservation)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to analyze email",
+            detail="Failed to store analyzed emails",
         )
 
+    succeeded = sum(1 for r in results if r.success)
+    _release_unused(db, reservation, len(results) - succeeded)
+    return BatchAnalyzeResponse(data=results, succeeded=succeeded, failed=len(results) - succeeded)
+
+def _job_status(job: Job, db: Session) -> AnalysisJobStatus:
+    data = None
+    if job.status == DONE and job.email_id is not None:
+        email = db.query(Email).filter(Email.id == job.email_id, Email.user_id == job.user_id).first()
+        data = EmailResponse.model_validate(email) if email else None
+    return AnalysisJobStatus(
+        job_id=job.id,
+        status=job.status,
+        error=job.error,
+        created_at=job.created_at,
+        updated_at=job.updated_at,
+        data=data,
+    )
+
+async def _get_own_job(job_id: str, user: Principal, queue: JobQueue) -> Job:
+    job = await queue.get(job_id)
+    # Same 404 for foreign jobs as for missing ones
+    if job is None or job.user_id != user.id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
+
+@limiter.limit("10/minute", key_func=user_rate_limit_key)
+@router.post(
+    "/analyze/jobs",
+    status_code=status.HTTP_202_ACCEPTED,
+    response_model=AnalysisJobAccepted,
+    summary="Queue an email for analysis",
+    description="Enqueue analysis and return 202 with a job id immediately; poll the status URL or follow the SSE stream for the result.",
+)
+async def enqueue_analysis_job(
+    request: Request,
+    email_data: EmailCreate,
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db),
+    queue: JobQueue = Depends(get_job_queue),
+):
+    safe_subject = sanitize_text(email_data.subject) if email_data.subject else None
+    safe_content = sanitize_text(email_data.content)
+    if not safe_content:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email content is empty after sanitization")
+    reservation = _enforce_free_quota(db, current_user)
+    job = Job.new(current_user.id, safe_subject, safe_content, quota_month=reservation.month if reservation else None)
+    try:
+        await queue.put(job)
+    except Exception:
+        _release_unused(db, reservation)
+        raise
+    return AnalysisJobAccepted(
+        job_id=job.id,
+        status=job.status,
+        status_url=f"{router.prefix}/jobs/{job.id}",
+        stream_url=f"{router.prefix}/jobs/{job.id}/stream",
+    )
+
+@router.get("/jobs/{job_id}", response_model=AnalysisJobStatus, summary="Analysis job status")
+async def get_analysis_job(
+    job_id: str,
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db),
+    queue: JobQueue = Depends(get_job_queue),
+):
+    job = await _get_own_job(job_id, current_user, queue)
+    return _job_status(job, db)
+
+@router.get("/jobs/{job_id}/stream", summary="Analysis job events (SSE)", description="Server-Sent Events: `status` on every transition, then a final `result` or `error` event.")
+async def stream_analysis_job(
+    request: Request,
+    job_id: str,
+    current_user: Principal = Depends(get_current_principal),
+    queue: JobQueue = Depends(get_job_queue),
+):
+    job = await _get_own_job(job_id, current_user, queue)
+
+    def final_payload(finished: Job) -> dict:
+        db = SessionLocal()
+        try:
+            return _job_status(finished, db).model_dump(mode="json")
+        finally:
+            db.close()
+
+    async def events():
+        current: Optional[Job] = job
+        last_status = None
+        while current is not None:
+            if current.status != last_status:
+                last_status = current.status
+                yield format_sse("status", {"job_id": current.id, "status": current.status})
+            if current.status in TERMINAL_STATUSES:
+                payload = await run_in_threadpool(final_payload, current)
+                yield format_sse("result" if current.status == DONE else "error", payload)
+                return
+            if await request.is_disconnected():
+                return
+            current = await queue.wait_for_change(current.id, current.status, timeout=15.0)
+            if current is not None and current.status == last_status:
+                yield sse_comment()
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+def _with_bodies(query, include_content: bool):
+    """Load bodies for a whole page in one extra query, or not at all."""
+    if include_content:
+        return query.options(selectinload(Email.body), undefer(Email.legacy_content))
+    return query
+
+def _email_out(email: Email, include_content: bool = True) -> EmailResponse:
+    if include_content:
+        return EmailResponse.model_validate(email)
+    # Read column attributes only, so the body is never fetched
+    return EmailResponse.model_validate(
+        {name: getattr(email, name) for name in EmailResponse.model_fields if name != "content"}
+    )
+
+def _emails_page(
+    query,
+    sort_column,
+    descending: bool,
+    *,
+    page: int,
+    page_size: int,
+    cursor: Optional[str],
+    include_total: Optional[bool],
+    include_content: bool,
+    ranked_by: Optional[list] = None,
+) -> EmailsPageResponse:
+    """One page of `query` ordered by (sort_column, id): by OFFSET, or by keyset after `cursor`.
+
+    Both fetch page_size+1 rows to learn has_next without counting; the total
+    is counted only when asked for (by default in page mode, for compatibility).
+    `ranked_by` (relevance ordering) replaces the sort and supports OFFSET pages only.
+    """
+    page_size = max(1, min(100, page_size))
+    sort = f"{sort_column.key}:{'desc' if descending else 'asc'}"
+    if ranked_by is not None and cursor is not None:
+        raise HTTPException(status_code=400, detail="Relevance-ranked results are paged with page/page_size, not cursor")
+    if include_total is None:
+        include_total = cursor is None
+    total = query.count() if include_total else None
+
+    order = ranked_by if ranked_by is not None else keyset_order(sort_column, Email.id, descending)
+    ordered = _with_bodies(query, include_content).order_by(*order)
+    if cursor is not None:
+        try:
+            value, last_id = decode_cursor(cursor, sort)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        page_no = None
+        items = ordered.filter(after_row(sort_column, Email.id, value, last_id, descending)).limit(page_size + 1).all()
+    else:
+        page_no = max(1, page)
+        items = ordered.offset((page_no - 1) * page_size).limit(page_size + 1).all()
+    has_next = len(items) > page_size
+    items = items[:page_size]
+
+    pages = None
+    if total is not None:
+        pages = (total + page_size - 1) // page_size if total else 1
+    meta = PaginationMeta(
+        total=total,
+        page=page_no,
+        page_size=page_size,
+        pages=pages,
+        has_next=has_next,
+        has_prev=cursor is not None or page_no > 1,
+        next_cursor=None if ranked_by is not None else next_cursor(sort, sort_column.key, items, has_next),
+    )
+    return EmailsPageResponse(data=[_email_out(e, include_content) for e in items], pagination=meta)
+
 @router.get(
     "/",
     response_model=EmailsPageResponse,
     summary="List analyzed emails",
-    description="Get paginated list of the current user's analyzed emails.",
+    description=(
+        "Get the current user's analyzed emails, newest first. Page with page/page_size, or pass "
+        "pagination.next_cursor back as cursor (cost independent of depth; total not counted unless "
+        "include_total=true). Pass include_content=false to skip loading bodies."
+    ),
 )
 async def get_user_emails(
+    request: Request,
+    response: Response,
     page: int = 1,
     page_size: int = 20,
-    current_user: User = Depends(get_current_user),
+    cursor: Optional[str] = None,
+    include_total: Optional[bool] = None,
+    include_content: bool = True,
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db),
 ):
-    page = max(1, page)
-    page_size = max(1, min(100, page_size))
+    version, changed_at = data_version(db, current_user.id)
+    # page, cursor and include_* all arrive in the query string
+    etag = make_etag("emails", current_user.id, version, str(request.query_params))
+    not_modified = conditional_get(request, response, etag, changed_at)
+    if not_modified is not None:
+        return not_modified
     q = db.query(Email).filter(Email.user_id == current_user.id)
-    total = q.count()
-    pages = (total + page_size - 1) // page_size if total else 1
-    offset = (page - 1) * page_size
-    items = q.order_by(Email.id.desc()).offset(offset).limit(page_size).all()
-    meta = PaginationMeta(
-        total=total,
+    return _emails_page(
+        q,
+        Email.created_at,
+        descending=True,
         page=page,
         page_size=page_size,
-        pages=pages,
-        has_next=page < pages,
-        has_prev=page > 1,
+        cursor=cursor,
+        include_total=include_total,
+        include_content=include_content,
     )
-    return EmailsPageResponse(data=items, pagination=meta)
 
 @limiter.limit("30/minute", key_func=user_rate_limit_key)
 @router.get(
     "/search",
     response_model=EmailsPageResponse,
     summary="Search & filter analyzed emails",
-    description="Filter by text, category, confidence, and date range with pagination and sorting.",
+    description=(
+        "Filter by text, category, confidence, and date range with sorting. `q` is a full-text search of "
+        "subject and summary (every word must match as a prefix); its results are ranked by relevance "
+        "among the newest SEARCH_RANK_CANDIDATES matches unless sort_by is created_at or confidence. "
+        "Page with page/page_size, or pass "
+        "pagination.next_cursor back as cursor (same filters and sort; not for relevance). "
+        "Pass include_content=false to skip loading bodies."
+    ),
 )
 async def search_emails(
     request: Request,
+    response: Response,
     q: Optional[str] = None,
     category: Optional[EmailCategory] = None,
     categories: Optional[List[EmailCategory]] = None,
@@ -146,22 +479,28 @@ async def search_emails(
     date_to: Optional[str] = None,
     min_confidence: Optional[int] = None,
     max_confidence: Optional[int] = None,
-    sort_by: Literal["created_at", "confidence"] = "created_at",
+    sort_by: Optional[Literal["relevance", "created_at", "confidence"]] = None,
     sort_dir: Literal["asc", "desc"] = "desc",
     page: int = 1,
     page_size: int = 20,
-    current_user: User = Depends(get_current_user),
+    cursor: Optional[str] = None,
+    include_total: Optional[bool] = None,
+    include_content: bool = True,
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db),
 ):
-    from sqlalchemy import or_, func
+    version, _ = data_version(db, current_user.id)
+    # Any filter, sort or paging change is a different query string, hence a different entry
+    cache_key = (version, sorted(request.query_params.multi_items()))
+    hit = cached_response(response, "email-search", current_user.id, cache_key)
+    if hit is not None:
+        return hit
 
     qbase = db.query(Email).filter(Email.user_id == current_user.id)
-    if q:
-        ql = q.strip().lower()
-        pattern = f"%{ql}%"
-        qbase = qbase.filter(
-            or_(func.lower(Email.subject).like(pattern), func.lower(Email.summary).like(pattern))
-        )
+    ranked_by = None
+    if q and q.strip():
+        ranked = sort_by in (None, "relevance")
+        qbase, ranked_by = apply_text_search(qbase, q, db.get_bind().dialect.name, current_user.id, ranked=ranked)
     cats: List[EmailCategory] = []
     if categories:
         cats.extend(categories)
@@ -204,27 +543,23 @@ async def search_emails(
             qbase = qbase.filter(Email.created_at <= dtt)
 
     order_col = Email.confidence_score if sort_by == "confidence" else Email.created_at
-    qbase = qbase.order_by(order_col.asc().nullslast()) if sort_dir == "asc" else qbase.order_by(order_col.desc().nullslast())
-
-    page = max(1, page)
-    page_size = max(1, min(100, page_size))
-    total = qbase.count()
-    pages = (total + page_size - 1) // page_size if total else 1
-    items = qbase.offset((page - 1) * page_size).limit(page_size).all()
-    meta = PaginationMeta(
-        total=total,
+    result = _emails_page(
+        qbase,
+        order_col,
+        descending=sort_dir == "desc",
         page=page,
         page_size=page_size,
-        pages=pages,
-        has_next=page < pages,
-        has_prev=page > 1,
+        cursor=cursor,
+        include_total=include_total,
+        include_content=include_content,
+        ranked_by=ranked_by,
     )
-    return EmailsPageResponse(data=items, pagination=meta)
+    return cache_response(response, "email-search", current_user.id, cache_key, result)
 
 @router.get("/{email_id}", response_model=EmailResponse, summary="Get email by ID", description="Get a specific analyzed email by ID.")
 async def get_email(
     email_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get a specific email by ID."""
@@ -244,7 +579,7 @@ async def get_email(
 @router.delete("/{email_id}", summary="Delete email", description="Delete an analyzed email record by ID.")
 async def delete_email(
     email_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Delete an email record."""
@@ -259,7 +594,11 @@ async def delete_email(
             detail="Email not found"
         )
     
+    body = email.body_hash
     db.delete(email)
+    db.flush()
+    release_bodies(db, [body])
+    bump_data_version(db, current_user.id)
     db.commit()
     
     return {"message": "Email deleted successfully"}
@@ -267,16 +606,18 @@ async def delete_email(
 # Keep demo-analyze open but still rate limit by IP to avoid abuse
 @limiter.limit("5/minute", key_func=get_remote_address)
 @router.post("/demo-analyze", response_model=EmailAnalysis, summary="Demo: analyze without auth", description="Public demo endpoint to analyze email content without authentication (rate limited).")
-async def demo_analyze_email(request: Request, email_data: EmailCreate):
+async def demo_analyze_email(
+    request: Request,
+    email_data: EmailCreate,
+    analysis_service: EmailAnalysisService = Depends(get_analysis_service),
+):
     """Demo endpoint for analyzing emails without authentication."""
-    from app.services.email_service import EmailAnalysisService
-    analysis_service = EmailAnalysisService()
     safe_subject = sanitize_text(email_data.subject) if email_data.subject else None
     safe_content = sanitize_text(email_data.content)
     
     try:
         # Analyze the email
-        analysis = analysis_service.analyze_email(
+        analysis = await analysis_service.analyze_email_async(
             content=safe_content,
             subject=safe_subject
         )
@@ -289,4 +630,23 @@ async def demo_analyze_email(request: Request, email_data: EmailCreate):
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to analyze email"
-        )
\ No newline at end of file
+        )
+
+@limiter.limit("5/minute", key_func=get_remote_address)
+@router.post(
+    "/demo-analyze/stream",
+    summary="Demo: analyze without auth (streaming)",
+    description="Streaming variant of /emails/demo-analyze: `token` events with summary text, then a `result` event with the full analysis.",
+)
+async def demo_analyze_email_stream(
+    request: Request,
+    email_data: EmailCreate,
+    analysis_service: EmailAnalysisService = Depends(get_analysis_service),
+):
+    safe_subject = sanitize_text(email_data.subject) if email_data.subject else None
+    safe_content = sanitize_text(email_data.content)
+    return StreamingResponse(
+        _analysis_events(request, analysis_service, safe_subject, safe_content),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
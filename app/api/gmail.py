@@ -9,8 +9,9 @@ import secrets
 
 from app.core.config import settings
 from app.database.database import get_db
-from app.api.auth import get_current_user
+from app.api.auth import get_current_principal, get_current_user
 from app.models.models import User
+from app.services.principal import Principal, forget_user
 from jose import jwt
 
 router = APIRouter(prefix="/api/gmail", tags=["gmail"])
@@ -31,7 +32,7 @@ def _build_client_config() -> dict:
 
 
 @router.get("/connect")
-def connect_gmail(request: Request, current_user: User = Depends(get_current_user)):
+def connect_gmail(request: Request, current_user: Principal = Depends(get_current_principal)):
     # Initialize OAuth flow and redirect user to Google consent screen
     client_config = _build_client_config()
     flow = Flow.from_client_config(
@@ -52,7 +53,7 @@ def connect_gmail(request: Request, current_user: User = Depends(get_current_use
 
 
 @router.get("/connect_url")
-def connect_gmail_url(current_user: User = Depends(get_current_user)):
+def connect_gmail_url(current_user: Principal = Depends(get_current_principal)):
     client_config = _build_client_config()
     flow = Flow.from_client_config(
         client_config=client_config,
@@ -108,6 +109,7 @@ def gmail_callback(request: Request, db: Session = Depends(get_db)):
     user.gmail_token_expiry = creds.expiry if creds.expiry else None
     db.add(user)
     db.commit()
+    forget_user(user.email)
 
     return RedirectResponse(url="/")
 
@@ -128,4 +130,5 @@ def gmail_disconnect(db: Session = Depends(get_db), current_user: User = Depends
     current_user.gmail_token_expiry = None
     db.add(current_user)
     db.commit()
+    forget_user(current_user.email)
     return {"success": True}
@@ -3,18 +3,19 @@ from sqlalchemy.orm import Session
 import uuid
 from datetime import datetime, timedelta, timezone
 
-from app.api.auth import get_current_user
+from app.api.auth import get_current_principal
 from app.database.database import get_db
 from app.models.models import User, VerificationToken
 from app.core.config import settings
 from app.services.email_sender import send_email
 from app.schemas.api_responses import ApiMessage
+from app.services.principal import forget_user
 
 router = APIRouter(prefix="/api/auth", tags=["authentication"])
 _ttl_seconds = 60 * 60 * 24  # 24h
 
 @router.post("/send-verification", summary="Send verification email", description="Generate a verification token and send a verification email to the current user.", response_model=ApiMessage)
-async def send_verification(current_user = Depends(get_current_user), db: Session = Depends(get_db)):
+async def send_verification(current_user = Depends(get_current_principal), db: Session = Depends(get_db)):
     token = str(uuid.uuid4())
     expires_at = datetime.now(timezone.utc) + timedelta(seconds=_ttl_seconds)
     vt = VerificationToken(user_id=current_user.id, token=token, expires_at=expires_at)
@@ -50,4 +51,5 @@ async def verify_email(token: str, db: Session = Depends(get_db)):
     user.is_verified = True
     vt.used = True
     db.commit()
+    forget_user(user.email)
     return ApiMessage(message="Email verified")
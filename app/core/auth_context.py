@@ -0,0 +1,63 @@
+"""Per-request authentication context: the bearer token, decoded once.
+
+The auth_context middleware decodes the Authorization bearer token before
+routing and keeps its claims on request.state. The rate-limit key function,
+get_current_principal and the logout/refresh handlers read them from there
+instead of each running jwt.decode on the same string. Revocation and token
+type are still checked by the consumers (AuthService.token_data_from_claims).
+"""
+from dataclasses import dataclass, field
+from typing import Optional
+
+from fastapi import Request
+from jose import JWTError, jwt
+
+from app.core.config import settings
+
+
+def decode_token(token: str) -> Optional[dict]:
+    """Verified claims of `token`, or None when it is malformed, badly signed or expired."""
+    try:
+        return jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+    except JWTError:
+        return None
+
+
+def bearer_token(request: Request) -> Optional[str]:
+    auth = request.headers.get("authorization")
+    if auth and auth.lower().startswith("bearer "):
+        return auth.split(" ", 1)[1].strip() or None
+    return None
+
+
+@dataclass
+class AuthContext:
+    token: Optional[str] = None
+    claims: Optional[dict] = None  # None without a bearer token or when it does not verify
+    _decoded: dict[str, Optional[dict]] = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def from_request(cls, request: Request) -> "AuthContext":
+        ctx = cls(token=bearer_token(request))
+        if ctx.token:
+            ctx.claims = ctx.claims_for(ctx.token)
+        return ctx
+
+    @property
+    def subject(self) -> Optional[str]:
+        return self.claims.get("sub") if self.claims else None
+
+    def claims_for(self, token: str) -> Optional[dict]:
+        """Claims of `token` (the bearer, or e.g. a refresh token from the body), decoded at most once per request."""
+        if token not in self._decoded:
+            self._decoded[token] = decode_token(token)
+        return self._decoded[token]
+
+
+def auth_context(request: Request) -> AuthContext:
+    """The request's AuthContext; built on first use when the middleware did not run."""
+    ctx = getattr(request.state, "auth", None)
+    if ctx is None:
+        ctx = AuthContext.from_request(request)
+        request.state.auth = ctx
+    return ctx
@@ -0,0 +1,160 @@
+"""Text compression for stored email bodies.
+
+CompressedText columns (email_bodies.data, and the legacy inline body
+columns) frame the codec into the value itself: a NUL byte, a one-byte
+codec id, then the payload. Values without that prefix are plain UTF-8
+written before the column was converted, so a column can be switched to
+CompressedText first and its rows rewritten later
+(scripts/compress_text_columns.py).
+
+zstd needs the optional `zstandard` package; without it writes fall back to
+zlib (existing zstd values still need the package to be read).
+"""
+import logging
+import zlib
+from typing import Optional
+
+from sqlalchemy.types import LargeBinary, TypeDecorator
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+from app.core.config import settings
+
+logger = logging.getLogger("app")
+
+# Codec names stored next to compressed payloads
+RAW = ""
+ZLIB = "zlib"
+ZSTD = "zstd"
+
+_LEVELS = {ZLIB: 6, ZSTD: 3}
+_FRAME_MAGIC = b"\x00"
+_FRAME_IDS = {RAW: b"r", ZLIB: b"z", ZSTD: b"s"}
+_FRAME_CODECS = {v: k for k, v in _FRAME_IDS.items()}
+_warned_zstd = False
+
+
+def resolve_codec(codec: Optional[str]) -> str:
+    """Codec to write with: zlib when zstd is asked for but not installed, RAW for "none"."""
+    global _warned_zstd
+    codec = (codec or ZLIB).lower()
+    if codec in ("none", RAW):
+        return RAW
+    if codec == ZSTD and zstandard is None:
+        if not _warned_zstd:
+            logger.warning("zstd compression requested but zstandard is not installed; using zlib")
+            _warned_zstd = True
+        return ZLIB
+    if codec not in _LEVELS:
+        raise ValueError(f"Unknown codec {codec!r}")
+    return codec
+
+
+def _compress(raw: bytes, codec: str, level: Optional[int]) -> bytes:
+    level = _LEVELS[codec] if level is None else level
+    if codec == ZSTD:
+        return zstandard.ZstdCompressor(level=level).compress(raw)
+    return zlib.compress(raw, level)
+
+
+def _decompress(data: bytes, codec: str) -> bytes:
+    if codec == ZLIB:
+        return zlib.decompress(data)
+    if codec == ZSTD:
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd-compressed text")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec:
+        raise ValueError(f"Unknown codec {codec!r}")
+    return bytes(data)
+
+
+def compress_text(
+    text: str, min_bytes: Optional[int] = 1024, level: Optional[int] = None, codec: str = ZLIB
+) -> tuple[bytes, str]:
+    """UTF-8 encode `text`, compressing it when at least `min_bytes` long.
+
+    `min_bytes=None` disables compression. Returns (payload, codec); the raw
+    encoding is kept when compression would not make it smaller.
+    """
+    raw = text.encode("utf-8")
+    codec = resolve_codec(codec)
+    if min_bytes is None or codec == RAW or len(raw) < min_bytes:
+        return raw, RAW
+    packed = _compress(raw, codec, level)
+    if len(packed) >= len(raw):
+        return raw, RAW
+    return packed, codec
+
+
+def decompress_text(data: bytes, codec: str) -> str:
+    return _decompress(data, codec).decode("utf-8")
+
+
+def pack_text(text: str, min_bytes: Optional[int] = 1024, codec: str = ZLIB) -> bytes:
+    """Framed value for a CompressedText column."""
+    data, used = compress_text(text, min_bytes=min_bytes, codec=codec)
+    return _FRAME_MAGIC + _FRAME_IDS[used] + data
+
+
+def is_packed(value) -> bool:
+    return isinstance(value, (bytes, bytearray, memoryview)) and bytes(value[:1]) == _FRAME_MAGIC
+
+
+def unpack_text(value) -> str:
+    """Inverse of pack_text; unframed values are legacy plain UTF-8."""
+    if isinstance(value, str):
+        return value
+    data = bytes(value)
+    if not data.startswith(_FRAME_MAGIC):
+        return data.decode("utf-8")
+    codec = _FRAME_CODECS.get(data[1:2])
+    if codec is None:
+        raise ValueError(f"Unknown compressed text frame {data[1:2]!r}")
+    return decompress_text(data[2:], codec)
+
+
+def default_text_compression() -> tuple[Optional[int], str]:
+    """(min_bytes, codec) from settings; min_bytes is None when compression is off."""
+    if not settings.email_body_compression:
+        return None, RAW
+    return settings.email_body_compress_min_bytes, settings.email_body_compression_codec
+
+
+class CompressedText(TypeDecorator):
+    """Text stored as a binary column, compressed at or above a size threshold.
+
+    Thresholds and codec default to the EMAIL_BODY_COMPRESSION* settings,
+    read on every write. Reads accept compressed frames, legacy plain bytes
+    and str (SQLite rows written while the column was still TEXT). Not usable
+    in LIKE/equality filters; keep searched columns as Text.
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def __init__(self, min_bytes: Optional[int] = None, codec: Optional[str] = None):
+        super().__init__()
+        self.min_bytes = min_bytes
+        self.codec = codec
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        min_bytes, codec = default_text_compression()
+        if min_bytes is not None:
+            min_bytes = self.min_bytes if self.min_bytes is not None else min_bytes
+            codec = self.codec or codec
+        return pack_text(value, min_bytes=min_bytes, codec=codec)
+
+    def result_processor(self, dialect, coltype):
+        # Skip LargeBinary's bytes() coercion so legacy str values get through
+        def process(value):
+            return None if value is None else unpack_text(value)
+        return process
+
+    def copy(self, **kw):
+        return CompressedText(self.min_bytes, self.codec)
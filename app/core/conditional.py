@@ -0,0 +1,62 @@
+"""Conditional GET (ETag / Last-Modified) for per-user read endpoints.
+
+Endpoints derive the validator from a cheap version stamp instead of the
+response body: the user's data_version (bumped with every write to their
+emails or analytics) plus whatever else the response depends on (query
+string, current period). A matching If-None-Match, or an If-Modified-Since
+no older than Last-Modified, is answered 304 before the real query runs.
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Request, Response
+
+
+def make_etag(*parts) -> str:
+    """Weak ETag over `parts`: equal parts mean an equivalent JSON body, not identical bytes."""
+    digest = hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # Weak comparison (RFC 9110 13.1.2): ignore W/ on either side
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in header.split(","))
+
+
+def _not_modified_since(header: str, last_modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return last_modified.replace(microsecond=0) <= since
+
+
+def conditional_get(
+    request: Request,
+    response: Response,
+    etag: str,
+    last_modified: Optional[datetime] = None,
+) -> Optional[Response]:
+    """Put the validators on `response`; return a 304 to send instead when the client's copy is current.
+
+    If-Modified-Since is only consulted without If-None-Match, as RFC 9110 requires.
+    """
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified.astimezone(timezone.utc), usegmt=True)
+    response.headers.update(headers)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        fresh = _etag_matches(if_none_match, etag)
+    else:
+        if_modified_since = request.headers.get("if-modified-since")
+        fresh = bool(if_modified_since and last_modified and _not_modified_since(if_modified_since, last_modified))
+    return Response(status_code=304, headers=headers) if fresh else None
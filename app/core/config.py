@@ -17,10 +17,57 @@ class Settings(BaseSettings):
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
     refresh_token_expire_days: int = 30
+    # Resolved access tokens (user id/tier/flags) are reused for this long per process (0 = off)
+    principal_cache_ttl_seconds: float = 15.0
+    principal_cache_max_entries: int = 10000
+    # How often each worker pulls new rows of blacklisted_tokens into its revocation index (0 = never)
+    revocation_sync_interval_seconds: float = 5.0
+    # Delete expired/used token rows in-process this often (0 = off; use scripts/purge_expired_tokens.py)
+    token_purge_interval_minutes: float = 0
+    token_purge_batch_size: int = 1000
+    # Password hashing pool per worker (0 = hash inline on the event loop) and its queue bound;
+    # login/register/reset beyond the bound get 503 + Retry-After
+    password_hash_workers: int = 4
+    password_hash_max_pending: int = 32
     
     # OpenAI (optional in dev; features will fallback if not set)
     openai_api_key: Optional[str] = None
-    
+    openai_model: str = "gpt-3.5-turbo"
+    # Per-call deadline for a completion; on timeout the keyword fallback is used
+    openai_timeout_seconds: float = 20.0
+    openai_max_retries: int = 2
+    # Keep-alive pool for the app-lifetime analysis client
+    openai_pool_max_connections: int = 50
+    openai_pool_max_keepalive: int = 20
+    openai_pool_keepalive_expiry_seconds: float = 30.0
+    # Token budget for the email body in the prompt (~4 chars per token); longer bodies
+    # lose quoted replies and middle paragraphs first
+    analysis_max_input_tokens: int = 1500
+    # Hard limit on submitted email bodies (422 above it)
+    email_max_content_chars: int = 1_000_000
+    # Bodies are stored once in email_bodies (shared by emails and email_analytics);
+    # compress those at least this large. Also applies to CompressedText columns.
+    email_body_compression: bool = True
+    email_body_compress_min_bytes: int = 1024
+    email_body_compression_codec: str = "zlib"  # zlib | zstd (needs the zstandard package)
+    # Content-hash cache in front of the model call
+    analysis_cache_enabled: bool = True
+    analysis_cache_max_entries: int = 10000
+    analysis_cache_ttl_seconds: int = 7 * 24 * 3600
+    # Also keep entries in the analysis_cache_entries table (shared across workers/restarts); expired rows go with the token purge
+    analysis_cache_persist: bool = False
+    # Local NumPy classifier (scripts/train_classifier.py); loaded only if the file exists.
+    # Replaces the keyword fallback, and mail it scores as one of the skip categories
+    # with probability >= the threshold is answered without a model call.
+    local_classifier_enabled: bool = True
+    local_classifier_path: str = "models/email_classifier.npz"
+    local_classifier_skip_threshold: float = 0.95
+    local_classifier_skip_categories: str = "spam,newsletter"  # comma-separated
+    # JSON list of {"category", "keywords", "weight"} for the keyword fallback; built-in rules if unset
+    fallback_rules_path: Optional[str] = None
+    # /emails/search?q= ranks (and returns) at most this many of the newest matches
+    search_rank_candidates: int = 5000
+
     # Stripe
     stripe_secret_key: Optional[str] = None
     stripe_publishable_key: Optional[str] = None
@@ -39,6 +86,30 @@ class Settings(BaseSettings):
     rate_limit_per_minute: int = 10
     # Quotas
     free_monthly_analysis_limit: int = 20
+    # Refuse repeat requests from an exhausted FREE user without a DB query for this long (0 = off)
+    quota_exhausted_cache_seconds: float = 30.0
+    quota_exhausted_cache_max_entries: int = 10000
+    # POST /emails/analyze/batch
+    analysis_batch_max_items: int = 50
+    analysis_batch_concurrency: int = 8
+    # Pack several short emails into one completion (batch path)
+    analysis_pack_enabled: bool = True
+    analysis_pack_size: int = 8
+    analysis_pack_max_chars: int = 1500
+    analysis_pack_tokens_per_item: int = 120
+    # Cache for expensive read responses (usage series, search pages, admin overview)
+    response_cache_backend: str = "memory"  # memory | redis | off
+    response_cache_max_entries: int = 4096
+    response_cache_ttl_seconds: float = 60.0
+    redis_url: Optional[str] = None  # e.g. redis://localhost:6379/0; needs the redis package
+    # Background analysis jobs (POST /emails/analyze/jobs)
+    analysis_jobs_backend: str = "memory"  # memory | database
+    # In-process workers per API worker; set 0 when running scripts/run_analysis_worker.py instead
+    analysis_job_workers: int = 2
+    analysis_job_poll_interval_seconds: float = 0.5
+    analysis_job_stale_seconds: int = 600
+    # A job still running after this many claims (worker crashed each time) is failed, not re-queued
+    analysis_job_max_attempts: int = 3
 
     # Google OAuth (Gmail)
     google_client_id: Optional[str] = None
@@ -1,23 +1,150 @@
-from typing import Set, Optional
-from datetime import datetime, timezone
+"""JWT revocation list: the blacklisted_tokens table plus a per-worker in-memory index.
+
+is_blacklisted() runs on every authenticated request and only consults the
+index (a dict lookup, no DB query). The index learns about revocations two
+ways:
+
+- blacklist_jti(): the worker that handles a logout adds the jti at once.
+- sync(): reads rows added to blacklisted_tokens since the last pass (by id),
+  so revocations made by other workers apply within
+  REVOCATION_SYNC_INTERVAL_SECONDS. The app runs it in the background
+  (run_sync_loop); the first pass loads every unexpired row.
+
+Each entry remembers its token's expiry; once that has passed the token is
+rejected by its own exp claim anyway, so sync() drops it (expiry heap). The
+index therefore holds only revocations that still matter.
+"""
+import asyncio
+import heapq
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+
+from app.core.config import settings
 from app.models.models import BlacklistedToken
 
-# Fallback in-memory set (used only if DB not provided)
-blacklisted_jti: Set[str] = set()
+logger = logging.getLogger("app")
+
+
+def _epoch(value: datetime) -> float:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class RevocationIndex:
+    """Revoked jtis of this worker, each with the expiry of its token."""
+
+    # Re-read this many ids below the high-water mark on every pass: an id allocated
+    # before a later one but committed after it (concurrent logouts) is still seen
+    SYNC_LOOKBACK_IDS = 256
+
+    def __init__(self):
+        self._expires: dict[str, float] = {}
+        self._heap: list[tuple[float, str]] = []
+        self._lock = threading.Lock()
+        self._high_water = 0
+        self._loaded = False
+        self.synced_at: Optional[float] = None
+        self.pruned = 0
+
+    def __contains__(self, jti: str) -> bool:
+        return jti in self._expires
+
+    def __len__(self) -> int:
+        return len(self._expires)
+
+    def add(self, jti: str, expires_at: float) -> None:
+        with self._lock:
+            self._add(jti, expires_at)
+
+    def _add(self, jti: str, expires_at: float) -> None:
+        if self._expires.get(jti, 0.0) < expires_at:
+            self._expires[jti] = expires_at
+            heapq.heappush(self._heap, (expires_at, jti))
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """Forget revocations whose tokens have expired; returns how many."""
+        now = time.time() if now is None else now
+        removed = 0
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                expires_at, jti = heapq.heappop(self._heap)
+                # A later add() may have extended this jti; only its newest heap entry removes it
+                if self._expires.get(jti) == expires_at:
+                    del self._expires[jti]
+                    removed += 1
+            self.pruned += removed
+        return removed
+
+    def sync(self, db: Session, batch_size: int = 5000) -> int:
+        """Load revocations added since the last pass (all unexpired ones on the first); returns rows read."""
+        now = datetime.now(timezone.utc)
+        after = 0 if not self._loaded else max(0, self._high_water - self.SYNC_LOOKBACK_IDS)
+        read = 0
+        while True:
+            rows = db.execute(
+                select(BlacklistedToken.id, BlacklistedToken.jti, BlacklistedToken.expires_at)
+                .where(BlacklistedToken.id > after, BlacklistedToken.expires_at > now)
+                .order_by(BlacklistedToken.id)
+                .limit(batch_size)
+            ).all()
+            with self._lock:
+                for row in rows:
+                    self._add(row.jti, _epoch(row.expires_at))
+                if rows:
+                    self._high_water = max(self._high_water, rows[-1].id)
+            read += len(rows)
+            if len(rows) < batch_size:
+                break
+            after = rows[-1].id
+        self._loaded = True
+        self.synced_at = time.time()
+        self.prune()
+        return read
+
+    def clear(self) -> None:
+        with self._lock:
+            self._expires.clear()
+            self._heap.clear()
+            self._high_water = 0
+            self._loaded = False
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._expires),
+            "high_water_id": self._high_water,
+            "synced_at": self.synced_at,
+            "pruned": self.pruned,
+        }
+
+
+revocations = RevocationIndex()
+
+
+def blacklist_jti(jti: str, expires_at: Optional[datetime] = None):
+    revocations.add(jti, _epoch(expires_at or _default_expiry()))
 
-def blacklist_jti(jti: str):
-    blacklisted_jti.add(jti)
 
 def is_blacklisted(jti: str) -> bool:
-    return jti in blacklisted_jti
+    return jti in revocations
+
+
+def _default_expiry() -> datetime:
+    # Unknown token lifetime: keep the entry as long as the longest-lived token (refresh)
+    return datetime.now(timezone.utc) + timedelta(days=settings.refresh_token_expire_days)
+
 
 def blacklist_jti_db(db: Session, jti: str, expires_at: Optional[datetime] = None):
     if not jti:
         return
     if expires_at is None:
-        # default to now+30d to be safe
-        expires_at = datetime.now(timezone.utc)
+        expires_at = _default_expiry()
     exists = db.query(BlacklistedToken).filter(BlacklistedToken.jti == jti).first()
     if not exists:
         db.add(BlacklistedToken(jti=jti, expires_at=expires_at))
@@ -30,6 +157,26 @@ def is_blacklisted_db(db: Session, jti: str) -> bool:
     if not rec:
         return False
     # Optionally prune expired
-    if rec.expires_at and rec.expires_at < datetime.now(timezone.utc):
+    if rec.expires_at and _epoch(rec.expires_at) < time.time():
         return False
-    return True
\ No newline at end of file
+    return True
+
+
+def sync_revocations() -> int:
+    from app.database.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return revocations.sync(db)
+    finally:
+        db.close()
+
+
+async def run_sync_loop(interval_seconds: float) -> None:
+    """Keep `revocations` in step with blacklisted_tokens until cancelled."""
+    while True:
+        try:
+            await asyncio.to_thread(sync_revocations)
+        except Exception:
+            logger.warning("revocation sync failed", exc_info=True)
+        await asyncio.sleep(interval_seconds)
@@ -1,7 +1,7 @@
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 from fastapi import Request
-from jose import jwt, JWTError
+from app.core.auth_context import auth_context
 from app.core.config import settings
 
 
@@ -9,16 +9,9 @@ def user_rate_limit_key(request: Request) -> str:
     """Key function for rate limiting based on authenticated user (email in JWT).
     Falls back to client IP if no/invalid token.
     """
-    auth = request.headers.get("authorization") or request.headers.get("Authorization")
-    if auth and auth.lower().startswith("bearer "):
-        try:
-            token = auth.split(" ", 1)[1].strip()
-            payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-            sub = payload.get("sub")
-            if sub:
-                return f"user:{sub.lower()}"
-        except JWTError:
-            pass
+    sub = auth_context(request).subject
+    if sub:
+        return f"user:{sub.lower()}"
     return get_remote_address(request)
 
 
@@ -0,0 +1,62 @@
+"""Opaque keyset cursors for list endpoints.
+
+A cursor records the sort it was issued for and the (sort value, id) of the
+last row returned; the next page starts strictly after that row, so its
+cost does not grow with depth the way OFFSET does. Sort values may be NULL
+(sorted last in both directions) and ids break ties. For NOT NULL sort
+columns the order and the filter are plain row comparisons, which
+(user_id, column, id) indexes serve as a range scan in either direction.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Optional
+
+from sqlalchemy import and_, or_, tuple_
+
+
+def encode_cursor(sort: str, value: Any, last_id: int) -> str:
+    payload = {"s": sort, "id": last_id, "v": value}
+    if isinstance(value, datetime):
+        payload["v"], payload["t"] = value.isoformat(), "dt"
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> tuple[Any, int]:
+    """Return (value, last_id); ValueError if malformed or issued for another sort."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        value, last_id = payload.get("v"), int(payload["id"])
+        if payload.get("t") == "dt":
+            value = datetime.fromisoformat(value)
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+    if payload.get("s") != sort:
+        raise ValueError("Cursor was issued for a different sort order")
+    return value, last_id
+
+
+def keyset_order(column, id_column, descending: bool) -> list:
+    if descending:
+        first = column.desc().nullslast() if column.nullable else column.desc()
+        return [first, id_column.desc()]
+    first = column.asc().nullslast() if column.nullable else column.asc()
+    return [first, id_column.asc()]
+
+
+def after_row(column, id_column, value: Any, last_id: int, descending: bool):
+    """WHERE clause for rows after (value, last_id) in keyset_order(column, id_column, descending)."""
+    past_id = id_column < last_id if descending else id_column > last_id
+    if value is None:
+        return and_(column.is_(None), past_id)
+    row, last = tuple_(column, id_column), tuple_(value, last_id)
+    past_row = row < last if descending else row > last
+    return or_(past_row, column.is_(None)) if column.nullable else past_row
+
+
+def next_cursor(sort: str, column_name: str, rows: list, has_next: bool) -> Optional[str]:
+    if not has_next or not rows:
+        return None
+    last = rows[-1]
+    return encode_cursor(sort, getattr(last, column_name), last.id)
@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+import json
+from typing import Any
+
+# Headers for text/event-stream responses; X-Accel-Buffering stops nginx from
+# buffering the stream (which would defeat early delivery of events)
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",
+}
+
+
+def format_sse(event: str, data: Any) -> str:
+    """Encode one Server-Sent Event with a JSON payload."""
+    payload = json.dumps(data, default=str, separators=(",", ":"))
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+def sse_comment(text: str = "keep-alive") -> str:
+    """Comment line; clients ignore it but it keeps idle proxies from closing the stream."""
+    return f": {text}\n\n"
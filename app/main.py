@@ -4,6 +4,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import HTMLResponse
 from sqlalchemy.orm import Session
 from datetime import datetime, timezone
+import asyncio
 import time
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
@@ -15,6 +16,8 @@ from app.core.config import settings
 from sqlalchemy import text
 from app.core.logging_config import setup_logging
 from app.core.limits import limiter
+from app.core.auth_context import AuthContext
+from app.core.jwt_blacklist import run_sync_loop
 from app.schemas.api_responses import ErrorEnvelope, ApiError, HealthStatus
 from app.database.database import engine, get_db
 from app.models import models
@@ -23,6 +26,11 @@ from app.api import verification
 from app.api import admin as admin_router
 from app.api import analytics as analytics_router
 from app.api import gmail as gmail_router
+from app.services.email_service import EmailAnalysisService, get_analysis_service
+from app.services.analysis_jobs import AnalysisWorkerPool, build_job_queue
+from app.services.maintenance import run_purge_loop
+from app.services.password_hashing import get_password_hasher
+from app.services.response_cache import get_response_cache
 
 # Initialize logging
 setup_logging(settings)
@@ -95,10 +103,59 @@ async def _init_db_if_needed():
             "Set CORS_ALLOWED_ORIGINS in your environment (comma-separated)."
         )
 
+# App-lifetime analysis service: one OpenAI client + keep-alive pool per worker
+@app.on_event("startup")
+async def _init_analysis_service():
+    app.state.analysis_service = EmailAnalysisService()
+    # Background analysis jobs: queue backend + in-process workers
+    app.state.analysis_job_queue = build_job_queue()
+    app.state.analysis_worker_pool = AnalysisWorkerPool(
+        app.state.analysis_job_queue, app.state.analysis_service, settings.analysis_job_workers
+    )
+    app.state.analysis_worker_pool.start()
+
+# Per-worker revocation index: follow blacklisted_tokens so logouts on other workers apply here
+@app.on_event("startup")
+async def _start_revocation_sync():
+    app.state.revocation_sync = None
+    if settings.revocation_sync_interval_seconds > 0:
+        app.state.revocation_sync = asyncio.create_task(run_sync_loop(settings.revocation_sync_interval_seconds))
+
+# Optional in-process token purge (otherwise scripts/purge_expired_tokens.py from cron)
+@app.on_event("startup")
+async def _start_token_purge():
+    app.state.token_purge = None
+    if settings.token_purge_interval_minutes > 0:
+        app.state.token_purge = asyncio.create_task(run_purge_loop(settings.token_purge_interval_minutes * 60))
+
+@app.on_event("shutdown")
+async def _close_analysis_service():
+    pool = getattr(app.state, "analysis_worker_pool", None)
+    if pool is not None:
+        await pool.stop()
+    for name in ("revocation_sync", "token_purge"):
+        task = getattr(app.state, name, None)
+        if task is not None:
+            task.cancel()
+            setattr(app.state, name, None)
+    service = getattr(app.state, "analysis_service", None)
+    if service is not None:
+        await service.aclose()
+    # Loop-bound objects must not outlive this event loop
+    app.state.analysis_worker_pool = None
+    app.state.analysis_job_queue = None
+    app.state.analysis_service = None
+
 # Rate limiting
 app.state.limiter = limiter
 app.add_middleware(SlowAPIMiddleware)
 
+# Decode the bearer token once per request; the limiter key and auth dependencies read it from here
+@app.middleware("http")
+async def populate_auth_context(request: Request, call_next):
+    request.state.auth = AuthContext.from_request(request)
+    return await call_next(request)
+
 @app.exception_handler(RateLimitExceeded)
 async def rate_limit_handler(request: Request, exc: RateLimitExceeded):
     # Build a standard error envelope and include headers via slowapi's injector
@@ -144,6 +201,7 @@ async def http_exception_handler(request: Request, exc: FastAPIHTTPException):
     return JSONResponse(
         status_code=exc.status_code,
         content=ErrorEnvelope(success=False, error=ApiError(code=exc.status_code, message=message), request_id=req_id).model_dump(),
+        headers=getattr(exc, "headers", None),
     )
 
 # CORS middleware (API-only): explicit origins
@@ -297,6 +355,21 @@ async def diag_cors():
         "allow_headers": "*",
     }
 
+# Diagnostics: analysis client pool and cache statistics (no secrets)
+@app.get("/diag/analysis")
+async def diag_analysis(analysis_service: EmailAnalysisService = Depends(get_analysis_service)):
+    return {"pool": analysis_service.pool_stats(), "cache": analysis_service.cache_stats()}
+
+# Diagnostics: password hashing pool (queue depth, shed requests)
+@app.get("/diag/auth")
+async def diag_auth():
+    return {"password_hashing": get_password_hasher().stats()}
+
+# Diagnostics: response cache backend and hit rates per namespace
+@app.get("/diag/cache")
+async def diag_cache():
+    return get_response_cache().stats()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
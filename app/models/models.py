@@ -1,6 +1,8 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Enum
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, Date, DateTime, Boolean, ForeignKey, Enum, Index, event, text
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy.sql import func
+from app.core.compression import CompressedText
+from app.core.time_utils import utcnow
 from app.database.database import Base
 import enum
 from datetime import datetime
@@ -25,6 +27,11 @@ class EmailCategory(str, enum.Enum):
     PROMOTION = "promotion"
     OTHER = "other"
 
+class AnalysisSource(str, enum.Enum):
+    LLM = "llm"
+    CLASSIFIER = "classifier"
+    KEYWORDS = "keywords"
+
 class User(Base):
     __tablename__ = "users"
     
@@ -49,11 +56,16 @@ class User(Base):
     timezone = Column(String(64), nullable=False, default="UTC")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Bumped with every write to the user's emails/analytics; drives ETag / Last-Modified
+    data_version = Column(Integer, nullable=False, default=0, server_default="0")
+    data_changed_at = Column(DateTime(timezone=True), nullable=True)
     
     # Relationships
     emails = relationship("Email", back_populates="user")
     subscriptions = relationship("Subscription", back_populates="user")
     email_analytics = relationship("EmailAnalytics", back_populates="user", cascade="all, delete-orphan")
+    usage_daily = relationship("UsageDaily", cascade="all, delete-orphan")
+    quota_counters = relationship("QuotaCounter", cascade="all, delete-orphan")
     verification_tokens = relationship("VerificationToken", back_populates="user", cascade="all, delete-orphan")
     password_reset_tokens = relationship("PasswordResetToken", back_populates="user", cascade="all, delete-orphan")
     refresh_tokens = relationship("RefreshToken", back_populates="user", cascade="all, delete-orphan")
@@ -64,15 +76,73 @@ class Email(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     subject = Column(String(500), nullable=True)
-    content = Column(Text, nullable=False)
+    # Inline body of rows written before email_bodies existed; new rows reference body_hash
+    legacy_content = deferred(Column("content", CompressedText, nullable=True))
+    body_hash = Column(String(64), ForeignKey("email_bodies.hash"), nullable=True, index=True)
     summary = Column(Text, nullable=True)
     category = Column(Enum(EmailCategory), nullable=True)
     confidence_score = Column(Integer, nullable=True)  # 0-100
     processing_time_ms = Column(Integer, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    dropped_tokens = Column(Integer, nullable=True)  # left out of the prompt by the token budget
+    # AnalysisSource value of the label (NULL on rows analyzed before it was recorded)
+    analysis_source = Column(String(20), nullable=True)
+    # Set in Python as well so SQLite keeps microseconds (keyset cursors compare on it)
+    created_at = Column(DateTime(timezone=True), nullable=False, default=utcnow, server_default=func.now())
+
+    # Every hot query filters on user_id first: list/search order by created_at or
+    # confidence (id breaks ties for keyset cursors), search filters by category
+    __table_args__ = (
+        Index("ix_emails_user_created", "user_id", "created_at", "id"),
+        Index("ix_emails_user_category_created", "user_id", "category", "created_at"),
+        Index("ix_emails_user_confidence", "user_id", "confidence_score", "id"),
+    )
     
     # Relationships
     user = relationship("User", back_populates="emails")
+    body = relationship("EmailBody", lazy="select")
+
+    @property
+    def content(self) -> str | None:
+        """Email body; loaded on first access (see selectinload(Email.body) for lists)."""
+        if self.body_hash is None:
+            return self.legacy_content
+        return self.body.text if self.body is not None else None
+
+# Full-text index over emails.subject + summary (see app/services/email_search.py).
+# SQLite: external-content FTS5 table kept in sync by triggers. Postgres: a stored
+# generated tsvector column with a GIN index. Migration e7f8a9b0c1d2 creates the same.
+EMAIL_SEARCH_DDL = {
+    "sqlite": [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS emails_fts USING fts5("
+        "subject, summary, user_id, content='emails', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+        "CREATE TRIGGER IF NOT EXISTS emails_fts_ai AFTER INSERT ON emails BEGIN "
+        "INSERT INTO emails_fts(rowid, subject, summary, user_id) VALUES (new.id, new.subject, new.summary, new.user_id); END",
+        "CREATE TRIGGER IF NOT EXISTS emails_fts_ad AFTER DELETE ON emails BEGIN "
+        "INSERT INTO emails_fts(emails_fts, rowid, subject, summary, user_id) VALUES ('delete', old.id, old.subject, old.summary, old.user_id); END",
+        "CREATE TRIGGER IF NOT EXISTS emails_fts_au AFTER UPDATE OF subject, summary, user_id ON emails BEGIN "
+        "INSERT INTO emails_fts(emails_fts, rowid, subject, summary, user_id) VALUES ('delete', old.id, old.subject, old.summary, old.user_id); "
+        "INSERT INTO emails_fts(rowid, subject, summary, user_id) VALUES (new.id, new.subject, new.summary, new.user_id); END",
+    ],
+    "postgresql": [
+        "ALTER TABLE emails ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS "
+        "(setweight(to_tsvector('simple', coalesce(subject, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(summary, '')), 'B')) STORED",
+        "CREATE INDEX IF NOT EXISTS ix_emails_search_vector ON emails USING gin (search_vector)",
+    ],
+}
+
+
+@event.listens_for(Email.__table__, "after_create")
+def _create_email_search_index(target, connection, **kw):
+    for statement in EMAIL_SEARCH_DDL.get(connection.dialect.name, []):
+        connection.execute(text(statement))
+
+
+@event.listens_for(Email.__table__, "before_drop")
+def _drop_email_search_index(target, connection, **kw):
+    if connection.dialect.name == "sqlite":
+        connection.execute(text("DROP TABLE IF EXISTS emails_fts"))
+
 
 class Subscription(Base):
     __tablename__ = "subscriptions"
@@ -100,20 +170,99 @@ class EmailAnalytics(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     sender = Column(String(255), nullable=True)
     subject = Column(String(500), nullable=True)
-    email_content = Column(Text, nullable=True)
+    # Legacy inline copy; new rows share the Email's body via body_hash
+    email_content = deferred(Column(CompressedText, nullable=True))
+    body_hash = Column(String(64), ForeignKey("email_bodies.hash"), nullable=True, index=True)
     received_date = Column(DateTime(timezone=True), nullable=True)
     priority = Column(String(50), nullable=True)
     category = Column(String(50), nullable=True)
     summary = Column(Text, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    # Quota checks and usage summaries count a user's rows since a date;
+    # admin usage counts all rows since a date
+    __table_args__ = (
+        Index("ix_email_analytics_user_created", "user_id", "created_at"),
+        Index("ix_email_analytics_user_category_created", "user_id", "category", "created_at"),
+        Index("ix_email_analytics_created_at", "created_at"),
+    )
+
     user = relationship("User", back_populates="email_analytics")
+    body = relationship("EmailBody", lazy="select")
+
+
+class UsageDaily(Base):
+    """Analyses per user, UTC day and category; maintained with every EmailAnalytics insert.
+
+    Usage endpoints and the FREE quota read this instead of counting
+    email_analytics. Rebuild with scripts/rebuild_usage_rollup.py.
+    """
+    __tablename__ = "usage_daily"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    category = Column(String(50), primary_key=True, default="")  # "" when uncategorized
+    count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (Index("ix_usage_daily_day", "day"),)
+
+
+class QuotaCounter(Base):
+    """Analyses reserved by a FREE user in one UTC calendar month; see app/services/quota.py."""
+    __tablename__ = "quota_counters"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    month = Column(Date, primary_key=True)  # first day of the month
+    used = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), nullable=False, default=utcnow, onupdate=utcnow)
+
+
+class EmailBody(Base):
+    """Content-addressed email body shared by emails and email_analytics rows."""
+    __tablename__ = "email_bodies"
+
+    hash = Column(String(64), primary_key=True)  # sha256 hex of the UTF-8 body
+    text = Column("data", CompressedText, nullable=False)
+    size = Column(Integer, nullable=False)  # uncompressed bytes
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class AnalysisCacheEntry(Base):
+    """Persistent tier of the analysis cache, keyed by content hash."""
+    __tablename__ = "analysis_cache_entries"
+
+    id = Column(Integer, primary_key=True, index=True)
+    cache_key = Column(String(64), unique=True, index=True, nullable=False)
+    summary = Column(Text, nullable=False)
+    category = Column(String(50), nullable=False)
+    confidence_score = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+
+class AnalysisJob(Base):
+    """Queued /emails/analyze work for the database job-queue backend."""
+    __tablename__ = "analysis_jobs"
+
+    id = Column(String(36), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    status = Column(String(16), nullable=False, default="queued", index=True)
+    subject = Column(String(500), nullable=True)
+    # Cleared once the job finishes; the stored Email row holds the body
+    content = Column(CompressedText, nullable=True)
+    email_id = Column(Integer, nullable=True)
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    quota_month = Column(Date, nullable=True)  # FREE quota slot to hand back if the job fails
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+
+
 class BlacklistedToken(Base):
     __tablename__ = "blacklisted_tokens"
 
     id = Column(Integer, primary_key=True, index=True)
     jti = Column(String(64), unique=True, index=True, nullable=False)
-    expires_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 
@@ -123,7 +272,7 @@ class VerificationToken(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     token = Column(String(128), unique=True, index=True, nullable=False)
-    expires_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
     used = Column(Boolean, default=False, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
@@ -136,7 +285,7 @@ class PasswordResetToken(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     token = Column(String(128), unique=True, index=True, nullable=False)
-    expires_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
     used = Column(Boolean, default=False, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
@@ -149,7 +298,7 @@ class RefreshToken(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     jti = Column(String(64), unique=True, index=True, nullable=False)
-    expires_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
     revoked = Column(Boolean, default=False, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
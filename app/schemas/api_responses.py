@@ -1,9 +1,12 @@
 from __future__ import annotations
 
+from datetime import datetime
 from typing import Generic, Optional, TypeVar, Any
 from typing import Literal
 from pydantic import BaseModel
 
+from app.schemas.schemas import EmailResponse
+
 T = TypeVar("T")
 
 
@@ -39,20 +42,55 @@ class HealthStatus(BaseModel):
 
 
 class PaginationMeta(BaseModel):
-    total: int
-    page: int
+    # total/pages are None when not counted (include_total=false, the cursor-mode default)
+    total: Optional[int] = None
+    page: Optional[int] = None  # None in cursor mode
     page_size: int
-    pages: int
+    pages: Optional[int] = None
     has_next: bool
     has_prev: bool
+    # Pass as ?cursor= to fetch the next page by keyset instead of OFFSET
+    next_cursor: Optional[str] = None
 
 
 class EmailsPageResponse(BaseModel):
     success: Literal[True] = True
-    data: list[Any]
+    data: list[EmailResponse]
     pagination: PaginationMeta
 
 
+class BatchAnalyzeItem(BaseModel):
+    index: int  # position in the request's items list
+    success: bool
+    data: Optional[EmailResponse] = None
+    error: Optional[str] = None
+
+
+class BatchAnalyzeResponse(BaseModel):
+    success: Literal[True] = True
+    data: list[BatchAnalyzeItem]
+    succeeded: int
+    failed: int
+
+
+class AnalysisJobAccepted(BaseModel):
+    success: Literal[True] = True
+    job_id: str
+    status: str
+    status_url: str
+    stream_url: str
+
+
+class AnalysisJobStatus(BaseModel):
+    success: Literal[True] = True
+    job_id: str
+    status: str  # queued | running | done | failed
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    data: Optional[EmailResponse] = None  # set once status is done
+
+
 # Analytics payloads
 class UsageTotals(BaseModel):
     user_id: int
@@ -62,13 +100,15 @@ class UsageTotals(BaseModel):
 
 
 class DailyBucket(BaseModel):
-    date: str  # YYYY-MM-DD
+    date: str  # YYYY-MM-DD (day; week: its Monday) or YYYY-MM-DDTHH:00 (hour)
     count: int
 
 
 class UsageTimeSeries(BaseModel):
     success: Literal[True] = True
     data: list[DailyBucket]
+    timezone: Optional[str] = None  # IANA zone of the buckets (per-user series)
+    granularity: Optional[str] = None
 
 
 class AdminOverview(BaseModel):
@@ -3,7 +3,8 @@ from typing import Annotated
 from pydantic.types import StringConstraints
 from typing import Optional
 from datetime import datetime
-from app.models.models import EmailCategory, SubscriptionTier, SubscriptionStatus
+from app.core.config import settings
+from app.models.models import AnalysisSource, EmailCategory, SubscriptionTier, SubscriptionStatus
 
 # User Schemas
 class UserBase(BaseModel):
@@ -50,17 +51,24 @@ class UserResponse(UserBase):
 # Email Schemas
 class EmailBase(BaseModel):
     subject: Optional[Annotated[str, StringConstraints(max_length=500)]] = None
-    content: Annotated[str, StringConstraints(min_length=1)]
+    content: Annotated[str, StringConstraints(min_length=1, max_length=settings.email_max_content_chars)]
 
 class EmailCreate(EmailBase):
     pass
 
+class EmailBatchCreate(BaseModel):
+    items: list[EmailCreate] = Field(..., min_length=1, max_length=settings.analysis_batch_max_items)
+
 class EmailResponse(EmailBase):
     id: int
+    # Omitted from list/search results requested with include_content=false
+    content: Optional[str] = None
     summary: Optional[str] = None
     category: Optional[EmailCategory] = None
     confidence_score: Optional[int] = None
     processing_time_ms: Optional[int] = None
+    # Estimated tokens left out of the prompt by the token budget
+    dropped_tokens: Optional[int] = None
     created_at: datetime
     
     class Config:
@@ -70,6 +78,10 @@ class EmailAnalysis(BaseModel):
     summary: str
     category: EmailCategory
     confidence_score: int
+    # Estimated tokens of the body left out of the prompt (0 when it fit)
+    dropped_tokens: int = 0
+    # Who produced the label; stored with the email (training uses only LLM labels), not returned
+    source: AnalysisSource = Field(default=AnalysisSource.LLM, exclude=True)
 
 # Authentication Schemas
 class Token(BaseModel):
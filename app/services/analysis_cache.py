@@ -0,0 +1,148 @@
+import asyncio
+import hashlib
+import re
+import unicodedata
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy.exc import IntegrityError
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.database.database import SessionLocal
+from app.models.models import AnalysisCacheEntry, EmailCategory
+from app.schemas.schemas import EmailAnalysis
+
+_WS_RE = re.compile(r"\s+")
+
+
+def _normalize(text: Optional[str]) -> str:
+    if not text:
+        return ""
+    return _WS_RE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def analysis_cache_key(content: str, subject: Optional[str], model: str, prompt_version: str) -> str:
+    """sha256 over the normalized (already sanitized) subject and body.
+
+    Model and prompt version are part of the key so a prompt or model change
+    never serves answers produced under the old one.
+    """
+    h = hashlib.sha256()
+    for part in (prompt_version, model, _normalize(subject), _normalize(content)):
+        h.update(part.encode("utf-8"))
+        h.update(b"\x1f")
+    return h.hexdigest()
+
+
+class AnalysisCache:
+    """In-process LRU+TTL in front of the model call, with an optional DB tier.
+
+    Only genuine model answers are stored; fallback results are never cached
+    so a transient OpenAI outage does not pin low-confidence analyses.
+    Async callers use aget/aset, which run the DB tier in a worker thread so a
+    memory miss never blocks the event loop. Expired DB rows are deleted by
+    the maintenance purge (app/services/maintenance.py).
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        ttl_seconds: float = 86400,
+        persist: bool = False,
+    ):
+        self.memory = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self.persist = persist
+        self.db_hits = 0
+        self.db_errors = 0
+
+    @classmethod
+    def from_settings(cls) -> Optional["AnalysisCache"]:
+        if not settings.analysis_cache_enabled:
+            return None
+        return cls(
+            max_entries=settings.analysis_cache_max_entries,
+            ttl_seconds=settings.analysis_cache_ttl_seconds,
+            persist=settings.analysis_cache_persist,
+        )
+
+    def get(self, key: str) -> Optional[EmailAnalysis]:
+        hit = self.memory.get(key)
+        if hit is not None:
+            return hit
+        if not self.persist:
+            return None
+        return self._db_hit(key, self._db_get(key))
+
+    def set(self, key: str, analysis: EmailAnalysis) -> None:
+        self.memory.set(key, analysis)
+        if self.persist:
+            self._db_set(key, analysis)
+
+    async def aget(self, key: str) -> Optional[EmailAnalysis]:
+        """get() for the event loop: the memory tier inline, the DB tier in a thread."""
+        hit = self.memory.get(key)
+        if hit is not None or not self.persist:
+            return hit
+        return self._db_hit(key, await asyncio.to_thread(self._db_get, key))
+
+    async def aset(self, key: str, analysis: EmailAnalysis) -> None:
+        self.memory.set(key, analysis)
+        if self.persist:
+            await asyncio.to_thread(self._db_set, key, analysis)
+
+    def _db_hit(self, key: str, analysis: Optional[EmailAnalysis]) -> Optional[EmailAnalysis]:
+        if analysis is not None:
+            self.db_hits += 1
+            self.memory.set(key, analysis)
+        return analysis
+
+    def stats(self) -> dict:
+        data = self.memory.stats()
+        data.update({"persist": self.persist, "db_hits": self.db_hits, "db_errors": self.db_errors})
+        return data
+
+    def _db_get(self, key: str) -> Optional[EmailAnalysis]:
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.memory.ttl_seconds)
+        db = SessionLocal()
+        try:
+            row = (
+                db.query(AnalysisCacheEntry)
+                .filter(AnalysisCacheEntry.cache_key == key, AnalysisCacheEntry.created_at >= cutoff)
+                .first()
+            )
+            if not row:
+                return None
+            return EmailAnalysis(
+                summary=row.summary,
+                category=EmailCategory(row.category),
+                confidence_score=row.confidence_score,
+            )
+        except Exception:
+            self.db_errors += 1
+            return None
+        finally:
+            db.close()
+
+    def _db_set(self, key: str, analysis: EmailAnalysis) -> None:
+        db = SessionLocal()
+        try:
+            db.query(AnalysisCacheEntry).filter(AnalysisCacheEntry.cache_key == key).delete()
+            db.add(
+                AnalysisCacheEntry(
+                    cache_key=key,
+                    summary=analysis.summary,
+                    category=analysis.category.value,
+                    confidence_score=analysis.confidence_score,
+                    created_at=datetime.now(timezone.utc),
+                )
+            )
+            db.commit()
+        except IntegrityError:
+            # Another worker stored the same key concurrently; theirs is as good
+            db.rollback()
+        except Exception:
+            db.rollback()
+            self.db_errors += 1
+        finally:
+            db.close()
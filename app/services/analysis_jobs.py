@@ -0,0 +1,435 @@
+"""Background analysis jobs: a pluggable queue plus an in-process worker pool.
+
+POST /emails/analyze/jobs enqueues a Job and returns 202 immediately; workers
+run EmailAnalysisService and persist the Email/EmailAnalytics rows, and
+clients poll GET /emails/jobs/{id} or follow its SSE stream.
+
+Backends (ANALYSIS_JOBS_BACKEND):
+- "memory": asyncio queue inside the API process; jobs are lost on restart.
+- "database": the analysis_jobs table (SQLite or Postgres). Jobs survive
+  restarts and can be drained by separate worker processes
+  (scripts/run_analysis_worker.py).
+"""
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from fastapi import Request
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.time_utils import utcnow
+from app.database.database import SessionLocal
+from app.models.models import AnalysisJob
+from app.services.email_service import EmailAnalysisService, get_analysis_service
+from app.services.email_store import AnalyzedEmail, persist_analysis_detached, stage_analysis
+from app.services.quota import QuotaReservation, release_quota_detached
+
+logger = logging.getLogger("app")
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+TERMINAL_STATUSES = {DONE, FAILED}
+
+
+@dataclass
+class Job:
+    id: str
+    user_id: int
+    subject: Optional[str]
+    content: Optional[str]
+    status: str = QUEUED
+    email_id: Optional[int] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    quota_month: Optional[date] = None  # month of the FREE quota slot reserved at enqueue
+    created_at: datetime = field(default_factory=utcnow)
+    updated_at: datetime = field(default_factory=utcnow)
+
+    @classmethod
+    def new(cls, user_id: int, subject: Optional[str], content: str, quota_month: Optional[date] = None) -> "Job":
+        return cls(id=str(uuid.uuid4()), user_id=user_id, subject=subject, content=content, quota_month=quota_month)
+
+
+class JobQueue:
+    """Queue backend interface used by the endpoints and the worker pool."""
+
+    async def put(self, job: Job) -> None:
+        raise NotImplementedError
+
+    async def claim(self, timeout: float) -> Optional[Job]:
+        """Atomically take the next queued job (marking it running), or None after `timeout`."""
+        raise NotImplementedError
+
+    async def save(self, job: Job) -> None:
+        raise NotImplementedError
+
+    async def persist(self, job: Job, item: AnalyzedEmail) -> int:
+        """Store the job's analyzed email and return its id."""
+        return (await run_in_threadpool(persist_analysis_detached, job.user_id, item)).id
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        raise NotImplementedError
+
+    async def wait_for_change(self, job_id: str, status: str, timeout: float) -> Optional[Job]:
+        """Return the job once its status differs from `status`, or its current state after `timeout`."""
+        raise NotImplementedError
+
+
+class InMemoryJobQueue(JobQueue):
+    def __init__(self, max_retained: int = 10000):
+        self._jobs: dict[str, Job] = {}
+        self._pending: asyncio.Queue[str] = asyncio.Queue()
+        self._changed = asyncio.Condition()
+        self.max_retained = max_retained
+
+    async def put(self, job: Job) -> None:
+        self._jobs[job.id] = job
+        self._prune()
+        await self._pending.put(job.id)
+
+    async def claim(self, timeout: float) -> Optional[Job]:
+        try:
+            job_id = await asyncio.wait_for(self._pending.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+        job = self._jobs.get(job_id)
+        if job is None or job.status != QUEUED:
+            return None
+        job.status = RUNNING
+        job.attempts += 1
+        await self.save(job)
+        return job
+
+    async def save(self, job: Job) -> None:
+        job.updated_at = utcnow()
+        self._jobs[job.id] = job
+        if job.status == QUEUED:
+            # Handed back (e.g. by a worker shutting down mid-job); claim skips stale duplicates
+            self._pending.put_nowait(job.id)
+        async with self._changed:
+            self._changed.notify_all()
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    async def wait_for_change(self, job_id: str, status: str, timeout: float) -> Optional[Job]:
+        def changed() -> bool:
+            job = self._jobs.get(job_id)
+            return job is None or job.status != status
+
+        try:
+            async with self._changed:
+                await asyncio.wait_for(self._changed.wait_for(changed), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self._jobs.get(job_id)
+
+    def _prune(self) -> None:
+        # Drop the oldest finished jobs so the dict stays bounded
+        if len(self._jobs) <= self.max_retained:
+            return
+        for job_id in [j.id for j in self._jobs.values() if j.status in TERMINAL_STATUSES]:
+            del self._jobs[job_id]
+            if len(self._jobs) <= self.max_retained:
+                break
+
+
+class DatabaseJobQueue(JobQueue):
+    """analysis_jobs-table backend; safe with several worker processes.
+
+    Claiming is a conditional UPDATE (status must still be queued), so two
+    workers can never take the same job. Jobs left running by a crashed
+    worker are re-queued after ANALYSIS_JOB_STALE_SECONDS; one that has
+    already been claimed ANALYSIS_JOB_MAX_ATTEMPTS times is failed instead
+    (and its quota slot handed back), so a job that kills its worker cannot
+    loop forever. The job row is marked done in the same transaction that
+    stores its Email, so a job whose result was already stored is never
+    reclaimed or stored twice.
+    """
+
+    def __init__(self, poll_interval: float = 0.5, stale_after_seconds: float = 600, max_attempts: int = 3):
+        self.poll_interval = poll_interval
+        self.stale_after_seconds = stale_after_seconds
+        self.max_attempts = max(1, max_attempts)
+
+    @staticmethod
+    def _to_job(row: AnalysisJob) -> Job:
+        return Job(
+            id=row.id,
+            user_id=row.user_id,
+            subject=row.subject,
+            content=row.content,
+            status=row.status,
+            email_id=row.email_id,
+            error=row.error,
+            attempts=row.attempts,
+            quota_month=row.quota_month,
+            created_at=row.created_at,
+            updated_at=row.updated_at,
+        )
+
+    def _put_sync(self, job: Job) -> None:
+        db = SessionLocal()
+        try:
+            db.add(
+                AnalysisJob(
+                    id=job.id,
+                    user_id=job.user_id,
+                    status=job.status,
+                    subject=job.subject,
+                    content=job.content,
+                    attempts=job.attempts,
+                    quota_month=job.quota_month,
+                    created_at=job.created_at,
+                    updated_at=job.updated_at,
+                )
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def _claim_sync(self) -> Optional[Job]:
+        now = utcnow()
+        stale_cutoff = now - timedelta(seconds=self.stale_after_seconds)
+        db = SessionLocal()
+        try:
+            candidates = (
+                db.query(
+                    AnalysisJob.id,
+                    AnalysisJob.status,
+                    AnalysisJob.updated_at,
+                    AnalysisJob.attempts,
+                    AnalysisJob.user_id,
+                    AnalysisJob.quota_month,
+                )
+                .filter(
+                    (AnalysisJob.status == QUEUED)
+                    | ((AnalysisJob.status == RUNNING) & (AnalysisJob.updated_at < stale_cutoff)),
+                    AnalysisJob.email_id.is_(None),
+                )
+                .order_by(AnalysisJob.created_at.asc())
+                .limit(5)
+                .all()
+            )
+            for job_id, seen_status, seen_updated_at, attempts, user_id, quota_month in candidates:
+                # Matching on the values we read makes the claim a compare-and-set
+                unchanged = db.query(AnalysisJob).filter(
+                    AnalysisJob.id == job_id,
+                    AnalysisJob.status == seen_status,
+                    AnalysisJob.updated_at == seen_updated_at,
+                )
+                if seen_status == RUNNING and attempts >= self.max_attempts:
+                    gave_up = unchanged.update(
+                        {
+                            AnalysisJob.status: FAILED,
+                            AnalysisJob.error: f"Abandoned after {attempts} attempts",
+                            AnalysisJob.content: None,
+                            AnalysisJob.updated_at: now,
+                        },
+                        synchronize_session=False,
+                    )
+                    db.commit()
+                    if gave_up and quota_month is not None:
+                        release_quota_detached(QuotaReservation(user_id=user_id, month=quota_month, count=1))
+                    continue
+                claimed = unchanged.update(
+                    {
+                        AnalysisJob.status: RUNNING,
+                        AnalysisJob.attempts: AnalysisJob.attempts + 1,
+                        AnalysisJob.updated_at: now,
+                    },
+                    synchronize_session=False,
+                )
+                db.commit()
+                if claimed:
+                    row = db.query(AnalysisJob).filter(AnalysisJob.id == job_id).first()
+                    return self._to_job(row) if row else None
+            return None
+        finally:
+            db.close()
+
+    def _save_sync(self, job: Job) -> None:
+        job.updated_at = utcnow()
+        db = SessionLocal()
+        try:
+            db.query(AnalysisJob).filter(AnalysisJob.id == job.id).update(
+                {
+                    AnalysisJob.status: job.status,
+                    AnalysisJob.content: job.content,
+                    AnalysisJob.email_id: job.email_id,
+                    AnalysisJob.error: job.error,
+                    AnalysisJob.updated_at: job.updated_at,
+                },
+                synchronize_session=False,
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def _persist_sync(self, job: Job, item: AnalyzedEmail) -> int:
+        now = utcnow()
+        db = SessionLocal()
+        try:
+            email_record = stage_analysis(db, job.user_id, item)
+            db.flush()
+            finished = (
+                db.query(AnalysisJob)
+                .filter(AnalysisJob.id == job.id, AnalysisJob.email_id.is_(None))
+                .update(
+                    {
+                        AnalysisJob.status: DONE,
+                        AnalysisJob.email_id: email_record.id,
+                        AnalysisJob.content: None,
+                        AnalysisJob.updated_at: now,
+                    },
+                    synchronize_session=False,
+                )
+            )
+            if not finished:
+                # Another worker already stored this job's result; keep theirs
+                db.rollback()
+                return db.query(AnalysisJob.email_id).filter(AnalysisJob.id == job.id).scalar()
+            db.commit()
+            return email_record.id
+        finally:
+            db.close()
+
+    def _get_sync(self, job_id: str) -> Optional[Job]:
+        db = SessionLocal()
+        try:
+            row = db.query(AnalysisJob).filter(AnalysisJob.id == job_id).first()
+            return self._to_job(row) if row else None
+        finally:
+            db.close()
+
+    async def put(self, job: Job) -> None:
+        await run_in_threadpool(self._put_sync, job)
+
+    async def claim(self, timeout: float) -> Optional[Job]:
+        deadline = time.monotonic() + timeout
+        while True:
+            job = await run_in_threadpool(self._claim_sync)
+            if job is not None or time.monotonic() >= deadline:
+                return job
+            await asyncio.sleep(self.poll_interval)
+
+    async def save(self, job: Job) -> None:
+        await run_in_threadpool(self._save_sync, job)
+
+    async def persist(self, job: Job, item: AnalyzedEmail) -> int:
+        return await run_in_threadpool(self._persist_sync, job, item)
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        return await run_in_threadpool(self._get_sync, job_id)
+
+    async def wait_for_change(self, job_id: str, status: str, timeout: float) -> Optional[Job]:
+        deadline = time.monotonic() + timeout
+        while True:
+            job = await self.get(job_id)
+            if job is None or job.status != status or time.monotonic() >= deadline:
+                return job
+            await asyncio.sleep(self.poll_interval)
+
+
+def build_job_queue() -> JobQueue:
+    backend = (settings.analysis_jobs_backend or "memory").lower()
+    if backend == "database":
+        return DatabaseJobQueue(
+            poll_interval=settings.analysis_job_poll_interval_seconds,
+            stale_after_seconds=settings.analysis_job_stale_seconds,
+            max_attempts=settings.analysis_job_max_attempts,
+        )
+    if backend != "memory":
+        logger.warning(f"Unknown ANALYSIS_JOBS_BACKEND {backend!r}; using in-memory queue")
+    return InMemoryJobQueue()
+
+
+class AnalysisWorkerPool:
+    """N asyncio workers draining a JobQueue on the current event loop."""
+
+    def __init__(self, queue: JobQueue, service: EmailAnalysisService, workers: int):
+        self.queue = queue
+        self.service = service
+        self.workers = max(0, workers)
+        self._tasks: list[asyncio.Task] = []
+        self.processed = 0
+        self.failed = 0
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._tasks = [asyncio.create_task(self._run(n)) for n in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _run(self, n: int) -> None:
+        while True:
+            try:
+                job = await self.queue.claim(timeout=1.0)
+                if job is not None:
+                    await self.process(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception(f"analysis worker {n}: unexpected error")
+                await asyncio.sleep(1.0)
+
+    async def process(self, job: Job) -> None:
+        started = time.time()
+        stored: Optional[asyncio.Future] = None
+        try:
+            analysis = await self.service.analyze_email_async(content=job.content or "", subject=job.subject)
+            item = AnalyzedEmail(job.subject, job.content or "", analysis, int((time.time() - started) * 1000))
+            # Shielded: once the Email is being written, cancellation must not undo or repeat it
+            stored = asyncio.ensure_future(self.queue.persist(job, item))
+            job.email_id = await asyncio.shield(stored)
+            job.status = DONE
+            job.content = None
+            self.processed += 1
+        except asyncio.CancelledError:
+            if stored is None:
+                # Shutdown before anything was stored: hand it back so another worker picks it up
+                job.status = QUEUED
+            else:
+                # Shutdown mid-write: let it finish and record the stored email
+                job.email_id = await stored
+                job.status = DONE
+                job.content = None
+            await asyncio.shield(self.queue.save(job))
+            raise
+        except Exception:
+            logger.exception(f"analysis job {job.id} failed")
+            job.status = FAILED
+            job.error = "Failed to analyze email"
+            self.failed += 1
+            if job.quota_month is not None:
+                reservation = QuotaReservation(user_id=job.user_id, month=job.quota_month, count=1)
+                await run_in_threadpool(release_quota_detached, reservation)
+        await self.queue.save(job)
+
+
+async def get_job_queue(request: Request) -> JobQueue:
+    """FastAPI dependency returning the app's job queue.
+
+    Normally created by the startup hook in app.main; built (and workers
+    started) lazily here when startup did not run.
+    """
+    queue = getattr(request.app.state, "analysis_job_queue", None)
+    if queue is None:
+        queue = build_job_queue()
+        pool = AnalysisWorkerPool(queue, get_analysis_service(request), settings.analysis_job_workers)
+        pool.start()
+        request.app.state.analysis_job_queue = queue
+        request.app.state.analysis_worker_pool = pool
+    return queue
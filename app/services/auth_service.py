@@ -1,6 +1,6 @@
 from datetime import datetime, timedelta, timezone
 from typing import Optional
-from jose import JWTError, jwt
+from jose import jwt
 from passlib.context import CryptContext
 from sqlalchemy.orm import Session
 from app.core.config import settings
@@ -13,6 +13,8 @@ except Exception:  # pragma: no cover
 from app.schemas.schemas import TokenData
 import uuid
 from app.core.jwt_blacklist import is_blacklisted
+from app.core.auth_context import decode_token
+from app.services.password_hashing import get_password_hasher
 
 # Password hashing: prefer pbkdf2_sha256 (Py 3.13 friendly) but still accept bcrypt for legacy hashes
 pwd_context = CryptContext(schemes=["pbkdf2_sha256", "bcrypt"], deprecated="auto")
@@ -25,6 +27,16 @@ class AuthService:
     @staticmethod
     def get_password_hash(password: str) -> str:
         return pwd_context.hash(password)
+
+    # Async variants for request handlers: hash in the bounded pool, off the event loop.
+    # Raise PasswordHashingBusy when the pool's queue is full.
+    @staticmethod
+    async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+        return await get_password_hasher().verify(plain_password, hashed_password)
+
+    @staticmethod
+    async def get_password_hash_async(password: str) -> str:
+        return await get_password_hasher().hash(password)
     
     @staticmethod
     def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -48,18 +60,21 @@ class AuthService:
     
     @staticmethod
     def verify_token(token: str, expected_type: str = "access") -> Optional[TokenData]:
-        try:
-            payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-            email: str = payload.get("sub")
-            ttype = payload.get("type")
-            jti = payload.get("jti")
-            if jti and is_blacklisted(jti):
-                return None
-            if email is None or (expected_type and ttype != expected_type):
-                return None
-            return TokenData(email=email, type=ttype, jti=jti)
-        except JWTError:
+        return AuthService.token_data_from_claims(decode_token(token), expected_type)
+
+    @staticmethod
+    def token_data_from_claims(payload: Optional[dict], expected_type: str = "access") -> Optional[TokenData]:
+        """verify_token for claims that are already decoded (see app.core.auth_context)."""
+        if payload is None:
+            return None
+        email: str = payload.get("sub")
+        ttype = payload.get("type")
+        jti = payload.get("jti")
+        if jti and is_blacklisted(jti):
             return None
+        if email is None or (expected_type and ttype != expected_type):
+            return None
+        return TokenData(email=email, type=ttype, jti=jti)
 
     # Refresh token persistence (for rotation/revocation)
     @staticmethod
@@ -85,23 +100,36 @@ class AuthService:
             return True
         return False
     
+    @staticmethod
+    def _login_candidate(db: Session, email: str) -> Optional[User]:
+        user = db.query(User).filter(User.email == normalize_email(email)).first()
+        if not user or not user.hashed_password:
+            return None
+        return user
+
     @staticmethod
     def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
-        email_norm = normalize_email(email)
-        user = db.query(User).filter(User.email == email_norm).first()
-        if not user:
+        user = AuthService._login_candidate(db, email)
+        if user is None or not AuthService.verify_password(password, user.hashed_password):
             return None
-        # Try new field first, fallback to legacy
-        stored_hash = user.hashed_password
-        if not stored_hash:
+        return user
+
+    @staticmethod
+    async def authenticate_user_async(db: Session, email: str, password: str) -> Optional[User]:
+        user = AuthService._login_candidate(db, email)
+        if user is None:
             return None
-        if not AuthService.verify_password(password, stored_hash):
+        stored_hash = user.hashed_password
+        # Hand the pooled connection back while waiting for the hash (user reloads on next access)
+        db.rollback()
+        if not await AuthService.verify_password_async(password, stored_hash):
             return None
         return user
     
     @staticmethod
-    def create_user(db: Session, email: str, password: str, full_name: str = None, timezone_str: str | None = None) -> User:
-        hashed_password = AuthService.get_password_hash(password)
+    def create_user(db: Session, email: str, password: str, full_name: str = None, timezone_str: str | None = None, hashed_password: str | None = None) -> User:
+        # Handlers pass a hash made with get_password_hash_async; scripts let this hash inline
+        hashed_password = hashed_password or AuthService.get_password_hash(password)
         email_norm = normalize_email(email)
         full_name_sanitized = sanitize_text(full_name) if full_name else None
         tz = "UTC"
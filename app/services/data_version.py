@@ -0,0 +1,40 @@
+"""Per-user data version: one counter that moves whenever a user's emails or analytics change.
+
+bump_data_version() runs in the transaction of every such write (store,
+delete, usage rebuild). Readers use it as a cheap validator: the ETags of
+the listing and usage endpoints, and the response cache keys.
+"""
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.core.time_utils import utcnow
+from app.models.models import User
+from app.services.response_cache import get_response_cache
+
+
+def bump_data_version(db: Session, user_id: Optional[int] = None) -> None:
+    """Advance the data version of one user (or everyone). Caller commits."""
+    stmt = update(User).values(
+        data_version=User.data_version + 1,
+        data_changed_at=utcnow(),
+        updated_at=User.updated_at,  # a data write is not a profile update
+    )
+    if user_id is not None:
+        stmt = stmt.where(User.id == user_id)
+    db.execute(stmt.execution_options(synchronize_session=False))
+    # Entries are keyed by version and already unreachable once this commits; free them now
+    get_response_cache().invalidate_user(user_id)
+
+
+def data_version(db: Session, user_id: int) -> tuple[int, Optional[datetime]]:
+    """(version, time of the last change) for `user_id`; one primary-key lookup."""
+    row = db.execute(select(User.data_version, User.data_changed_at).where(User.id == user_id)).first()
+    if row is None:
+        return 0, None
+    changed_at = row.data_changed_at
+    if changed_at is not None and changed_at.tzinfo is None:
+        changed_at = changed_at.replace(tzinfo=timezone.utc)
+    return row.data_version, changed_at
@@ -0,0 +1,83 @@
+"""Full-text search over analyzed emails (subject + summary) for /emails/search.
+
+SQLite matches against the emails_fts FTS5 table and ranks with bm25;
+Postgres matches the weighted search_vector column (GIN-indexed) and ranks
+with ts_rank_cd. Both are created with the emails table (EMAIL_SEARCH_DDL in
+app/models/models.py) and kept in sync on insert, update and delete. Other
+dialects fall back to the old LIKE scan, unranked.
+
+The query is split into words; every word must match, as a prefix, so
+"inv" finds "invoice" (LIKE also matched inside words; full-text does not).
+Subject matches rank above summary matches. On SQLite, user_id is also an
+FTS column and the owner is part of the MATCH, so FTS5 intersects the
+user's posting list instead of matching every mailbox and filtering after.
+"""
+import re
+from typing import Optional
+
+from sqlalchemy import column, func, literal_column, or_, select, table
+
+from app.core.config import settings
+from app.models.models import Email
+
+_WORD_RE = re.compile(r"\w+")
+MAX_TERMS = 16
+SUBJECT_WEIGHT = 2.0
+
+_emails_fts = table("emails_fts", column("rowid"))
+_search_vector = literal_column("emails.search_vector")
+
+
+def search_terms(q: str) -> list[str]:
+    return _WORD_RE.findall(q.lower())[:MAX_TERMS]
+
+
+def apply_text_search(query, q: str, dialect_name: str, user_id: int, ranked: bool = True) -> tuple[object, Optional[list]]:
+    """Filter an Email query (already restricted to `user_id`) to rows matching `q`.
+
+    Returns (query, relevance ordering). With `ranked`, only the newest
+    SEARCH_RANK_CANDIDATES matches are scored and returned: scoring costs
+    about the same per match as the match itself, so a word found in most
+    of a large mailbox would otherwise dominate the request. The ordering is
+    None when not ranked, on the LIKE fallback, or when `q` has no words.
+    """
+    terms = search_terms(q)
+    if dialect_name == "sqlite" and terms:
+        match = literal_column("emails_fts").op("MATCH")(
+            f"user_id:{int(user_id)} AND (" + " ".join(f'"{t}"*' for t in terms) + ")"
+        )
+        if not ranked:
+            # IN (subquery) evaluates the MATCH once; a join lets SQLite re-run it per email row
+            return query.filter(Email.id.in_(select(_emails_fts.c.rowid).where(match))), None
+        # FTS5 walks matches in rowid order, so the LIMIT stops both matching and bm25 early
+        candidates = (
+            select(
+                _emails_fts.c.rowid.label("id"),
+                func.bm25(literal_column("emails_fts"), SUBJECT_WEIGHT, 1.0, 0.0).label("score"),
+            )
+            .where(match)
+            .order_by(_emails_fts.c.rowid.desc())
+            .limit(settings.search_rank_candidates)
+            .subquery("matches")
+        )
+        query = query.join(candidates, candidates.c.id == Email.id)
+        # bm25: lower is better
+        return query, [candidates.c.score.asc(), Email.id.desc()]
+    if dialect_name == "postgresql" and terms:
+        tsquery = func.to_tsquery("simple", " & ".join(f"{t}:*" for t in terms))
+        match = _search_vector.op("@@")(tsquery)
+        if not ranked:
+            return query.filter(match), None
+        candidates = (
+            select(Email.id.label("id"), func.ts_rank_cd(_search_vector, tsquery).label("score"))
+            .where(Email.user_id == user_id, match)
+            .order_by(Email.id.desc())
+            .limit(settings.search_rank_candidates)
+            .subquery("matches")
+        )
+        query = query.join(candidates, candidates.c.id == Email.id)
+        return query, [candidates.c.score.desc(), Email.id.desc()]
+
+    pattern = f"%{q.strip().lower()}%"
+    query = query.filter(or_(func.lower(Email.subject).like(pattern), func.lower(Email.summary).like(pattern)))
+    return query, None
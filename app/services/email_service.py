@@ -1,31 +1,208 @@
+import asyncio
 import re
 import time
-from typing import Tuple
-from openai import OpenAI
+from typing import AsyncIterator, Optional, Tuple, Union
+
+import httpx
+from fastapi import Request
+from openai import AsyncOpenAI, OpenAI
 from app.core.config import settings
-from app.models.models import EmailCategory
+from app.models.models import AnalysisSource, EmailCategory
 from app.schemas.schemas import EmailAnalysis
+from app.services.analysis_cache import AnalysisCache, analysis_cache_key
+from app.services.keyword_rules import KeywordMatcher
+from app.services.local_classifier import LocalClassifier
+from app.services.token_budget import BudgetedEmail, budget_email
+
+SYSTEM_PROMPT = "You are an expert email analyzer. Be concise and accurate."
+# Bump whenever the prompt or its parsing changes: it is part of the cache key
+PROMPT_VERSION = "1"
+
+
+def build_http_client() -> httpx.AsyncClient:
+    """Keep-alive HTTP pool shared by every completion the service makes."""
+    limits = httpx.Limits(
+        max_connections=settings.openai_pool_max_connections,
+        max_keepalive_connections=settings.openai_pool_max_keepalive,
+        keepalive_expiry=settings.openai_pool_keepalive_expiry_seconds,
+    )
+    return httpx.AsyncClient(limits=limits, timeout=settings.openai_timeout_seconds)
+
+
+class SummaryStreamParser:
+    """Extract the SUMMARY section from a streamed "SUMMARY/CATEGORY/CONFIDENCE" answer.
+
+    feed() returns only text that is certainly part of the summary: anything
+    before "SUMMARY:" is dropped, and trailing whitespace or a partial
+    "CATEGORY:" marker is held back until the next delta disambiguates it.
+    """
+
+    START = "SUMMARY:"
+    END = "CATEGORY:"
 
-class EmailAnalysisService:
     def __init__(self):
+        self.text = ""
+        self._emitted_to: Optional[int] = None
+        self._done = False
+
+    def feed(self, delta: str) -> str:
+        self.text += delta
+        return self._drain(final=False)
+
+    def finish(self) -> str:
+        return self._drain(final=True)
+
+    def _drain(self, final: bool) -> str:
+        if self._done:
+            return ""
+        start = self.text.find(self.START)
+        if start < 0:
+            return ""
+        body_start = start + len(self.START)
+        end = self.text.find(self.END, body_start)
+        if end >= 0 or final:
+            limit = end if end >= 0 else len(self.text)
+            self._done = True
+        else:
+            limit = len(self.text)
+            for k in range(len(self.END) - 1, 0, -1):
+                if self.text.endswith(self.END[:k]):
+                    limit -= k
+                    break
+        # Never emit trailing whitespace early: it may be the gap before CATEGORY
+        limit = body_start + len(self.text[body_start:limit].rstrip())
+        if self._emitted_to is None:
+            # Skip the space/newline right after "SUMMARY:"
+            lead = self.text[body_start:limit]
+            body_start += len(lead) - len(lead.lstrip())
+            if body_start >= limit:
+                return ""
+            self._emitted_to = body_start
+        if limit <= self._emitted_to:
+            return ""
+        fragment = self.text[self._emitted_to:limit]
+        self._emitted_to = limit
+        return fragment
+
+
+class EmailAnalysisService:
+    """Email analysis backed by OpenAI with a keyword fallback.
+
+    Meant to live for the whole app (see get_analysis_service): it owns the
+    OpenAI clients and their connection pool, so constructing one per request
+    would redo client setup and TLS handshakes every time.
+    """
+
+    def __init__(self, async_client: Optional[AsyncOpenAI] = None):
         self.client = None
+        self.async_client = async_client
+        self._http_client: Optional[httpx.AsyncClient] = None
         if settings.openai_api_key:
             try:
-                self.client = OpenAI(api_key=settings.openai_api_key)
+                self.client = OpenAI(
+                    api_key=settings.openai_api_key,
+                    timeout=settings.openai_timeout_seconds,
+                    max_retries=settings.openai_max_retries,
+                )
             except Exception:
                 self.client = None
-    
-    def analyze_email(self, content: str, subject: str = None) -> EmailAnalysis:
-        """Analyze email content and return summary with category."""
-        start_time = time.time()
-        
+            if self.async_client is None:
+                try:
+                    self._http_client = build_http_client()
+                    self.async_client = AsyncOpenAI(
+                        api_key=settings.openai_api_key,
+                        timeout=settings.openai_timeout_seconds,
+                        max_retries=settings.openai_max_retries,
+                        http_client=self._http_client,
+                    )
+                except Exception:
+                    self.async_client = None
+        self.cache: Optional[AnalysisCache] = AnalysisCache.from_settings()
+        self.classifier: Optional[LocalClassifier] = LocalClassifier.from_settings()
+        self.keyword_rules = KeywordMatcher.from_settings()
+        # Counters for pool_stats(); updated only from the event loop
+        self._requests_total = 0
+        self._in_flight = 0
+        self._peak_in_flight = 0
+        self._timeouts = 0
+        self._errors = 0
+        self._tokens_total = 0
+        self._packed_requests = 0
+        self._packed_fallbacks = 0
+        self._prescreened = 0
+        self._latency_ms_total = 0.0
+
+    async def aclose(self) -> None:
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+
+    def cache_stats(self) -> Optional[dict]:
+        return self.cache.stats() if self.cache is not None else None
+
+    def _cache_key(self, content: str, subject: Optional[str]) -> Optional[str]:
+        if self.cache is None:
+            return None
+        return analysis_cache_key(content, subject, settings.openai_model, PROMPT_VERSION)
+
+    def _prescreen_many(self, items: list[tuple[str, Optional[str]]]) -> list[Optional[EmailAnalysis]]:
+        """Local answers for mail the classifier is confident is a skip category (None elsewhere)."""
+        if self.classifier is None or not items:
+            return [None] * len(items)
+        skip = {c.strip().lower() for c in settings.local_classifier_skip_categories.split(",") if c.strip()}
+        results: list[Optional[EmailAnalysis]] = []
+        for (content, subject), (category, prob) in zip(items, self.classifier.predict(items)):
+            if category.value in skip and prob >= settings.local_classifier_skip_threshold:
+                self._prescreened += 1
+                results.append(
+                    EmailAnalysis(
+                        summary=self._basic_summary(content, subject),
+                        category=category,
+                        confidence_score=int(prob * 100),
+                        source=AnalysisSource.CLASSIFIER,
+                    )
+                )
+            else:
+                results.append(None)
+        return results
+
+    def _prescreen(self, content: str, subject: Optional[str]) -> Optional[EmailAnalysis]:
+        return self._prescreen_many([(content, subject)])[0]
+
+    def pool_stats(self) -> dict:
+        """Completion counters plus open/idle connections in the keep-alive pool."""
+        completed = self._requests_total - self._in_flight
+        stats = {
+            "configured": self.async_client is not None,
+            "requests_total": self._requests_total,
+            "in_flight": self._in_flight,
+            "peak_in_flight": self._peak_in_flight,
+            "timeouts": self._timeouts,
+            "errors": self._errors,
+            "avg_latency_ms": round(self._latency_ms_total / completed, 1) if completed else None,
+            "tokens_total": self._tokens_total,
+            "packed_requests": self._packed_requests,
+            "packed_item_fallbacks": self._packed_fallbacks,
+            "local_classifier": self.classifier is not None,
+            "prescreened": self._prescreened,
+            "max_connections": settings.openai_pool_max_connections,
+            "max_keepalive_connections": settings.openai_pool_max_keepalive,
+            "connections_open": None,
+            "connections_idle": None,
+        }
         try:
-            if not self.client:
-                raise RuntimeError("OpenAI not configured")
-            # Prepare the prompt
-            email_text = f"Subject: {subject}\n\n{content}" if subject else content
-            
-            prompt = f"""
+            # httpx does not expose pool state publicly; read httpcore's pool best-effort
+            conns = self._http_client._transport._pool.connections  # type: ignore[union-attr]
+            stats["connections_open"] = len(conns)
+            stats["connections_idle"] = sum(1 for c in conns if c.is_idle())
+        except Exception:
+            pass
+        return stats
+
+    def _build_messages(self, content: str, subject: str = None) -> list[dict]:
+        email_text = f"Subject: {subject}\n\n{content}" if subject else content
+
+        prompt = f"""
             Analyze this email and provide:
             1. A concise summary (max 2 sentences)
             2. A category from: important, invoice, meeting, spam, newsletter, social, promotion, other
@@ -39,33 +216,365 @@ class EmailAnalysisService:
             CATEGORY: [category]
             CONFIDENCE: [score]
             """
-            
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt},
+        ]
+
+    def _to_analysis(self, analysis_text: str) -> EmailAnalysis:
+        summary, category, confidence = self._parse_analysis(analysis_text)
+        return EmailAnalysis(
+            summary=summary,
+            category=category,
+            confidence_score=min(confidence, 100)  # Cap at 100
+        )
+
+    def _budget(self, content: str) -> BudgetedEmail:
+        return budget_email(content, settings.analysis_max_input_tokens)
+
+    @staticmethod
+    def _with_budget(analysis: EmailAnalysis, budget: BudgetedEmail) -> EmailAnalysis:
+        if not budget.dropped_tokens:
+            return analysis
+        # Cached instances are shared between requests; annotate a copy
+        return analysis.model_copy(update={"dropped_tokens": budget.dropped_tokens})
+
+    def analyze_email(self, content: str, subject: str = None) -> EmailAnalysis:
+        """Analyze email content and return summary with category.
+
+        Blocking variant kept for scripts and sync callers; request handlers
+        should await analyze_email_async instead. Like all entry points, the
+        body is first fitted into ANALYSIS_MAX_INPUT_TOKENS (token_budget.py);
+        the result's dropped_tokens says how much was left out.
+        """
+        budget = self._budget(content)
+        return self._with_budget(self._analyze_email(budget.content, subject), budget)
+
+    def _analyze_email(self, content: str, subject: Optional[str]) -> EmailAnalysis:
+        key = self._cache_key(content, subject)
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        screened = self._prescreen(content, subject)
+        if screened is not None:
+            return screened
+        try:
+            if not self.client:
+                raise RuntimeError("OpenAI not configured")
             response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are an expert email analyzer. Be concise and accurate."},
-                    {"role": "user", "content": prompt}
-                ],
+                model=settings.openai_model,
+                messages=self._build_messages(content, subject),
                 max_tokens=200,
                 temperature=0.3
             )
+            analysis = self._to_analysis(response.choices[0].message.content)
+        except Exception:
+            # Fallback analysis
+            return self._fallback_analysis(content, subject)
+        if key is not None:
+            self.cache.set(key, analysis)
+        return analysis
+
+    async def analyze_email_async(
+        self, content: str, subject: str = None, timeout: Optional[float] = None, prescreen: bool = True
+    ) -> EmailAnalysis:
+        """Analyze email content without blocking the event loop.
+
+        Identical (normalized) subject+body pairs are answered from the
+        analysis cache without a model call, and so is mail the local
+        classifier confidently puts in a skip category (unless `prescreen` is
+        False, e.g. when the caller already screened it). The completion is bounded by
+        `timeout` (default: OPENAI_TIMEOUT_SECONDS); on timeout or API errors
+        the keyword fallback is returned. Task cancellation (e.g. client
+        disconnect, shutdown) is propagated, not swallowed.
+        """
+        budget = self._budget(content)
+        analysis = await self._analyze_email_async(budget.content, subject, timeout, prescreen)
+        return self._with_budget(analysis, budget)
+
+    async def _analyze_email_async(
+        self, content: str, subject: Optional[str], timeout: Optional[float], prescreen: bool
+    ) -> EmailAnalysis:
+        deadline = timeout if timeout is not None else settings.openai_timeout_seconds
+        key = self._cache_key(content, subject)
+        if key is not None:
+            cached = await self.cache.aget(key)
+            if cached is not None:
+                return cached
+        if prescreen:
+            screened = self._prescreen(content, subject)
+            if screened is not None:
+                return screened
+        if not self.async_client:
+            return self._fallback_analysis(content, subject)
+        try:
+            response = await self._complete_async(self._build_messages(content, subject), 200, deadline)
+            analysis = self._to_analysis(response.choices[0].message.content)
+        except Exception:
+            return self._fallback_analysis(content, subject)
+        if key is not None:
+            await self.cache.aset(key, analysis)
+        return analysis
+
+    async def stream_analysis(
+        self, content: str, subject: str = None, timeout: Optional[float] = None
+    ) -> AsyncIterator[Union[str, EmailAnalysis]]:
+        """Yield summary text fragments as the model produces them, then the EmailAnalysis.
+
+        The final EmailAnalysis is authoritative: if the stream fails midway
+        the fallback analysis is yielded, whose summary may differ from the
+        fragments already sent. Cache hits and the fallback yield the whole
+        summary as a single fragment, as do locally pre-screened emails.
+        """
+        budget = self._budget(content)
+        async for part in self._stream_analysis(budget.content, subject, timeout):
+            yield self._with_budget(part, budget) if isinstance(part, EmailAnalysis) else part
+
+    async def _stream_analysis(
+        self, content: str, subject: Optional[str], timeout: Optional[float]
+    ) -> AsyncIterator[Union[str, EmailAnalysis]]:
+        deadline = timeout if timeout is not None else settings.openai_timeout_seconds
+        key = self._cache_key(content, subject)
+        cached = await self.cache.aget(key) if key is not None else None
+        if cached is None:
+            cached = self._prescreen(content, subject)
+        if cached is not None or not self.async_client:
+            analysis = cached or self._fallback_analysis(content, subject)
+            yield analysis.summary
+            yield analysis
+            return
+
+        self._requests_total += 1
+        self._in_flight += 1
+        self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        give_up_at = loop.time() + deadline
+        parser = SummaryStreamParser()
+        stream = None
+        try:
+            stream = await asyncio.wait_for(
+                self.async_client.chat.completions.create(
+                    model=settings.openai_model,
+                    messages=self._build_messages(content, subject),
+                    max_tokens=200,
+                    temperature=0.3,
+                    stream=True,
+                    timeout=deadline,
+                ),
+                timeout=deadline,
+            )
+            iterator = stream.__aiter__()
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(iterator.__anext__(), timeout=max(0.0, give_up_at - loop.time()))
+                except StopAsyncIteration:
+                    break
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    fragment = parser.feed(delta)
+                    if fragment:
+                        yield fragment
+            analysis = self._to_analysis(parser.text)
+        except asyncio.TimeoutError:
+            self._timeouts += 1
+            analysis = None
+        except Exception:
+            self._errors += 1
+            analysis = None
+        finally:
+            self._in_flight -= 1
+            self._latency_ms_total += (time.perf_counter() - started) * 1000
+            response = getattr(stream, "response", None)
+            if response is not None:
+                try:
+                    await response.aclose()
+                except Exception:
+                    pass
+        if analysis is None:
+            yield self._fallback_analysis(content, subject)
+            return
+        tail = parser.finish()
+        if tail:
+            yield tail
+        if key is not None:
+            await self.cache.aset(key, analysis)
+        yield analysis
+
+    async def _complete_async(self, messages: list[dict], max_tokens: int, deadline: float):
+        """One tracked completion call; raises on timeout or API error."""
+        self._requests_total += 1
+        self._in_flight += 1
+        self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+        started = time.perf_counter()
+        try:
+            response = await asyncio.wait_for(
+                self.async_client.chat.completions.create(
+                    model=settings.openai_model,
+                    messages=messages,
+                    max_tokens=max_tokens,
+                    temperature=0.3,
+                    timeout=deadline,
+                ),
+                timeout=deadline,
+            )
+        except asyncio.TimeoutError:
+            self._timeouts += 1
+            raise
+        except Exception:
+            self._errors += 1
+            raise
+        finally:
+            self._in_flight -= 1
+            self._latency_ms_total += (time.perf_counter() - started) * 1000
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            self._tokens_total += getattr(usage, "total_tokens", 0) or 0
+        return response
+
+    async def analyze_many_async(
+        self, items: list[tuple[str, Optional[str]]], concurrency: int = 4
+    ) -> list[EmailAnalysis]:
+        """Analyze several (content, subject) pairs, in input order.
+
+        Items the local classifier screens out and cached items are answered
+        directly. Short emails (<= ANALYSIS_PACK_MAX_CHARS)
+        are packed ANALYSIS_PACK_SIZE at a time into one completion; long ones,
+        and any packed item whose answer is missing or malformed, go through
+        analyze_email_async. At most `concurrency` completions run at once.
+        """
+        budgets = [self._budget(content) for content, _ in items]
+        items = [(budget.content, subject) for budget, (_, subject) in zip(budgets, items)]
+        # One vectorized classifier pass over the whole batch
+        results: list[Optional[EmailAnalysis]] = self._prescreen_many(items)
+        sem = asyncio.Semaphore(max(1, concurrency))
+        singles: list[int] = []
+        packable: list[int] = []
+        for i, (content, subject) in enumerate(items):
+            if results[i] is not None:
+                continue
+            if not (
+                self.async_client
+                and settings.analysis_pack_enabled
+                and len(content) + len(subject or "") <= settings.analysis_pack_max_chars
+            ):
+                # _analyze_email_async does its own cache lookup
+                singles.append(i)
+                continue
+            key = self._cache_key(content, subject)
+            cached = await self.cache.aget(key) if key is not None else None
+            if cached is not None:
+                results[i] = cached
+            else:
+                packable.append(i)
+
+        async def run_single(i: int) -> None:
+            content, subject = items[i]
+            async with sem:
+                results[i] = await self._analyze_email_async(content, subject, None, prescreen=False)
+
+        async def run_pack(indexes: list[int]) -> None:
+            async with sem:
+                parsed = await self._analyze_pack_async([items[i] for i in indexes])
+            retry = []
+            for pos, i in enumerate(indexes):
+                if parsed.get(pos) is None:
+                    retry.append(i)
+                    continue
+                results[i] = parsed[pos]
+                key = self._cache_key(*items[i])
+                if key is not None:
+                    await self.cache.aset(key, parsed[pos])
+            self._packed_fallbacks += len(retry)
+            await asyncio.gather(*(run_single(i) for i in retry))
+
+        size = max(1, settings.analysis_pack_size)
+        packs = [packable[j:j + size] for j in range(0, len(packable), size)]
+        # A pack of one is just a single call with a longer prompt
+        singles.extend(p[0] for p in packs if len(p) == 1)
+        packs = [p for p in packs if len(p) > 1]
+        await asyncio.gather(
+            *(run_pack(p) for p in packs),
+            *(run_single(i) for i in singles),
+        )
+        return [
+            self._with_budget(r if r is not None else self._fallback_analysis(*items[i]), budgets[i])
+            for i, r in enumerate(results)
+        ]
+
+    def _build_packed_messages(self, items: list[tuple[str, Optional[str]]]) -> list[dict]:
+        blocks = []
+        for n, (content, subject) in enumerate(items, start=1):
+            email_text = f"Subject: {subject}\n\n{content}" if subject else content
+            blocks.append(f"<<<EMAIL {n}>>>\n{email_text}\n<<<END EMAIL {n}>>>")
+        emails_text = "\n\n".join(blocks)
+
+        prompt = f"""
+            Analyze each of the {len(items)} emails below independently. For every email provide:
+            1. A concise summary (max 2 sentences)
+            2. A category from: important, invoice, meeting, spam, newsletter, social, promotion, other
+            3. A confidence score (0-100) for the categorization
             
-            # Parse the response
-            analysis_text = response.choices[0].message.content
-            summary, category, confidence = self._parse_analysis(analysis_text)
-            
-            processing_time = int((time.time() - start_time) * 1000)
+            Emails:
+            {emails_text}
             
-            return EmailAnalysis(
-                summary=summary,
+            Respond with one block per email, in order, each in this exact format:
+            [email number]
+            SUMMARY: [your summary here]
+            CATEGORY: [category]
+            CONFIDENCE: [score]
+            """
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt},
+        ]
+
+    async def _analyze_pack_async(self, items: list[tuple[str, Optional[str]]]) -> dict[int, EmailAnalysis]:
+        """Return {position: analysis} for the pack answers that parsed cleanly."""
+        self._packed_requests += 1
+        try:
+            response = await self._complete_async(
+                self._build_packed_messages(items),
+                min(settings.analysis_pack_tokens_per_item * len(items), 2000),
+                settings.openai_timeout_seconds,
+            )
+            text = response.choices[0].message.content or ""
+        except Exception:
+            return {}
+        return self._parse_packed_analysis(text, len(items))
+
+    def _parse_packed_analysis(self, text: str, count: int) -> dict[int, EmailAnalysis]:
+        """Parse "[n]"-indexed blocks; partial or garbled answers are skipped.
+
+        Only blocks with both SUMMARY and a known CATEGORY are accepted, so a
+        truncated completion (max_tokens hit mid-block) yields fewer entries
+        rather than wrong ones.
+        """
+        parsed: dict[int, EmailAnalysis] = {}
+        parts = re.split(r"(?m)^\s*\[(\d+)\]\s*", text)
+        # parts = [preamble, n1, block1, n2, block2, ...]
+        for number, block in zip(parts[1::2], parts[2::2]):
+            pos = int(number) - 1
+            if pos < 0 or pos >= count or pos in parsed:
+                continue
+            summary_match = re.search(r"SUMMARY:\s*(.+?)(?=\n\s*CATEGORY:|$)", block, re.DOTALL)
+            category_match = re.search(r"CATEGORY:\s*(\w+)", block)
+            if not summary_match or not category_match:
+                continue
+            try:
+                category = EmailCategory(category_match.group(1).lower())
+            except ValueError:
+                continue
+            confidence_match = re.search(r"CONFIDENCE:\s*(\d+)", block)
+            confidence = int(confidence_match.group(1)) if confidence_match else 70
+            parsed[pos] = EmailAnalysis(
+                summary=summary_match.group(1).strip(),
                 category=category,
-                confidence_score=min(confidence, 100)  # Cap at 100
+                confidence_score=min(confidence, 100),
             )
-            
-        except Exception as e:
-            # Fallback analysis
-            return self._fallback_analysis(content, subject)
-    
+        return parsed
+
     def _parse_analysis(self, analysis_text: str) -> Tuple[str, EmailCategory, int]:
         """Parse the OpenAI response."""
         try:
@@ -99,34 +608,47 @@ class EmailAnalysisService:
         except Exception:
             return "Analysis parsing failed", EmailCategory.OTHER, 50
     
-    def _fallback_analysis(self, content: str, subject: str = None) -> EmailAnalysis:
-        """Provide basic analysis when AI fails."""
-        # Simple keyword-based categorization as fallback
-        content_lower = content.lower()
-        subject_lower = (subject or "").lower()
-        full_text = f"{subject_lower} {content_lower}"
-        
-        # Basic category detection
-        if any(word in full_text for word in ['urgent', 'asap', 'deadline', 'critical']):
-            category = EmailCategory.IMPORTANT
-        elif any(word in full_text for word in ['invoice', 'payment', 'bill', 'receipt']):
-            category = EmailCategory.INVOICE
-        elif any(word in full_text for word in ['meeting', 'calendar', 'schedule', 'appointment']):
-            category = EmailCategory.MEETING
-        elif any(word in full_text for word in ['unsubscribe', 'newsletter', 'marketing']):
-            category = EmailCategory.NEWSLETTER
-        elif any(word in full_text for word in ['spam', 'suspicious', 'phishing']):
-            category = EmailCategory.SPAM
-        else:
-            category = EmailCategory.OTHER
-        
-        # Generate basic summary
+    @staticmethod
+    def _basic_summary(content: str, subject: Optional[str]) -> str:
         summary = f"Email {f'about {subject}' if subject else 'received'}"
         if len(content) > 100:
             summary += f": {content[:97]}..."
-        
+        return summary
+
+    def _fallback_analysis(self, content: str, subject: str = None) -> EmailAnalysis:
+        """Provide basic analysis when AI fails."""
+        if self.classifier is not None:
+            try:
+                category, prob = self.classifier.predict([(content, subject)])[0]
+                return EmailAnalysis(
+                    summary=self._basic_summary(content, subject),
+                    category=category,
+                    confidence_score=int(prob * 100),
+                    source=AnalysisSource.CLASSIFIER,
+                )
+            except Exception:
+                pass
+
+        # Keyword rules (see keyword_rules.py) as the last resort
+        category = self.keyword_rules.categorize(content, subject) or EmailCategory.OTHER
+
         return EmailAnalysis(
-            summary=summary,
+            summary=self._basic_summary(content, subject),
             category=category,
-            confidence_score=30  # Low confidence for fallback
-        )
\ No newline at end of file
+            confidence_score=30,  # Low confidence for fallback
+            source=AnalysisSource.KEYWORDS,
+        )
+
+
+def get_analysis_service(request: Request) -> EmailAnalysisService:
+    """FastAPI dependency returning the app-lifetime EmailAnalysisService.
+
+    Created by the startup hook in app.main; built lazily here when startup
+    did not run (e.g. a TestClient used outside a `with` block). Tests can
+    swap it via app.dependency_overrides[get_analysis_service].
+    """
+    service = getattr(request.app.state, "analysis_service", None)
+    if service is None:
+        service = EmailAnalysisService()
+        request.app.state.analysis_service = service
+    return service
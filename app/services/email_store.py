@@ -0,0 +1,151 @@
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import exists, insert, select
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.core.time_utils import utcnow
+from app.database.database import SessionLocal
+from app.models.models import Email, EmailAnalytics, EmailBody
+from app.schemas.schemas import EmailAnalysis, EmailResponse
+from app.services.data_version import bump_data_version
+from app.services.usage_rollup import record_usage
+
+
+@dataclass
+class AnalyzedEmail:
+    """A sanitized email together with its analysis, ready to be stored."""
+    subject: Optional[str]
+    content: str
+    analysis: EmailAnalysis
+    processing_time_ms: int
+
+
+def body_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _body_row(text: str) -> dict:
+    # EmailBody.text is CompressedText: compressed on write per EMAIL_BODY_COMPRESSION*
+    return {"hash": body_hash(text), "text": text, "size": len(text.encode("utf-8"))}
+
+
+def _insert_missing_bodies(db: Session):
+    """INSERT for email_bodies that skips hashes stored concurrently by another writer."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+        return pg_insert(EmailBody).on_conflict_do_nothing(index_elements=["hash"])
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+        return sqlite_insert(EmailBody).on_conflict_do_nothing(index_elements=["hash"])
+    return insert(EmailBody)
+
+
+def store_bodies(db: Session, texts: list[str]) -> list[str]:
+    """Store each distinct body once (content-addressed) and return the hashes in input order."""
+    hashes = [body_hash(t) for t in texts]
+    pending = dict(zip(hashes, texts))
+    existing = set(db.scalars(select(EmailBody.hash).where(EmailBody.hash.in_(list(pending)))))
+    rows = [_body_row(text) for h, text in pending.items() if h not in existing]
+    if rows:
+        db.execute(_insert_missing_bodies(db), rows)
+    return hashes
+
+
+def release_bodies(db: Session, hashes: list[str]) -> None:
+    """Delete bodies no email or analytics row references any more (caller commits)."""
+    for h in set(filter(None, hashes)):
+        in_use = db.query(
+            exists().where(Email.body_hash == h) | exists().where(EmailAnalytics.body_hash == h)
+        ).scalar()
+        if not in_use:
+            db.query(EmailBody).filter(EmailBody.hash == h).delete(synchronize_session=False)
+
+
+def _email_row(user_id: int, item: AnalyzedEmail, body: str) -> dict:
+    return {
+        "user_id": user_id,
+        "subject": item.subject,
+        "body_hash": body,
+        "summary": item.analysis.summary,
+        "category": item.analysis.category,
+        "confidence_score": item.analysis.confidence_score,
+        "processing_time_ms": item.processing_time_ms,
+        "dropped_tokens": item.analysis.dropped_tokens,
+        "analysis_source": item.analysis.source.value,
+    }
+
+
+def _analytics_row(user_id: int, item: AnalyzedEmail, body: str, now: datetime) -> dict:
+    return {
+        "user_id": user_id,
+        "sender": None,  # optional: populate if available in future
+        "subject": item.subject,
+        "body_hash": body,  # same email_bodies row as the Email
+        "received_date": None,  # optional: set if available
+        "priority": None,  # optional: set if available
+        "category": item.analysis.category,
+        "summary": item.analysis.summary,
+        "created_at": now,  # same instant as the usage_daily bucket
+    }
+
+
+def stage_analysis(db: Session, user_id: int, item: AnalyzedEmail) -> Email:
+    """Add one analyzed email and its analytics row to the session without committing,
+    so callers can make other writes part of the same transaction."""
+    now = utcnow()
+    [body] = store_bodies(db, [item.content])
+    email_record = Email(**_email_row(user_id, item, body))
+    db.add(email_record)
+    db.add(EmailAnalytics(**_analytics_row(user_id, item, body, now)))
+    record_usage(db, user_id, [item.analysis.category], now)
+    bump_data_version(db, user_id)
+    return email_record
+
+
+def persist_analysis(db: Session, user_id: int, item: AnalyzedEmail) -> Email:
+    """Store one analyzed email and its analytics row, then commit."""
+    email_record = stage_analysis(db, user_id, item)
+    db.commit()
+    db.refresh(email_record)
+    return email_record
+
+
+def persist_analysis_detached(user_id: int, item: AnalyzedEmail) -> EmailResponse:
+    """persist_analysis in a session of its own, for code running outside a request's session
+    (background workers, streaming responses). Blocking: call via run_in_threadpool."""
+    db = SessionLocal()
+    try:
+        return EmailResponse.model_validate(persist_analysis(db, user_id, item))
+    finally:
+        db.close()
+
+
+def bulk_persist_analyses(db: Session, user_id: int, items: list[AnalyzedEmail]) -> list[Email]:
+    """Insert all Email and EmailAnalytics rows with one executemany each.
+
+    Email rows come back via INSERT .. RETURNING (in parameter order), so no
+    per-row flush/refresh is needed, and their bodies are loaded with one
+    query. The caller commits; returned instances expire on commit, so read
+    what you need from them first.
+    """
+    if not items:
+        return []
+    bodies = store_bodies(db, [item.content for item in items])
+    emails = db.scalars(
+        insert(Email).returning(Email, sort_by_parameter_order=True),
+        [_email_row(user_id, item, body) for item, body in zip(items, bodies)],
+    ).all()
+    now = utcnow()
+    db.execute(insert(EmailAnalytics), [_analytics_row(user_id, item, body, now) for item, body in zip(items, bodies)])
+    record_usage(db, user_id, [item.analysis.category for item in items], now)
+    bump_data_version(db, user_id)
+    # Attach bodies from one query so Email.content needs no query per row
+    loaded = {b.hash: b for b in db.scalars(select(EmailBody).where(EmailBody.hash.in_(set(bodies))))}
+    for email in emails:
+        set_committed_value(email, "body", loaded.get(email.body_hash))
+    return list(emails)
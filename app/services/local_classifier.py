@@ -0,0 +1,220 @@
+"""Local email category classifier: hashed n-gram features + softmax regression in NumPy.
+
+Trained from stored Email rows (scripts/train_classifier.py) and saved as a
+single .npz file. EmailAnalysisService uses it to
+
+- answer obvious mail (e.g. spam, newsletters) without a model call when the
+  calibrated probability clears LOCAL_CLASSIFIER_SKIP_THRESHOLD, and
+- replace the keyword fallback when the model is unavailable.
+
+Features are word unigrams and bigrams of the subject and body (separate
+namespaces), hashed into `n_features` buckets with crc32 so they are stable
+across processes, weighted 1+log(tf) and L2-normalized per email. Scoring a
+batch is one gather plus a segmented sum over all emails at once.
+Confidences are calibrated with temperature scaling on a held-out split.
+
+NumPy is optional: without it (or without a trained model) from_settings()
+returns None and the service keeps its keyword fallback.
+"""
+import logging
+import re
+import zlib
+from pathlib import Path
+from typing import Optional
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+from app.core.config import settings
+from app.models.models import EmailCategory
+
+logger = logging.getLogger("app")
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9$%'.-]*[a-z0-9%]|[a-z0-9$%]")
+# Only the start of long bodies is scored; it carries nearly all the signal
+_MAX_BODY_CHARS = 4000
+_BIAS = "__bias__"
+MODEL_FORMAT_VERSION = 1
+
+
+def _hash(token: str, mask: int) -> int:
+    return zlib.crc32(token.encode("utf-8")) & mask
+
+
+def _tokens(prefix: str, text: str) -> list[str]:
+    words = _TOKEN_RE.findall(text.lower())
+    grams = [prefix + w for w in words]
+    grams.extend(f"{prefix}{a} {b}" for a, b in zip(words, words[1:]))
+    return grams
+
+
+class LocalClassifier:
+    def __init__(self, weights, classes: list[str], temperature: float = 1.0):
+        if np is None:
+            raise RuntimeError("numpy is required for the local classifier")
+        n_features = weights.shape[0]
+        if n_features & (n_features - 1):
+            raise ValueError("n_features must be a power of two")
+        self.weights = weights.astype(np.float32, copy=False)
+        self.classes = [EmailCategory(c) for c in classes]
+        self.temperature = float(temperature)
+        self._mask = n_features - 1
+
+    @property
+    def n_features(self) -> int:
+        return self.weights.shape[0]
+
+    # ---- features -------------------------------------------------------
+
+    def _vectorize_one(self, content: str, subject: Optional[str]):
+        mask = self._mask
+        hashed = [_hash(_BIAS, mask)]
+        hashed.extend(_hash(t, mask) for t in _tokens("s:", subject or ""))
+        hashed.extend(_hash(t, mask) for t in _tokens("b:", (content or "")[:_MAX_BODY_CHARS]))
+        idx, counts = np.unique(np.asarray(hashed, dtype=np.int64), return_counts=True)
+        vals = 1.0 + np.log(counts, dtype=np.float32)
+        vals /= np.sqrt(np.dot(vals, vals))
+        return idx, vals
+
+    def vectorize(self, items: list[tuple[str, Optional[str]]]):
+        """Sparse rows as (indices, values, offsets): row r is indices[offsets[r]:offsets[r+1]]."""
+        rows = [self._vectorize_one(content, subject) for content, subject in items]
+        offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(idx) for idx, _ in rows])
+        if not rows:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32), offsets
+        indices = np.concatenate([idx for idx, _ in rows])
+        values = np.concatenate([vals for _, vals in rows]).astype(np.float32)
+        return indices, values, offsets
+
+    def _logits(self, indices, values, offsets):
+        contrib = self.weights[indices] * values[:, None]
+        # Every row has at least the bias feature, so no segment is empty
+        return np.add.reduceat(contrib, offsets[:-1], axis=0)
+
+    # ---- scoring --------------------------------------------------------
+
+    def predict_proba(self, items: list[tuple[str, Optional[str]]]):
+        """Calibrated class probabilities, shape (len(items), len(classes))."""
+        if not items:
+            return np.zeros((0, len(self.classes)), dtype=np.float32)
+        return _softmax(self._logits(*self.vectorize(items)) / self.temperature)
+
+    def predict(self, items: list[tuple[str, Optional[str]]]) -> list[tuple[EmailCategory, float]]:
+        probs = self.predict_proba(items)
+        best = probs.argmax(axis=1)
+        return [(self.classes[k], float(probs[r, k])) for r, k in enumerate(best)]
+
+    # ---- training -------------------------------------------------------
+
+    @classmethod
+    def train(
+        cls,
+        items: list[tuple[str, Optional[str]]],
+        labels: list[str],
+        n_features: int = 2 ** 18,
+        epochs: int = 8,
+        learning_rate: float = 4.0,
+        batch_size: int = 256,
+        holdout: float = 0.1,
+        seed: int = 0,
+    ) -> tuple["LocalClassifier", dict]:
+        """Fit by mini-batch SGD, then fit the temperature on a held-out split.
+
+        Returns the classifier and a report with held-out accuracy and the
+        fitted temperature.
+        """
+        if np is None:
+            raise RuntimeError("numpy is required for the local classifier")
+        if len(items) != len(labels) or not items:
+            raise ValueError("items and labels must be non-empty and the same length")
+        classes = [c.value for c in EmailCategory if c.value in set(labels)]
+        class_index = {c: k for k, c in enumerate(classes)}
+        y_all = np.asarray([class_index[l] for l in labels], dtype=np.int64)
+
+        rng = np.random.default_rng(seed)
+        order = rng.permutation(len(items))
+        n_holdout = int(len(items) * holdout) if len(items) >= 20 else 0
+        held, fit = order[:n_holdout], order[n_holdout:]
+
+        model = cls(np.zeros((n_features, len(classes)), dtype=np.float32), classes)
+        rows = [model._vectorize_one(*items[i]) for i in range(len(items))]
+
+        def batch(ids):
+            idx = [rows[i][0] for i in ids]
+            offsets = np.zeros(len(ids) + 1, dtype=np.int64)
+            offsets[1:] = np.cumsum([len(x) for x in idx])
+            return np.concatenate(idx), np.concatenate([rows[i][1] for i in ids]), offsets
+
+        for epoch in range(epochs):
+            lr = learning_rate / (1.0 + epoch)
+            fit = rng.permutation(fit)
+            for start in range(0, len(fit), batch_size):
+                ids = fit[start:start + batch_size]
+                indices, values, offsets = batch(ids)
+                probs = _softmax(model._logits(indices, values, offsets))
+                probs[np.arange(len(ids)), y_all[ids]] -= 1.0  # d(loss)/d(logits)
+                row_of = np.repeat(np.arange(len(ids)), np.diff(offsets))
+                np.add.at(model.weights, indices, (-lr / len(ids)) * values[:, None] * probs[row_of])
+
+        report = {"trained_on": int(len(fit)), "held_out": int(len(held)), "classes": classes}
+        if len(held):
+            logits = model._logits(*batch(held))
+            model.temperature = _fit_temperature(logits, y_all[held])
+            probs = _softmax(logits / model.temperature)
+            report["holdout_accuracy"] = float((probs.argmax(axis=1) == y_all[held]).mean())
+        report["temperature"] = model.temperature
+        return model, report
+
+    # ---- persistence ----------------------------------------------------
+
+    def save(self, path: str) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as fh:
+            np.savez_compressed(
+                fh,
+                weights=self.weights,
+                classes=np.asarray([c.value for c in self.classes]),
+                temperature=np.asarray(self.temperature),
+                version=np.asarray(MODEL_FORMAT_VERSION),
+            )
+
+    @classmethod
+    def load(cls, path: str) -> "LocalClassifier":
+        if np is None:
+            raise RuntimeError("numpy is required for the local classifier")
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["version"]) != MODEL_FORMAT_VERSION:
+                raise ValueError(f"Unsupported classifier format {int(data['version'])}")
+            return cls(data["weights"], [str(c) for c in data["classes"]], float(data["temperature"]))
+
+    @classmethod
+    def from_settings(cls) -> Optional["LocalClassifier"]:
+        path = settings.local_classifier_path
+        if not settings.local_classifier_enabled or not path or np is None or not Path(path).is_file():
+            return None
+        try:
+            return cls.load(path)
+        except Exception:
+            logger.warning(f"Could not load local classifier from {path}", exc_info=True)
+            return None
+
+
+def _softmax(logits):
+    shifted = logits - logits.max(axis=1, keepdims=True)
+    exp = np.exp(shifted)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+def _fit_temperature(logits, y) -> float:
+    """Temperature minimizing held-out negative log-likelihood (grid search)."""
+    best_t, best_nll = 1.0, float("inf")
+    rows = np.arange(len(y))
+    for t in np.geomspace(0.1, 10.0, 61):
+        probs = _softmax(logits / t)
+        nll = -float(np.log(probs[rows, y] + 1e-12).mean())
+        if nll < best_nll:
+            best_t, best_nll = float(t), nll
+    return best_t
@@ -0,0 +1,106 @@
+"""Housekeeping for the auth token tables, which every login, refresh and logout grows.
+
+purge_expired_tokens() deletes rows that can no longer matter:
+
+- blacklisted_tokens whose token has expired (its exp claim rejects it anyway)
+- refresh_tokens that expired or were revoked (a missing row already counts
+  as revoked in is_refresh_revoked_or_expired)
+- verification_tokens and password_reset_tokens that expired or were used
+
+purge_expired_analysis_cache() does the same for analysis_cache_entries
+older than ANALYSIS_CACHE_TTL_SECONDS, which the cache only ever ignores on
+read.
+
+Rows go in batches of TOKEN_PURGE_BATCH_SIZE, each its own short transaction,
+so the purge never holds locks on a large range. Run it from cron
+(scripts/purge_expired_tokens.py) or in-process every
+TOKEN_PURGE_INTERVAL_MINUTES; concurrent runs are harmless.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, func, or_, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.time_utils import utcnow
+from app.database.database import SessionLocal
+from app.models.models import AnalysisCacheEntry, BlacklistedToken, PasswordResetToken, RefreshToken, VerificationToken
+
+logger = logging.getLogger("app")
+
+
+def _purgeable(now: datetime) -> list:
+    return [
+        (BlacklistedToken, BlacklistedToken.expires_at < now),
+        (RefreshToken, or_(RefreshToken.expires_at < now, RefreshToken.revoked.is_(True))),
+        (VerificationToken, or_(VerificationToken.expires_at < now, VerificationToken.used.is_(True))),
+        (PasswordResetToken, or_(PasswordResetToken.expires_at < now, PasswordResetToken.used.is_(True))),
+    ]
+
+
+def _purge_table(db: Session, model, condition, batch_size: int) -> int:
+    removed = 0
+    while True:
+        ids = db.scalars(select(model.id).where(condition).order_by(model.id).limit(batch_size)).all()
+        if not ids:
+            return removed
+        db.execute(delete(model).where(model.id.in_(ids)).execution_options(synchronize_session=False))
+        db.commit()
+        removed += len(ids)
+        if len(ids) < batch_size:
+            return removed
+
+
+def _purge(db: Session, targets: list, batch_size: Optional[int], dry_run: bool) -> dict[str, int]:
+    batch_size = max(1, batch_size or settings.token_purge_batch_size)
+    report = {}
+    for model, condition in targets:
+        if dry_run:
+            report[model.__tablename__] = db.scalar(select(func.count()).select_from(model).where(condition)) or 0
+        else:
+            report[model.__tablename__] = _purge_table(db, model, condition, batch_size)
+    return report
+
+
+def purge_expired_tokens(
+    db: Session,
+    batch_size: Optional[int] = None,
+    now: Optional[datetime] = None,
+    dry_run: bool = False,
+) -> dict[str, int]:
+    """Delete expired/spent token rows; returns rows removed (or, with dry_run, purgeable) per table."""
+    return _purge(db, _purgeable(now or utcnow()), batch_size, dry_run)
+
+
+def purge_expired_analysis_cache(
+    db: Session,
+    batch_size: Optional[int] = None,
+    now: Optional[datetime] = None,
+    dry_run: bool = False,
+) -> dict[str, int]:
+    """Delete analysis_cache_entries past ANALYSIS_CACHE_TTL_SECONDS; same report shape as purge_expired_tokens."""
+    cutoff = (now or utcnow()) - timedelta(seconds=settings.analysis_cache_ttl_seconds)
+    return _purge(db, [(AnalysisCacheEntry, AnalysisCacheEntry.created_at < cutoff)], batch_size, dry_run)
+
+
+def purge_expired_tokens_detached() -> dict[str, int]:
+    db = SessionLocal()
+    try:
+        return {**purge_expired_tokens(db), **purge_expired_analysis_cache(db)}
+    finally:
+        db.close()
+
+
+async def run_purge_loop(interval_seconds: float) -> None:
+    """Purge every `interval_seconds` until cancelled."""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            report = await asyncio.to_thread(purge_expired_tokens_detached)
+            if any(report.values()):
+                logger.info(f"token purge removed {sum(report.values())} rows: {report}")
+        except Exception:
+            logger.warning("token purge failed", exc_info=True)
@@ -0,0 +1,84 @@
+"""Password hashing off the event loop, with bounded concurrency and load shedding.
+
+pbkdf2_sha256 (and legacy bcrypt) costs tens of milliseconds of CPU per call.
+Run inline in an async handler it stalls every other request on the worker,
+so login, register and reset-password hand it to a small dedicated thread
+pool instead (hashlib and bcrypt release the GIL while hashing, so threads
+run in parallel).
+
+At most PASSWORD_HASH_MAX_PENDING calls may be running or queued; beyond that
+PasswordHashingBusy is raised and the endpoint answers 503 with Retry-After,
+so a burst of (mostly failing) login attempts is shed instead of queueing
+up latency for everyone. PASSWORD_HASH_WORKERS=0 hashes inline (no pool).
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from app.core.config import settings
+
+
+class PasswordHashingBusy(Exception):
+    pass
+
+
+class PasswordHasher:
+    def __init__(self, context, workers: int, max_pending: int):
+        self.context = context
+        self.workers = max(0, int(workers))
+        self.max_pending = max(1, int(max_pending))
+        self._executor = (
+            ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash") if self.workers else None
+        )
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.completed = 0
+        self.shed = 0
+
+    async def _run(self, fn, *args):
+        if self._executor is None:
+            return fn(*args)
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.shed += 1
+                raise PasswordHashingBusy()
+            self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self.completed += 1
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(self.context.verify, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                "completed": self.completed,
+                "shed": self.shed,
+            }
+
+
+_hasher: Optional[PasswordHasher] = None
+_hasher_lock = threading.Lock()
+
+
+def get_password_hasher() -> PasswordHasher:
+    """The process-wide hasher, built from settings on first use."""
+    global _hasher
+    if _hasher is None:
+        with _hasher_lock:
+            if _hasher is None:
+                from app.services.auth_service import pwd_context
+
+                _hasher = PasswordHasher(pwd_context, settings.password_hash_workers, settings.password_hash_max_pending)
+    return _hasher
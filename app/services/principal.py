@@ -0,0 +1,82 @@
+"""The authenticated user as a small immutable value, cached per access token.
+
+get_current_principal() resolves a bearer token to a Principal: the user's id,
+plan and flags, without a session-bound ORM instance. Resolutions are kept in
+a bounded per-process TTL cache keyed by (subject, jti), so polling clients
+cost one JWT decode and no users query for PRINCIPAL_CACHE_TTL_SECONDS.
+
+Revocation is still checked on every request (verify_token runs before the
+cache). Anything that changes what a Principal holds calls forget_user() (or
+forget_token() on logout) so this worker sees it at once; other workers see
+it when their entry expires.
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.security import normalize_email
+from app.models.models import SubscriptionStatus, SubscriptionTier, User
+
+
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    email: str
+    is_active: bool
+    is_admin: bool
+    is_verified: bool
+    subscription_status: SubscriptionStatus
+    subscription_tier: Optional[SubscriptionTier]
+    timezone: str
+    gmail_connected: bool
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id,
+            email=user.email,
+            is_active=bool(user.is_active),
+            is_admin=bool(user.is_admin),
+            is_verified=bool(user.is_verified),
+            subscription_status=user.subscription_status,
+            subscription_tier=user.subscription_tier,
+            timezone=user.timezone or "UTC",
+            gmail_connected=bool(user.gmail_connected),
+        )
+
+
+_principals = TTLCache(
+    max_entries=settings.principal_cache_max_entries,
+    ttl_seconds=settings.principal_cache_ttl_seconds,
+)
+
+
+def cached_principal(subject: str, jti: Optional[str]) -> Optional[Principal]:
+    if settings.principal_cache_ttl_seconds <= 0:
+        return None
+    return _principals.get((normalize_email(subject), jti))
+
+
+def remember_principal(subject: str, jti: Optional[str], principal: Principal) -> None:
+    if settings.principal_cache_ttl_seconds > 0:
+        _principals.set((normalize_email(subject), jti), principal)
+
+
+def forget_token(jti: str) -> None:
+    """Drop the entry of one access token (logout)."""
+    _principals.delete_matching(lambda key: key[1] == jti)
+
+
+def forget_user(email: str) -> None:
+    """Drop every cached token of one user, after a change to their account."""
+    subject = normalize_email(email)
+    _principals.delete_matching(lambda key: key[0] == subject)
+
+
+def clear_principals() -> None:
+    _principals.clear()
+
+
+def principal_cache_stats() -> dict:
+    return _principals.stats()
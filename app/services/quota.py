@@ -0,0 +1,169 @@
+"""FREE-plan monthly quota as one counter row per user and month.
+
+reserve_quota() checks and increments in a single statement,
+UPDATE quota_counters SET used = used + n WHERE ... AND used + n <= limit,
+so concurrent requests cannot both take the last slot, and the check is one
+primary-key lookup however many analyses the user has stored. A month's row
+is created on first use, seeded from usage_daily.
+
+Slots are reserved before analysis and handed back with release_quota() when
+the analysis fails or is not stored. A process that dies in between leaves
+the counter too high; reconcile_quotas() (scripts/reconcile_quotas.py) resets
+idle counters to the stored usage and drops past months.
+
+Each worker also remembers users it has just refused for
+QUOTA_EXHAUSTED_CACHE_SECONDS (at most QUOTA_EXHAUSTED_CACHE_MAX_ENTRIES
+users, least recently refused dropped first), so clients retrying against a
+spent quota get their 402 without a database round trip. A slot released by another worker,
+or a raised limit, is therefore seen here up to that many seconds late.
+"""
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import and_, case, delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.time_utils import utcnow
+from app.database.database import SessionLocal
+from app.models.models import QuotaCounter, UsageDaily
+from app.services.usage_rollup import usage_total
+
+# (user_id, month) -> used, for users refused at the limit
+_exhausted = TTLCache(
+    max_entries=settings.quota_exhausted_cache_max_entries,
+    ttl_seconds=settings.quota_exhausted_cache_seconds,
+)
+
+
+class QuotaExceeded(Exception):
+    def __init__(self, used: int, limit: int):
+        super().__init__(f"Monthly quota exceeded: {used}/{limit}")
+        self.used = used
+        self.limit = limit
+
+
+@dataclass
+class QuotaReservation:
+    user_id: int
+    month: date
+    count: int
+
+
+def month_start(when: Optional[datetime] = None) -> date:
+    return (when or datetime.now(timezone.utc)).astimezone(timezone.utc).date().replace(day=1)
+
+
+def _insert_counter(db: Session):
+    """INSERT for quota_counters that leaves a row created concurrently by another request alone."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+        return pg_insert(QuotaCounter).on_conflict_do_nothing(index_elements=["user_id", "month"])
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+        return sqlite_insert(QuotaCounter).on_conflict_do_nothing(index_elements=["user_id", "month"])
+    return insert(QuotaCounter)
+
+
+def _counter(user_id: int, month: date):
+    return and_(QuotaCounter.user_id == user_id, QuotaCounter.month == month)
+
+
+def _current(db: Session, user_id: int, month: date) -> Optional[int]:
+    return db.scalar(select(QuotaCounter.used).where(_counter(user_id, month)))
+
+
+def _increment(db: Session, user_id: int, month: date, count: int, limit: int) -> Optional[int]:
+    """Add `count` if it fits under `limit`; the new value, or None when refused (or no row yet)."""
+    stmt = (
+        update(QuotaCounter)
+        .where(_counter(user_id, month), QuotaCounter.used + count <= limit)
+        .values(used=QuotaCounter.used + count)
+        .execution_options(synchronize_session=False)
+    )
+    if db.get_bind().dialect.update_returning:
+        return db.execute(stmt.returning(QuotaCounter.used)).scalar_one_or_none()
+    if db.execute(stmt).rowcount:
+        return _current(db, user_id, month)
+    return None
+
+
+def reserve_quota(db: Session, user_id: int, limit: int, count: int = 1) -> QuotaReservation:
+    """Take `count` of the user's monthly slots and commit, or raise QuotaExceeded."""
+    month = month_start()
+    key = (user_id, month)
+    refused = _exhausted.get(key)
+    if refused is not None:
+        raise QuotaExceeded(refused, limit)
+
+    used = _increment(db, user_id, month, count, limit)
+    current = _current(db, user_id, month) if used is None else None
+    if used is None and current is None:
+        seed = usage_total(db, user_id, since=month)
+        db.execute(_insert_counter(db), [{"user_id": user_id, "month": month, "used": seed, "updated_at": utcnow()}])
+        used = _increment(db, user_id, month, count, limit)
+        current = _current(db, user_id, month) if used is None else None
+    if used is None:
+        current = current or 0
+        db.commit()
+        if current >= limit and settings.quota_exhausted_cache_seconds > 0:
+            _exhausted.set(key, current, settings.quota_exhausted_cache_seconds)
+        raise QuotaExceeded(current, limit)
+    db.commit()
+    return QuotaReservation(user_id=user_id, month=month, count=count)
+
+
+def release_quota(db: Session, reservation: QuotaReservation, count: Optional[int] = None) -> None:
+    """Hand back `count` (default: all) reserved slots that produced no stored analysis, and commit."""
+    count = reservation.count if count is None else min(count, reservation.count)
+    if count <= 0:
+        return
+    db.execute(
+        update(QuotaCounter)
+        .where(_counter(reservation.user_id, reservation.month))
+        .values(used=case((QuotaCounter.used > count, QuotaCounter.used - count), else_=0))
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    reservation.count -= count
+    _exhausted.delete((reservation.user_id, reservation.month))
+
+
+def release_quota_detached(reservation: QuotaReservation, count: Optional[int] = None) -> None:
+    """release_quota in a session of its own, for code running outside a request's session."""
+    db = SessionLocal()
+    try:
+        release_quota(db, reservation, count)
+    finally:
+        db.close()
+
+
+def reconcile_quotas(db: Session, idle_seconds: int = 300) -> int:
+    """Reset this month's counters untouched for `idle_seconds` to usage_daily; drop older months.
+
+    Counters with requests in flight are skipped: their reservations are not
+    stored yet, so the rollup would read low. Returns counters changed. Commits.
+    """
+    month = month_start()
+    stored = (
+        select(func.coalesce(func.sum(UsageDaily.count), 0))
+        .where(UsageDaily.user_id == QuotaCounter.user_id, UsageDaily.day >= month)
+        .scalar_subquery()
+    )
+    result = db.execute(
+        update(QuotaCounter)
+        .where(
+            QuotaCounter.month == month,
+            QuotaCounter.updated_at < utcnow() - timedelta(seconds=idle_seconds),
+            QuotaCounter.used != stored,
+        )
+        .values(used=stored)
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(delete(QuotaCounter).where(QuotaCounter.month < month))
+    db.commit()
+    _exhausted.clear()
+    return result.rowcount or 0
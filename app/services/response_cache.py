@@ -0,0 +1,255 @@
+"""Cache for expensive read responses: usage series, search pages, admin overview.
+
+Entries are the serialized JSON bodies, so a hit skips the query and the
+Pydantic serialization and is sent as is.
+
+Backends (RESPONSE_CACHE_BACKEND):
+- "memory": bounded LRU+TTL per process (app.core.cache.TTLCache).
+- "redis": shared by all workers (REDIS_URL; needs the redis package). Falls
+  back to memory, with a warning, when either is missing. Redis errors are
+  counted and treated as misses; requests never fail because of the cache.
+- "off": nothing is cached.
+
+Per-user entries are keyed by the user's data_version, so a write to their
+emails or analytics makes all older entries unreachable in every worker at
+once. bump_data_version() also calls invalidate_user(), so the memory (or
+Redis) they hold is freed right away instead of at expiry. Entries that
+belong to no user (admin views) just live for their TTL.
+"""
+import hashlib
+import logging
+import math
+import threading
+from typing import Callable, Hashable, Optional
+
+from fastapi import Response
+from pydantic import BaseModel
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+logger = logging.getLogger("app")
+
+# (namespace, user_id or None, digest of the remaining key parts)
+CacheKey = tuple[str, Optional[int], str]
+
+
+class MemoryBackend:
+    name = "memory"
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.cache = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+
+    def get(self, key: CacheKey) -> Optional[bytes]:
+        return self.cache.get(key)
+
+    def set(self, key: CacheKey, value: bytes, ttl_seconds: float) -> None:
+        self.cache.set(key, value, ttl_seconds)
+
+    def invalidate_user(self, user_id: int) -> int:
+        return self.cache.delete_matching(lambda key: key[1] == user_id)
+
+    def clear(self) -> None:
+        self.cache.clear()
+
+    def stats(self) -> dict:
+        stats = self.cache.stats()
+        return {k: stats[k] for k in ("entries", "max_entries", "evictions", "expirations")}
+
+
+class RedisBackend:
+    """Entries as plain keys with EX; a set per user lists that user's keys for invalidation."""
+
+    name = "redis"
+
+    def __init__(self, client, prefix: str = "inbox-detox:rc:"):
+        self.client = client
+        self.prefix = prefix
+
+    def _key(self, key: CacheKey) -> str:
+        namespace, user_id, digest = key
+        return f"{self.prefix}{namespace}:{'-' if user_id is None else user_id}:{digest}"
+
+    def _user_keys(self, user_id: int) -> str:
+        return f"{self.prefix}user:{user_id}"
+
+    def get(self, key: CacheKey) -> Optional[bytes]:
+        return self.client.get(self._key(key))
+
+    def set(self, key: CacheKey, value: bytes, ttl_seconds: float) -> None:
+        expire = max(1, math.ceil(ttl_seconds))
+        pipe = self.client.pipeline()
+        pipe.set(self._key(key), value, ex=expire)
+        if key[1] is not None:
+            pipe.sadd(self._user_keys(key[1]), self._key(key))
+            pipe.expire(self._user_keys(key[1]), expire)
+        pipe.execute()
+
+    def invalidate_user(self, user_id: int) -> int:
+        members = self.client.smembers(self._user_keys(user_id))
+        self.client.delete(self._user_keys(user_id), *members)
+        return len(members)
+
+    def clear(self) -> None:
+        keys = list(self.client.scan_iter(match=f"{self.prefix}*"))
+        if keys:
+            self.client.delete(*keys)
+
+    def stats(self) -> dict:
+        return {}
+
+
+class ResponseCache:
+    def __init__(self, backend, ttl_seconds: float = 60.0):
+        self.backend = backend
+        self.ttl_seconds = float(ttl_seconds)
+        self._lock = threading.Lock()
+        self._counts: dict[str, list[int]] = {}  # namespace -> [hits, misses]
+        self.errors = 0
+
+    @classmethod
+    def from_settings(cls) -> "ResponseCache":
+        name = (settings.response_cache_backend or "memory").lower()
+        backend = None
+        if name == "redis":
+            backend = _redis_backend()
+        elif name not in ("memory", "off"):
+            logger.warning(f"Unknown RESPONSE_CACHE_BACKEND {name!r}; using memory")
+        if name != "off" and backend is None:
+            backend = MemoryBackend(settings.response_cache_max_entries, settings.response_cache_ttl_seconds)
+        return cls(backend, settings.response_cache_ttl_seconds)
+
+    @staticmethod
+    def key(namespace: str, user_id: Optional[int], parts: tuple[Hashable, ...]) -> CacheKey:
+        return namespace, user_id, hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()
+
+    def _count(self, namespace: str, hit: bool) -> None:
+        with self._lock:
+            counts = self._counts.setdefault(namespace, [0, 0])
+            counts[0 if hit else 1] += 1
+
+    def _failed(self, action: str) -> None:
+        with self._lock:
+            self.errors += 1
+        logger.warning(f"response cache {action} failed", exc_info=True)
+
+    def get(self, namespace: str, user_id: Optional[int], parts: tuple) -> Optional[bytes]:
+        if self.backend is None:
+            return None
+        try:
+            value = self.backend.get(self.key(namespace, user_id, parts))
+        except Exception:
+            self._failed("get")
+            value = None
+        self._count(namespace, value is not None)
+        return value
+
+    def set(self, namespace: str, user_id: Optional[int], parts: tuple, value: bytes, ttl_seconds: Optional[float] = None) -> None:
+        if self.backend is None:
+            return
+        try:
+            self.backend.set(self.key(namespace, user_id, parts), value, self.ttl_seconds if ttl_seconds is None else ttl_seconds)
+        except Exception:
+            self._failed("set")
+
+    def invalidate_user(self, user_id: Optional[int]) -> None:
+        """Drop one user's entries (every entry when `user_id` is None)."""
+        if self.backend is None:
+            return
+        try:
+            if user_id is None:
+                self.backend.clear()
+            else:
+                self.backend.invalidate_user(user_id)
+        except Exception:
+            self._failed("invalidate")
+
+    def clear(self) -> None:
+        self.invalidate_user(None)
+        with self._lock:
+            self._counts.clear()
+            self.errors = 0
+
+    def stats(self) -> dict:
+        def rates(hits: int, misses: int) -> dict:
+            lookups = hits + misses
+            return {"hits": hits, "misses": misses, "hit_rate": round(hits / lookups, 4) if lookups else None}
+
+        with self._lock:
+            counts = {ns: list(c) for ns, c in self._counts.items()}
+            errors = self.errors
+        return {
+            "backend": self.backend.name if self.backend is not None else "off",
+            "ttl_seconds": self.ttl_seconds,
+            **rates(sum(c[0] for c in counts.values()), sum(c[1] for c in counts.values())),
+            "errors": errors,
+            "namespaces": {ns: rates(*c) for ns, c in sorted(counts.items())},
+            **(self.backend.stats() if self.backend is not None else {}),
+        }
+
+
+def _redis_backend() -> Optional[RedisBackend]:
+    if not settings.redis_url:
+        logger.warning("RESPONSE_CACHE_BACKEND=redis but REDIS_URL is not set; using memory")
+        return None
+    try:
+        import redis
+    except ImportError:
+        logger.warning("RESPONSE_CACHE_BACKEND=redis but the redis package is not installed; using memory")
+        return None
+    return RedisBackend(redis.Redis.from_url(settings.redis_url, socket_timeout=0.25))
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """The process-wide cache, built from settings on first use."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache.from_settings()
+    return _cache
+
+
+def _json_response(response: Response, body: bytes) -> Response:
+    # Keep headers the endpoint already set on its Response parameter (ETag etc.)
+    headers = {k: v for k, v in response.headers.items() if k.lower() not in ("content-length", "content-type")}
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def cached_response(response: Response, namespace: str, user_id: Optional[int], parts: tuple) -> Optional[Response]:
+    """The cached JSON response for (namespace, user_id, parts), or None on a miss."""
+    body = get_response_cache().get(namespace, user_id, parts)
+    return _json_response(response, body) if body is not None else None
+
+
+def cache_response(
+    response: Response,
+    namespace: str,
+    user_id: Optional[int],
+    parts: tuple,
+    model: BaseModel,
+    ttl_seconds: Optional[float] = None,
+) -> Response:
+    """Serialize `model` once, store it under (namespace, user_id, parts) and return it as the response."""
+    body = model.model_dump_json().encode("utf-8")
+    get_response_cache().set(namespace, user_id, parts, body, ttl_seconds)
+    return _json_response(response, body)
+
+
+def cached_json(
+    response: Response,
+    namespace: str,
+    user_id: Optional[int],
+    parts: tuple,
+    build: Callable[[], BaseModel],
+    ttl_seconds: Optional[float] = None,
+) -> Response:
+    """cached_response, or on a miss cache_response of `build()`."""
+    hit = cached_response(response, namespace, user_id, parts)
+    if hit is not None:
+        return hit
+    return cache_response(response, namespace, user_id, parts, build(), ttl_seconds)
@@ -0,0 +1,97 @@
+"""Fit an email body into a token budget before it goes into the prompt.
+
+Steps, stopping as soon as the text fits:
+
+1. Strip quoted replies: ">"-prefixed lines and everything from the first
+   reply/forward header ("On ... wrote:", "-----Original Message-----",
+   "From: ... Sent:") onwards, unless the header opens the email.
+2. Keep the first paragraph (greeting, headers, the ask) and the last one
+   (sign-off, call to action, unsubscribe footer), then as many of the
+   following paragraphs, in order, as still fit; the first one that does
+   not fit is clipped to the remaining room. An omission marker is placed
+   where text was dropped.
+
+Tokens are estimated at ~4 characters each, which is close enough for
+English mail and costs nothing on multi-megabyte bodies.
+"""
+import re
+from dataclasses import dataclass
+
+CHARS_PER_TOKEN = 4
+OMITTED = "[...]"
+
+_PARAGRAPH_RE = re.compile(r"\n[ \t]*\n+")
+_QUOTED_LINE_RE = re.compile(r"^[ \t]*>.*(?:\n|$)", re.MULTILINE)
+_REPLY_HEADER_RE = re.compile(
+    r"^[ \t]*(?:"
+    r"On\b[^\n]{0,300}\bwrote:"
+    r"|-{2,}[ \t]*(?:Original|Forwarded) Message[ \t]*-{2,}"
+    r"|From:[^\n]*\n[ \t]*(?:Sent|Date):"
+    r")",
+    re.MULTILINE | re.IGNORECASE,
+)
+
+
+@dataclass
+class BudgetedEmail:
+    content: str
+    original_tokens: int
+    tokens: int
+
+    @property
+    def dropped_tokens(self) -> int:
+        return max(0, self.original_tokens - self.tokens)
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def strip_quoted_replies(text: str) -> str:
+    header = _REPLY_HEADER_RE.search(text)
+    if header is not None and text[:header.start()].strip():
+        text = text[:header.start()]
+    return _QUOTED_LINE_RE.sub("", text).strip()
+
+
+def clip_text(text: str, max_chars: int) -> str:
+    """Head and tail of `text` within `max_chars`, joined by an omission marker."""
+    if len(text) <= max_chars:
+        return text
+    room = max(0, max_chars - len(OMITTED) - 2)
+    head = room * 3 // 4
+    tail = room - head
+    return f"{text[:head]} {OMITTED} {text[len(text) - tail:] if tail else ''}".rstrip()
+
+
+def budget_email(content: str, max_tokens: int) -> BudgetedEmail:
+    original_tokens = estimate_tokens(content)
+    if original_tokens <= max_tokens:
+        return BudgetedEmail(content, original_tokens, original_tokens)
+
+    text = strip_quoted_replies(content) or content
+    limit = max_tokens * CHARS_PER_TOKEN
+    if len(text) > limit:
+        paragraphs = [p.strip() for p in _PARAGRAPH_RE.split(text) if p.strip()]
+        if len(paragraphs) < 2:
+            text = clip_text(text, limit)
+        else:
+            first = clip_text(paragraphs[0], limit // 2)
+            last = clip_text(paragraphs[-1], limit // 4)
+            room = limit - len(first) - len(last) - 2 * (len(OMITTED) + 4)
+            middle = []
+            used = 0
+            for paragraph in paragraphs[1:-1]:
+                used += 1
+                if len(paragraph) + 2 > room:
+                    if room > 2 * len(OMITTED):
+                        middle.append(clip_text(paragraph, room - 2))
+                    break
+                middle.append(paragraph)
+                room -= len(paragraph) + 2
+            parts = [first, *middle]
+            if used < len(paragraphs) - 2:
+                parts.append(OMITTED)
+            parts.append(last)
+            text = "\n\n".join(parts)
+    return BudgetedEmail(text, original_tokens, estimate_tokens(text))
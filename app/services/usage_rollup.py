@@ -0,0 +1,104 @@
+"""Per-user daily usage rollup (usage_daily).
+
+record_usage() runs in the same transaction as the EmailAnalytics insert,
+so the rollup never disagrees with committed analytics rows. Readers get
+O(days) queries instead of counting email_analytics. rebuild_usage()
+recomputes it from email_analytics (scripts/rebuild_usage_rollup.py).
+"""
+from collections import Counter
+from datetime import date, datetime, timezone
+from typing import Iterable, Optional
+
+from sqlalchemy import delete, func, insert, literal, select
+from sqlalchemy.orm import Session
+
+from app.models.models import EmailAnalytics, UsageDaily
+from app.services.data_version import bump_data_version
+
+
+def _category_key(category) -> str:
+    return getattr(category, "value", category) or ""
+
+
+def _upsert(db: Session):
+    """INSERT into usage_daily that adds to the count of an existing (user, day, category) row."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return None
+    stmt = dialect_insert(UsageDaily)
+    return stmt.on_conflict_do_update(
+        index_elements=["user_id", "day", "category"],
+        set_={"count": UsageDaily.count + stmt.excluded["count"]},
+    )
+
+
+def record_usage(db: Session, user_id: int, categories: Iterable, when: Optional[datetime] = None) -> None:
+    """Count one analysis per entry of `categories` for `when`'s UTC day (caller commits)."""
+    when = when or datetime.now(timezone.utc)
+    day = when.astimezone(timezone.utc).date() if when.tzinfo else when.date()
+    counts = Counter(_category_key(c) for c in categories)
+    if not counts:
+        return
+    rows = [{"user_id": user_id, "day": day, "category": c, "count": n} for c, n in counts.items()]
+    stmt = _upsert(db)
+    if stmt is not None:
+        db.execute(stmt, rows)
+        return
+    for row in rows:
+        updated = db.query(UsageDaily).filter_by(user_id=user_id, day=day, category=row["category"]).update(
+            {UsageDaily.count: UsageDaily.count + row["count"]}, synchronize_session=False
+        )
+        if not updated:
+            db.execute(insert(UsageDaily), [row])
+
+
+def usage_total(db: Session, user_id: Optional[int] = None, since: Optional[date] = None) -> int:
+    q = db.query(func.coalesce(func.sum(UsageDaily.count), 0))
+    if user_id is not None:
+        q = q.filter(UsageDaily.user_id == user_id)
+    if since is not None:
+        q = q.filter(UsageDaily.day >= since)
+    return int(q.scalar() or 0)
+
+
+def usage_by_day(db: Session, start: date, user_id: Optional[int] = None) -> dict[str, int]:
+    """{"YYYY-MM-DD": count} from `start` on, for one user or everyone."""
+    q = db.query(UsageDaily.day, func.sum(UsageDaily.count)).filter(UsageDaily.day >= start)
+    if user_id is not None:
+        q = q.filter(UsageDaily.user_id == user_id)
+    return {d.isoformat() if isinstance(d, date) else str(d): int(n) for d, n in q.group_by(UsageDaily.day).all()}
+
+
+def active_users_since(db: Session, since: date) -> int:
+    return int(db.query(func.count(func.distinct(UsageDaily.user_id))).filter(UsageDaily.day >= since).scalar() or 0)
+
+
+def _utc_day(db: Session, column):
+    if db.get_bind().dialect.name == "postgresql":
+        return func.date(func.timezone("UTC", column))
+    return func.date(column)
+
+
+def rebuild_usage(db: Session, user_id: Optional[int] = None) -> int:
+    """Recompute usage_daily from email_analytics (all users or one); returns rows written. Caller commits."""
+    wipe = delete(UsageDaily)
+    if user_id is not None:
+        wipe = wipe.where(UsageDaily.user_id == user_id)
+    db.execute(wipe)
+
+    day = _utc_day(db, EmailAnalytics.created_at)
+    category = func.coalesce(EmailAnalytics.category, literal(""))
+    source = (
+        select(EmailAnalytics.user_id, day, category, func.count())
+        .where(EmailAnalytics.created_at.isnot(None))
+        .group_by(EmailAnalytics.user_id, day, category)
+    )
+    if user_id is not None:
+        source = source.where(EmailAnalytics.user_id == user_id)
+    result = db.execute(insert(UsageDaily).from_select(["user_id", "day", "category", "count"], source))
+    bump_data_version(db, user_id)
+    return result.rowcount or 0
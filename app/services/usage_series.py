@@ -0,0 +1,141 @@
+"""Usage time series bucketed in the user's own timezone, counted in the database.
+
+Buckets are local calendar hours, days or ISO weeks (Monday first) of the
+user's IANA timezone. The database groups email_analytics rows of the window
+(a range scan on ix_email_analytics_user_created) and returns one row per
+bucket; only the empty buckets are filled in here.
+
+Postgres converts with timezone(tz, created_at), i.e. AT TIME ZONE, so
+daylight-saving changes are handled by the server's zone database. SQLite
+has none: the UTC offsets in force during the window are worked out here,
+and each row is shifted by the one that applies to it (a CASE over the DST
+transitions, usually none or one or two per window).
+
+UTC users on day or week buckets read the usage_daily rollup instead.
+"""
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from sqlalchemy import case, func, literal
+from sqlalchemy.orm import Session
+
+from app.models.models import EmailAnalytics
+from app.services.usage_rollup import usage_by_day
+
+GRANULARITIES = ("hour", "day", "week")
+WINDOWS = (7, 30, 90, 365)
+MAX_HOURLY_WINDOW_DAYS = 30
+
+_PG_FORMATS = {"hour": 'YYYY-MM-DD"T"HH24:00', "day": "YYYY-MM-DD", "week": "YYYY-MM-DD"}
+_SQLITE_FORMATS = {"hour": "%Y-%m-%dT%H:00", "day": "%Y-%m-%d", "week": "%Y-%m-%d"}
+
+
+def user_zone(name: Optional[str]) -> ZoneInfo:
+    """The user's IANA zone; UTC when unset or unknown."""
+    try:
+        return ZoneInfo(name or "UTC")
+    except (ZoneInfoNotFoundError, ValueError):
+        return ZoneInfo("UTC")
+
+
+def _label(local: datetime, granularity: str) -> str:
+    if granularity == "hour":
+        return local.strftime("%Y-%m-%dT%H:00")
+    if granularity == "week":
+        return (local.date() - timedelta(days=local.weekday())).isoformat()
+    return local.date().isoformat()
+
+
+def series_window(zone: ZoneInfo, days: int, granularity: str, now: Optional[datetime] = None) -> tuple[datetime, list[str]]:
+    """(window start in UTC, bucket labels oldest first) for the last `days` local days or hours."""
+    now = (now or datetime.now(timezone.utc)).astimezone(timezone.utc)
+    if granularity == "hour":
+        start = now.replace(minute=0, second=0, microsecond=0) - timedelta(hours=days * 24 - 1)
+        # Step in UTC so DST gaps and repeated hours produce each local label once
+        local = ((start + timedelta(hours=i)).astimezone(zone) for i in range(days * 24))
+    else:
+        first_day = now.astimezone(zone).date() - timedelta(days=days - 1)
+        start = datetime.combine(first_day, time(), tzinfo=zone).astimezone(timezone.utc)
+        local = (datetime.combine(first_day + timedelta(days=i), time()) for i in range(days))
+    return start, list(dict.fromkeys(_label(t, granularity) for t in local))
+
+
+def period_start(zone: ZoneInfo, granularity: str, now: Optional[datetime] = None) -> datetime:
+    """Start (UTC) of the current local hour or day: where an unchanged series next shifts its window."""
+    local = (now or datetime.now(timezone.utc)).astimezone(zone)
+    if granularity == "hour":
+        start = local.replace(minute=0, second=0, microsecond=0)
+    else:
+        start = datetime.combine(local.date(), time(), tzinfo=zone)
+    return start.astimezone(timezone.utc)
+
+
+def utc_offsets(zone: ZoneInfo, start: datetime, end: datetime) -> list[tuple[datetime, int]]:
+    """[(from UTC instant, offset minutes)] covering [start, end]; one entry per DST period."""
+
+    def offset(t: datetime) -> int:
+        return int(t.astimezone(zone).utcoffset().total_seconds() // 60)
+
+    periods = [(start, offset(start))]
+    t = start
+    while t < end:
+        nxt = min(t + timedelta(days=1), end)
+        if offset(nxt) != periods[-1][1]:
+            lo, hi = t, nxt  # offset(lo) is the old one, offset(hi) the new one
+            while hi - lo > timedelta(minutes=1):
+                mid = lo + (hi - lo) / 2
+                lo, hi = (mid, hi) if offset(mid) == periods[-1][1] else (lo, mid)
+            periods.append((hi.replace(second=0, microsecond=0), offset(hi)))
+        t = nxt
+    return periods
+
+
+def _bucket(dialect_name: str, zone: ZoneInfo, granularity: str, start: datetime, end: datetime):
+    created = EmailAnalytics.created_at
+    if dialect_name == "postgresql":
+        local = func.timezone(zone.key, created)
+        return func.to_char(func.date_trunc(granularity, local), _PG_FORMATS[granularity])
+    periods = utc_offsets(zone, start, end)
+    modifier = literal(f"{periods[0][1]:+d} minutes")
+    if len(periods) > 1:
+        # Latest transition first: the first instant the row is at or after wins
+        modifier = case(
+            *[(created >= since.replace(tzinfo=None), f"{minutes:+d} minutes") for since, minutes in reversed(periods[1:])],
+            else_=modifier,
+        )
+    args = [created, modifier]
+    if granularity == "week":
+        args += [literal("weekday 0"), literal("-6 days")]
+    return func.strftime(_SQLITE_FORMATS[granularity], *args)
+
+
+def usage_series(
+    db: Session,
+    user_id: int,
+    tz_name: Optional[str],
+    days: int = 30,
+    granularity: str = "day",
+    now: Optional[datetime] = None,
+) -> list[tuple[str, int]]:
+    """[(bucket label, analyses)] for the user's last `days` days in their timezone, oldest first."""
+    zone = user_zone(tz_name)
+    now = (now or datetime.now(timezone.utc)).astimezone(timezone.utc)
+    start, labels = series_window(zone, days, granularity, now)
+    if granularity != "hour" and [m for _, m in utc_offsets(zone, start, now)] == [0]:
+        counts: dict[str, int] = {}
+        for day, n in usage_by_day(db, start.date(), user_id=user_id).items():
+            label = _label(datetime.combine(date.fromisoformat(day), time()), granularity)
+            counts[label] = counts.get(label, 0) + n
+    else:
+        bucket = _bucket(db.get_bind().dialect.name, zone, granularity, start, now).label("bucket")
+        # Grouping by the alias: a repeated expression would bind its parameters twice,
+        # which Postgres does not recognise as the same grouping expression
+        rows = (
+            db.query(bucket, func.count())
+            .filter(EmailAnalytics.user_id == user_id, EmailAnalytics.created_at >= start)
+            .group_by("bucket")
+            .all()
+        )
+        counts = {label: int(n) for label, n in rows}
+    return [(label, counts.get(label, 0)) for label in labels]
@@ -0,0 +1,139 @@
+"""Benchmark /emails/search text matching against mailbox size.
+
+For each size, fills a fresh database with one user's analyzed emails
+(synthetic subjects and summaries drawn from a Zipf-distributed vocabulary,
+so some query words are common and some rare, plus a second user with the
+same volume so per-user filtering is part of the cost) and times:
+
+- like:  the old lower(subject|summary) LIKE '%q%' scan
+- fts:   apply_text_search (FTS5 on SQLite, tsvector + GIN on Postgres),
+         ranked by relevance among the newest SEARCH_RANK_CANDIDATES matches
+- fts/date: the same match ordered by created_at (sort_by=created_at)
+
+Reports the median latency of the first page (20 rows, no count) per query.
+SQLite uses a temporary file per size; --database-url runs against Postgres
+(tables are created and dropped there).
+
+Usage:
+    python scripts/bench_email_search.py --sizes 10000,100000,1000000
+"""
+import argparse
+import itertools
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Ensure project root is on sys.path so `app` imports work when run from scripts/
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from sqlalchemy import create_engine, func, insert, or_
+from sqlalchemy.orm import Session
+
+from app.database.database import Base
+from app.models.models import Email, EmailCategory, User
+from app.services.email_search import apply_text_search
+
+WORDS = (
+    "weekly digest invoice payment receipt order shipped delivery meeting agenda webinar launch sale "
+    "discount coupon account security alert password report quarterly budget travel booking flight "
+    "hotel newsletter update community event ticket subscription renewal reminder team project review"
+).split()
+QUERIES = ["weekly", "invoice", "quarterly budget", "flight booking", "zzzz-no-match", "rev"]
+
+
+def vocabulary(size: int = 5000) -> tuple[list[str], list[float]]:
+    """Filler words plus WORDS spread over the frequency ranks, with cumulative Zipf weights."""
+    vocab = [f"w{n}" for n in range(size)]
+    for n, word in enumerate(WORDS):
+        vocab[n * (size // len(WORDS)) // 8] = word
+    return vocab, list(itertools.accumulate(1.0 / (rank + 1) for rank in range(size)))
+
+
+def fill(engine, rows: int, batch: int = 20000) -> int:
+    rng = random.Random(0)
+    vocab, cum_weights = vocabulary()
+    categories = list(EmailCategory)
+    with Session(engine) as db:
+        users = [User(email=f"bench{n}@example.com", hashed_password="x") for n in range(2)]
+        db.add_all(users)
+        db.commit()
+        for user in users:
+            for start in range(0, rows, batch):
+                db.execute(insert(Email), [
+                    {
+                        "user_id": user.id,
+                        "subject": " ".join(rng.choices(vocab, cum_weights=cum_weights, k=rng.randint(3, 8))).capitalize(),
+                        "summary": " ".join(rng.choices(vocab, cum_weights=cum_weights, k=rng.randint(12, 30))).capitalize() + ".",
+                        "category": rng.choice(categories),
+                        "confidence_score": rng.randint(30, 100),
+                    }
+                    for _ in range(min(batch, rows - start))
+                ])
+            db.commit()
+        return users[0].id
+
+
+def timed(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def like_page(db: Session, user_id: int, q: str):
+    pattern = f"%{q.lower()}%"
+    return (
+        db.query(Email.id)
+        .filter(Email.user_id == user_id)
+        .filter(or_(func.lower(Email.subject).like(pattern), func.lower(Email.summary).like(pattern)))
+        .order_by(Email.created_at.desc(), Email.id.desc())
+        .limit(20)
+        .all()
+    )
+
+
+def fts_page(db: Session, user_id: int, q: str, ranked: bool = True):
+    query = db.query(Email.id).filter(Email.user_id == user_id)
+    query, ranked_by = apply_text_search(query, q, db.get_bind().dialect.name, user_id, ranked=ranked)
+    order = ranked_by or [Email.created_at.desc(), Email.id.desc()]
+    return query.order_by(*order).limit(20).all()
+
+
+def main(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser(description="Email search latency vs mailbox size")
+    parser.add_argument("--sizes", default="10000,100000", help="Comma-separated emails per user")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--database-url", default=None, help="Postgres URL; default: temporary SQLite files")
+    args = parser.parse_args(argv)
+
+    print(f"{'rows/user':>10} {'query':>20} {'like ms':>9} {'fts ms':>9} {'fts/date ms':>12} {'hits':>6}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in [int(s) for s in args.sizes.split(",")]:
+            engine = create_engine(args.database_url or f"sqlite:///{os.path.join(tmp, f'search-{size}.db')}")
+            Base.metadata.drop_all(engine)
+            Base.metadata.create_all(engine)
+            start = time.perf_counter()
+            user_id = fill(engine, size)
+            print(f"{size:>10} (filled {2 * size} rows in {time.perf_counter() - start:.1f}s)")
+            with Session(engine) as db:
+                for q in QUERIES:
+                    like_ms = timed(lambda: like_page(db, user_id, q), args.repeat)
+                    fts_ms = timed(lambda: fts_page(db, user_id, q), args.repeat)
+                    date_ms = timed(lambda: fts_page(db, user_id, q, ranked=False), args.repeat)
+                    hits = len(fts_page(db, user_id, q))
+                    print(f"{'':>10} {q:>20} {like_ms:9.2f} {fts_ms:9.2f} {date_ms:12.2f} {hits:>6}")
+            if args.database_url:
+                Base.metadata.drop_all(engine)
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,89 @@
+"""Micro-benchmark for the keyword fallback matcher on large bodies.
+
+Builds a sanitized-newsletter-like body (default 1 MB of HTML-ish text with
+an unsubscribe footer) and times, per call:
+
+- legacy:  the old chain (concatenate + lowercase, then one `in` scan per
+  keyword list until the first hit)
+- count:   KeywordMatcher with one str.count per keyword (all hits)
+- regex:   KeywordMatcher with the single trie-regex pass (all hits)
+
+for the built-in rules and for a synthetic rule set with --extra-keywords
+more keywords, which shows where the regex starts to win.
+
+Usage:
+    python scripts/bench_keyword_rules.py --size-kb 1024 --repeat 10
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Ensure project root is on sys.path so `app` imports work when run from scripts/
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.services.keyword_rules import DEFAULT_RULES, KeywordMatcher
+
+WORDS = (
+    "the this week top stories product launch recap read more click here shop now "
+    "limited offer new arrivals free shipping members only view online privacy policy"
+).split()
+
+
+def build_body(size: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    parts, total = [], 0
+    while total < size:
+        para = "<p>" + " ".join(rng.choices(WORDS, k=60)) + "</p>\n"
+        parts.append(para)
+        total += len(para)
+    return "".join(parts)[:size] + "\n<p>You received this newsletter. Unsubscribe here.</p>"
+
+
+def legacy(rules: list[dict], content: str, subject: str):
+    full_text = f"{(subject or '').lower()} {content.lower()}"
+    for rule in rules:
+        if any(word in full_text for word in rule["keywords"]):
+            return rule["category"]
+    return None
+
+
+def timed(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def run(label: str, rules: list[dict], body: str, repeat: int) -> None:
+    count = KeywordMatcher.from_rules(rules, use_regex=False)
+    regex = KeywordMatcher.from_rules(rules, use_regex=True)
+    keywords = sum(len(r["keywords"]) for r in rules)
+    print(f"{label} ({keywords} keywords):")
+    print(f"  legacy chain  {timed(lambda: legacy(rules, body, 'Weekly digest'), repeat):8.2f} ms")
+    print(f"  count         {timed(lambda: count.scores(body, 'Weekly digest'), repeat):8.2f} ms")
+    print(f"  regex         {timed(lambda: regex.scores(body, 'Weekly digest'), repeat):8.2f} ms")
+    print(f"  default picks {KeywordMatcher.from_rules(rules).strategy}")
+
+
+def main(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser(description="Keyword fallback matcher benchmark")
+    parser.add_argument("--size-kb", type=int, default=1024)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--extra-keywords", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    body = build_body(args.size_kb * 1024)
+    print(f"Body: {len(body) / 1024:.0f} KB")
+    run("built-in rules", DEFAULT_RULES, body, args.repeat)
+    extra = [
+        {"category": "promotion", "keywords": [f"promo{n:03d}x" for n in range(args.extra_keywords)], "weight": 1.0}
+    ]
+    run("extended rules", DEFAULT_RULES + extra, body, args.repeat)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
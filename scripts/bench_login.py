@@ -0,0 +1,98 @@
+"""Login throughput per worker: password hashing inline vs in the bounded pool.
+
+Drives POST /api/auth/login on a single event loop (one uvicorn worker)
+through httpx's ASGI transport against a throwaway SQLite database, with
+--concurrency requests in flight, and reports requests per second and the
+longest event-loop stall seen meanwhile (how long any other request on the
+worker would have waited):
+
+- inline: PASSWORD_HASH_WORKERS=0, pbkdf2 runs on the event loop (the old
+  behaviour); logins serialize and everything else waits behind them
+- pool:   hashing in the thread pool (--workers threads)
+
+Usage:
+    python scripts/bench_login.py --requests 200 --concurrency 16 --workers 4
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Ensure project root is on sys.path so `app` imports work when run from scripts/
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+_DB = Path(tempfile.mkdtemp()) / "bench_login.sqlite3"
+os.environ["DATABASE_URL"] = f"sqlite:///{_DB}"
+os.environ["ENVIRONMENT"] = "development"
+os.environ["ALLOW_UNVERIFIED_LOGIN"] = "true"
+os.environ["CAPTCHA_ENABLED_LOGIN"] = "false"
+os.environ["CAPTCHA_ENABLED_REGISTER"] = "false"
+
+import httpx
+
+from app.database.database import Base, engine
+from app.main import app
+from app.services import password_hashing
+from app.services.auth_service import pwd_context
+
+EMAIL, PASSWORD = "bench-login@example.com", "StrongP@ssw0rd"
+
+
+async def _register() -> None:
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        r = await client.post("/api/auth/register", json={"email": EMAIL, "password": PASSWORD})
+        assert r.status_code == 200, r.text
+
+
+async def _run(label: str, total: int, concurrency: int) -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        sem = asyncio.Semaphore(concurrency)
+        form = {"username": EMAIL, "password": PASSWORD}
+
+        async def login():
+            async with sem:
+                r = await client.post("/api/auth/login", data=form)
+                assert r.status_code == 200, r.text
+
+        async def probe(stalls: list[float], done: asyncio.Event):
+            while not done.is_set():
+                start = time.perf_counter()
+                await asyncio.sleep(0.005)
+                stalls.append((time.perf_counter() - start) * 1000 - 5)
+
+        stalls: list[float] = []
+        done = asyncio.Event()
+        prober = asyncio.create_task(probe(stalls, done))
+        start = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(total)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await prober
+    print(f"{label:<7} {total} logins in {elapsed:6.2f}s -> {total / elapsed:7.1f} req/s; max loop stall {max(stalls, default=0):7.1f} ms")
+
+
+def main(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser(description="Login requests/second per worker")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=4, help="Hashing threads for the pool run")
+    args = parser.parse_args(argv)
+
+    app.state.limiter.enabled = False
+    Base.metadata.create_all(bind=engine)
+    asyncio.run(_register())
+    print(f"{pwd_context.default_scheme()}, {os.cpu_count()} CPUs, concurrency {args.concurrency}")
+
+    for label, workers in (("inline", 0), ("pool", args.workers)):
+        password_hashing._hasher = password_hashing.PasswordHasher(pwd_context, workers, max_pending=args.requests)
+        asyncio.run(_run(label, args.requests, args.concurrency))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
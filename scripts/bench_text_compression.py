@@ -0,0 +1,151 @@
+"""Benchmark CompressedText against a plain Text column.
+
+Generates realistic bodies (mostly HTML-stripped newsletters of 2-64 KB with
+varied vocabulary, plus short personal mail), writes them to a table per
+variant and reports bytes on disk and write/read latency per row:
+
+- text:  plain Text column (the old storage)
+- zlib:  CompressedText, zlib level 6
+- zstd:  CompressedText, zstd level 3 (only if zstandard is installed)
+
+SQLite runs use a fresh file per variant (size measured after VACUUM).
+With --database-url pointing at Postgres, tables are created there and sized
+with pg_total_relation_size (TOAST included), then dropped.
+
+Usage:
+    python scripts/bench_text_compression.py --rows 2000
+    python scripts/bench_text_compression.py --database-url postgresql://localhost/bench
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Ensure project root is on sys.path so `app` imports work when run from scripts/
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import sqlalchemy as sa
+
+from app.core.compression import ZLIB, ZSTD, CompressedText, zstandard
+
+VOCAB = (
+    "the this week top stories product launch recap read more click here shop now limited offer "
+    "new arrivals free shipping members only view online privacy policy team update quarterly "
+    "results webinar register today your account invoice attached meeting agenda notes follow up "
+    "community highlights release notes security advisory upgrade guide customer story pricing "
+    "discount code expires tonight event tickets schedule speakers sponsors survey feedback"
+).split()
+FOOTER = (
+    "You are receiving this email because you subscribed to our newsletter. "
+    "Unsubscribe or manage preferences. 123 Market Street, Springfield."
+)
+
+
+def build_bodies(n: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    bodies = []
+    for i in range(n):
+        if rng.random() < 0.2:
+            # Short personal mail
+            bodies.append(" ".join(rng.choices(VOCAB, k=rng.randint(20, 120))) + f"\n\nThanks,\nSam {i}")
+            continue
+        size = int(2 ** rng.uniform(11, 16))
+        extra = [f"{rng.choice(VOCAB)}{rng.randint(0, 9999)}" for _ in range(40)]  # names, SKUs, numbers
+        parts, total = [], 0
+        while total < size:
+            para = " ".join(rng.choices(VOCAB + extra, k=rng.randint(30, 90))) + ".\n\n"
+            parts.append(para)
+            total += len(para)
+        bodies.append("".join(parts)[:size] + FOOTER)
+    return bodies
+
+
+def variants() -> list[tuple[str, sa.types.TypeEngine]]:
+    out = [("text", sa.Text()), ("zlib", CompressedText(min_bytes=1024, codec=ZLIB))]
+    if zstandard is not None:
+        out.append(("zstd", CompressedText(min_bytes=1024, codec=ZSTD)))
+    return out
+
+
+def run_variant(engine, name: str, coltype, bodies: list[str], batch: int) -> dict:
+    metadata = sa.MetaData()
+    table = sa.Table(
+        f"bench_{name}",
+        metadata,
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("content", coltype),
+    )
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+    rows = [{"id": i, "content": b} for i, b in enumerate(bodies)]
+
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        for i in range(0, len(rows), batch):
+            conn.execute(table.insert(), rows[i : i + batch])
+    write = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with engine.connect() as conn:
+        read_back = conn.execute(sa.select(table.c.content).order_by(table.c.id)).scalars().all()
+    scan = time.perf_counter() - start
+    assert read_back == bodies, f"{name}: round trip mismatch"
+
+    ids = random.Random(1).sample(range(len(bodies)), min(200, len(bodies)))
+    start = time.perf_counter()
+    with engine.connect() as conn:
+        for i in ids:
+            conn.execute(sa.select(table.c.content).where(table.c.id == i)).scalar_one()
+    point = time.perf_counter() - start
+
+    if engine.dialect.name == "postgresql":
+        with engine.connect() as conn:
+            size = conn.execute(sa.text(f"SELECT pg_total_relation_size('{table.name}')")).scalar_one()
+        metadata.drop_all(engine)
+    else:
+        with engine.connect() as conn:
+            conn.execute(sa.text("VACUUM"))
+        size = os.path.getsize(engine.url.database)
+
+    n = len(bodies)
+    return {
+        "bytes": size,
+        "write_ms": write / n * 1000,
+        "scan_ms": scan / n * 1000,
+        "point_ms": point / len(ids) * 1000,
+    }
+
+
+def main(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser(description="CompressedText vs Text: size on disk and latency")
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=200)
+    parser.add_argument("--database-url", default=None, help="Postgres URL; default: temporary SQLite files")
+    args = parser.parse_args(argv)
+
+    bodies = build_bodies(args.rows)
+    raw = sum(len(b.encode("utf-8")) for b in bodies)
+    print(f"{len(bodies)} bodies, {raw / 1e6:.1f} MB of text (median {sorted(map(len, bodies))[len(bodies) // 2]:,} chars)")
+    print(f"{'variant':8} {'on disk':>10} {'ratio':>6} {'write/row':>10} {'scan/row':>10} {'get/row':>10}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, coltype in variants():
+            url = args.database_url or f"sqlite:///{Path(tmp) / name}.db"
+            engine = sa.create_engine(url)
+            try:
+                r = run_variant(engine, name, coltype, bodies, args.batch)
+            finally:
+                engine.dispose()
+            print(
+                f"{name:8} {r['bytes'] / 1e6:8.2f}MB {raw / r['bytes']:6.2f} "
+                f"{r['write_ms']:8.3f}ms {r['scan_ms']:8.3f}ms {r['point_ms']:8.3f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,103 @@
+"""Compress existing values of CompressedText columns in place.
+
+After migration c5d6e7f8a9b0 the columns are binary but old rows still hold
+plain UTF-8, which reads fine but takes full space. This rewrites them in
+batches (one commit per batch, so it can be stopped and re-run) using the
+EMAIL_BODY_COMPRESSION* settings unless overridden. Already compressed
+values, and plain ones below the threshold, are skipped unless
+--recompress is given (e.g. to switch codec).
+
+Usage:
+    python scripts/compress_text_columns.py --dry-run
+    python scripts/compress_text_columns.py --codec zstd --recompress
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# Ensure project root is on sys.path so `app` imports work when run from scripts/
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import sqlalchemy as sa
+
+from app.core.compression import default_text_compression, is_packed, pack_text, unpack_text
+from app.database.database import engine
+
+# (table, column, key column to page by)
+COLUMNS = [
+    ("email_bodies", "data", "hash"),
+    ("emails", "content", "id"),
+    ("email_analytics", "email_content", "id"),
+    ("analysis_jobs", "content", "id"),
+]
+
+
+def _size(value) -> int:
+    return len(value.encode("utf-8")) if isinstance(value, str) else len(value)
+
+
+def rewrite_column(
+    conn, table_name: str, column: str, key: str, min_bytes, codec, recompress: bool, dry_run: bool, batch: int
+) -> dict:
+    table = sa.table(table_name, sa.column(key), sa.column(column))
+    stats = {"rows": 0, "rewritten": 0, "bytes_before": 0, "bytes_after": 0}
+    last_id = None
+    while True:
+        query = sa.select(table.c[key], table.c[column]).where(table.c[column].isnot(None))
+        if last_id is not None:
+            query = query.where(table.c[key] > last_id)
+        rows = conn.execute(query.order_by(table.c[key]).limit(batch)).all()
+        if not rows:
+            return stats
+        for row_id, value in rows:
+            stats["rows"] += 1
+            before = _size(value)
+            stats["bytes_before"] += before
+            # Plain values below the threshold would only gain the 2-byte frame
+            small = min_bytes is None or before < min_bytes
+            if not recompress and (is_packed(value) or small):
+                stats["bytes_after"] += before
+                continue
+            packed = pack_text(unpack_text(value), min_bytes=min_bytes, codec=codec)
+            stats["bytes_after"] += len(packed)
+            if not dry_run:
+                conn.execute(table.update().where(table.c[key] == row_id).values(**{column: packed}))
+            stats["rewritten"] += 1
+        if not dry_run:
+            conn.commit()
+        last_id = rows[-1][0]
+
+
+def main(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser(description="Compress existing CompressedText column values")
+    parser.add_argument("--codec", default=None, help="zlib or zstd (default: EMAIL_BODY_COMPRESSION_CODEC)")
+    parser.add_argument("--min-bytes", type=int, default=None, help="Default: EMAIL_BODY_COMPRESS_MIN_BYTES")
+    parser.add_argument("--recompress", action="store_true", help="Also rewrite values that are already compressed")
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true", help="Report the savings without writing")
+    args = parser.parse_args(argv)
+
+    min_bytes, codec = default_text_compression()
+    if args.min_bytes is not None:
+        min_bytes = args.min_bytes
+    codec = args.codec or codec
+
+    inspector = sa.inspect(engine)
+    tables = set(inspector.get_table_names())
+    with engine.connect() as conn:
+        for table, column, key in COLUMNS:
+            if table not in tables:
+                continue
+            s = rewrite_column(conn, table, column, key, min_bytes, codec, args.recompress, args.dry_run, args.batch)
+            saved = s["bytes_before"] - s["bytes_after"]
+            print(
+                f"{table}.{column}: {s['rewritten']}/{s['rows']} rows rewritten, "
+                f"{s['bytes_before']:,} -> {s['bytes_after']:,} bytes ({saved:,} saved)"
+                + (" [dry run]" if args.dry_run else "")
+            )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,92 @@
+"""Concurrent analyze throughput on a single event loop (one uvicorn worker).
+
+Compares the blocking OpenAI path (what /emails/analyze used to do inside its
+async handler) with the awaitable path, using a fake completion client that
+simulates model latency so no API key or network is needed.
+
+Usage:
+    python scripts/loadtest_analyze.py --requests 200 --concurrency 50 --latency-ms 300
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+# Ensure project root is on sys.path so `app` imports work when run from scripts/
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.services.email_service import EmailAnalysisService
+
+FAKE_REPLY = "SUMMARY: Team sync moved to Friday.\nCATEGORY: meeting\nCONFIDENCE: 91"
+
+
+def _fake_response():
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=FAKE_REPLY))])
+
+
+class _SyncCompletions:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def create(self, **kwargs):
+        time.sleep(self.latency)
+        return _fake_response()
+
+
+class _AsyncCompletions:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    async def create(self, **kwargs):
+        await asyncio.sleep(self.latency)
+        return _fake_response()
+
+
+def _fake_client(completions) -> SimpleNamespace:
+    return SimpleNamespace(chat=SimpleNamespace(completions=completions))
+
+
+async def _run(label: str, handler, total: int, concurrency: int) -> None:
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with sem:
+            await handler(f"Reminder {i}", "Let's meet on Friday at 10 to review the roadmap.")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<8} {total} requests in {elapsed:6.2f}s -> {total / elapsed:8.1f} req/s")
+
+
+def main(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser(description="Analyze throughput per worker: blocking vs async client")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency-ms", type=int, default=300, help="Simulated completion latency")
+    args = parser.parse_args(argv)
+    latency = args.latency_ms / 1000.0
+
+    service = EmailAnalysisService()
+    service.client = _fake_client(_SyncCompletions(latency))
+    service.async_client = _fake_client(_AsyncCompletions(latency))
+
+    async def before(subject, content):
+        # Old handler shape: sync call inside an async def blocks the loop
+        return service.analyze_email(content=content, subject=subject)
+
+    async def after(subject, content):
+        return await service.analyze_email_async(content=content, subject=subject)
+
+    # Keep the blocking run short: it is strictly sequential
+    blocking_total = min(args.requests, max(1, int(5 / latency)) if latency else args.requests)
+    asyncio.run(_run("before", before, blocking_total, args.concurrency))
+    asyncio.run(_run("after", after, args.requests, args.concurrency))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,44 @@
+"""Delete expired and spent rows from the auth token tables.
+
+Covers blacklisted_tokens, refresh_tokens, verification_tokens,
+password_reset_tokens and expired analysis_cache_entries (see app/services/maintenance.py for what counts as
+purgeable). Deletes in batches of --batch-size rows, committing after each,
+and prints how many rows each table lost. Run it daily from cron, or set
+TOKEN_PURGE_INTERVAL_MINUTES to have the API do it.
+
+Usage:
+    python scripts/purge_expired_tokens.py [--batch-size 1000] [--dry-run]
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# Ensure project root on sys.path
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.database.database import SessionLocal
+from app.services.maintenance import purge_expired_analysis_cache, purge_expired_tokens
+
+
+def main(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser(description="Purge expired/used auth tokens")
+    parser.add_argument("--batch-size", type=int, default=None, help="Rows per delete transaction (default TOKEN_PURGE_BATCH_SIZE)")
+    parser.add_argument("--dry-run", action="store_true", help="Only count purgeable rows")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        report = purge_expired_tokens(db, batch_size=args.batch_size, dry_run=args.dry_run)
+        report.update(purge_expired_analysis_cache(db, batch_size=args.batch_size, dry_run=args.dry_run))
+    finally:
+        db.close()
+    verb = "purgeable" if args.dry_run else "removed"
+    for table, count in report.items():
+        print(f"{table}: {count} {verb}")
+    print(f"total: {sum(report.values())} {verb}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,64 @@
+"""Recompute the usage_daily rollup from email_analytics.
+
+Run after importing or deleting analytics rows outside the app, or to
+check the rollup (--dry-run reports rows that differ without writing).
+
+Usage:
+    python scripts/rebuild_usage_rollup.py [--user-id 42] [--dry-run]
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# Ensure project root on sys.path
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.database.database import SessionLocal
+from app.models.models import UsageDaily
+from app.services.usage_rollup import rebuild_usage
+
+
+def _snapshot(db: Session, user_id: Optional[int]) -> dict:
+    q = db.query(UsageDaily)
+    if user_id is not None:
+        q = q.filter(UsageDaily.user_id == user_id)
+    return {(r.user_id, str(r.day), r.category): r.count for r in q}
+
+
+def rebuild(db: Session, user_id: Optional[int] = None, dry_run: bool = False) -> int:
+    before = _snapshot(db, user_id)
+    rebuild_usage(db, user_id)
+    db.flush()
+    after = _snapshot(db, user_id)
+    changed = sorted(k for k in before.keys() | after.keys() if before.get(k, 0) != after.get(k, 0))
+    for key in changed:
+        print(f"user={key[0]} day={key[1]} category={key[2] or '-'}: {before.get(key, 0)} -> {after.get(key, 0)}")
+    if dry_run:
+        db.rollback()
+    else:
+        db.commit()
+    print(f"{len(after)} rollup rows, {len(changed)} changed{' (dry run)' if dry_run else ''}")
+    return len(changed)
+
+
+def main(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser(description="Rebuild usage_daily from email_analytics")
+    parser.add_argument("--user-id", type=int, default=None, help="Only this user (default: everyone)")
+    parser.add_argument("--dry-run", action="store_true", help="Report differences without writing")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        rebuild(db, args.user_id, args.dry_run)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
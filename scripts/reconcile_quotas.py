@@ -0,0 +1,38 @@
+"""Reset FREE-plan quota counters to the usage actually stored this month.
+
+A worker that dies between reserving a quota slot and storing the analysis
+leaves the counter one too high. Run this periodically (e.g. every few
+minutes from cron); counters touched within --idle-seconds are skipped so
+in-flight requests are not undercounted. Also drops past months' counters.
+
+Usage:
+    python scripts/reconcile_quotas.py [--idle-seconds 300]
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# Ensure project root on sys.path
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.database.database import SessionLocal
+from app.services.quota import reconcile_quotas
+
+
+def main(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser(description="Reconcile quota_counters with usage_daily")
+    parser.add_argument("--idle-seconds", type=int, default=300, help="Skip counters updated more recently than this")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        changed = reconcile_quotas(db, idle_seconds=args.idle_seconds)
+        print(f"{changed} quota counters reset")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
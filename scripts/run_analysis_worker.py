@@ -0,0 +1,62 @@
+"""Run analysis job workers in a separate process.
+
+Drains the database-backed job queue (analysis_jobs table), so it only makes
+sense with ANALYSIS_JOBS_BACKEND=database. Set ANALYSIS_JOB_WORKERS=0 on the
+API processes if you want all analysis to happen here.
+
+Usage:
+    python scripts/run_analysis_worker.py --workers 4
+"""
+import argparse
+import asyncio
+import signal
+import sys
+from pathlib import Path
+
+# Ensure project root is on sys.path so `app` imports work when run from scripts/
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.core.config import settings
+from app.services.analysis_jobs import AnalysisWorkerPool, DatabaseJobQueue
+from app.services.email_service import EmailAnalysisService
+
+
+async def run(workers: int) -> None:
+    queue = DatabaseJobQueue(
+        poll_interval=settings.analysis_job_poll_interval_seconds,
+        stale_after_seconds=settings.analysis_job_stale_seconds,
+        max_attempts=settings.analysis_job_max_attempts,
+    )
+    service = EmailAnalysisService()
+    pool = AnalysisWorkerPool(queue, service, workers)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:  # Windows
+            pass
+    pool.start()
+    print(f"Analysis worker running with {workers} workers; Ctrl+C to stop")
+    try:
+        await stop.wait()
+    finally:
+        await pool.stop()
+        await service.aclose()
+        print(f"Stopped: {pool.processed} processed, {pool.failed} failed")
+
+
+def main(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser(description="Process queued email analysis jobs from the database")
+    parser.add_argument("--workers", type=int, default=max(1, settings.analysis_job_workers))
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(run(args.workers))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,97 @@
+"""Train the local email classifier from stored Email rows.
+
+Labels are the categories assigned by the LLM (emails.analysis_source =
+'llm'); answers from the classifier itself or the keyword fallback are never
+trained on, whatever their confidence. Rows analyzed before the source was
+recorded are skipped unless --include-unattributed is given. Rows below
+--min-confidence are skipped too. The model is written to
+LOCAL_CLASSIFIER_PATH unless --output is given; restart the API to load it.
+
+Usage:
+    python scripts/train_classifier.py --min-confidence 60 --epochs 8
+"""
+import argparse
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+# Ensure project root is on sys.path so `app` imports work when run from scripts/
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from sqlalchemy import or_
+from sqlalchemy.orm import selectinload, undefer
+
+from app.core.config import settings
+from app.database.database import SessionLocal
+from app.models.models import AnalysisSource, Email
+from app.services.local_classifier import LocalClassifier
+
+
+def load_rows(
+    min_confidence: int, limit: int | None, include_unattributed: bool = False
+) -> tuple[list[tuple[str, str | None]], list[str]]:
+    source = Email.analysis_source == AnalysisSource.LLM.value
+    if include_unattributed:
+        source = or_(source, Email.analysis_source.is_(None))
+    db = SessionLocal()
+    try:
+        query = (
+            db.query(Email)
+            .options(selectinload(Email.body), undefer(Email.legacy_content))
+            .filter(Email.category.isnot(None), Email.confidence_score >= min_confidence, source)
+            .order_by(Email.id.desc())
+        )
+        if limit:
+            query = query.limit(limit)
+        emails = query.all()
+        items = [(e.content or "", e.subject) for e in emails]
+        labels = [getattr(e.category, "value", e.category) for e in emails]
+    finally:
+        db.close()
+    return items, labels
+
+
+def main(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser(description="Train the local email classifier from stored emails")
+    parser.add_argument("--output", default=settings.local_classifier_path)
+    parser.add_argument("--min-confidence", type=int, default=60, help="Skip rows labeled with lower confidence")
+    parser.add_argument("--limit", type=int, default=None, help="Use only the N most recent rows")
+    parser.add_argument(
+        "--include-unattributed", action="store_true", help="Also use rows analyzed before the label source was recorded"
+    )
+    parser.add_argument("--hash-bits", type=int, default=18, help="Feature buckets = 2**bits")
+    parser.add_argument("--epochs", type=int, default=8)
+    parser.add_argument("--learning-rate", type=float, default=4.0)
+    parser.add_argument("--holdout", type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    items, labels = load_rows(args.min_confidence, args.limit, args.include_unattributed)
+    if len(items) < 20:
+        raise SystemExit(f"Only {len(items)} LLM-labeled emails with confidence >= {args.min_confidence}; need at least 20")
+    print(f"Training on {len(items)} emails: {dict(Counter(labels).most_common())}")
+
+    start = time.perf_counter()
+    model, report = LocalClassifier.train(
+        items,
+        labels,
+        n_features=2 ** args.hash_bits,
+        epochs=args.epochs,
+        learning_rate=args.learning_rate,
+        holdout=args.holdout,
+    )
+    print(f"Trained in {time.perf_counter() - start:.1f}s: {report}")
+
+    start = time.perf_counter()
+    model.predict(items)
+    elapsed = time.perf_counter() - start
+    print(f"Scored {len(items)} emails in {elapsed:.2f}s ({len(items) / max(elapsed, 1e-9):.0f} emails/s)")
+
+    model.save(args.output)
+    print(f"Saved model to {args.output}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -1,3 +1,4 @@
+import asyncio
 import os
 import pytest
 from fastapi.testclient import TestClient
@@ -11,6 +12,8 @@ os.environ["CAPTCHA_ENABLED_REGISTER"] = "false"
 
 from app.main import app  # noqa: E402
 from app.database.database import Base, engine  # noqa: E402
+from app.models.models import EmailCategory  # noqa: E402
+from app.schemas.schemas import EmailAnalysis  # noqa: E402
 
 @pytest.fixture(scope="session", autouse=True)
 def setup_db():
@@ -31,3 +34,55 @@ def setup_db():
 @pytest.fixture()
 def client():
     return TestClient(app)
+
+@pytest.fixture(autouse=True)
+def reset_rate_limits():
+    # Limits are per process; without this, later tests inherit earlier tests' hits
+    app.state.limiter.reset()
+    yield
+
+
+class FakeAnalysisService:
+    """Stands in for EmailAnalysisService: answers "about <subject>" without a model call.
+
+    Options (pass a dict through indirect parametrization of
+    fake_analysis_service): `categories` maps a subject substring to the
+    category to answer with, `fail_subject` makes that subject raise, and
+    `delay` sleeps before answering.
+    """
+
+    def __init__(self, categories=None, fail_subject=None, delay=0.0):
+        self.categories = categories or {}
+        self.fail_subject = fail_subject
+        self.delay = delay
+
+    async def analyze_email_async(self, content, subject=None, timeout=None):
+        await asyncio.sleep(self.delay)
+        if self.fail_subject is not None and subject == self.fail_subject:
+            raise RuntimeError("model unavailable")
+        category = next((c for word, c in self.categories.items() if word in (subject or "")), EmailCategory.OTHER)
+        return EmailAnalysis(summary=f"about {subject}", category=category, confidence_score=60)
+
+    async def analyze_many_async(self, items, concurrency=4):
+        return [await self.analyze_email_async(content, subject) for content, subject in items]
+
+
+@pytest.fixture()
+def fake_analysis_service(request):
+    """A FakeAnalysisService injected for get_analysis_service for the whole test."""
+    from app.services.email_service import get_analysis_service
+
+    service = FakeAnalysisService(**getattr(request, "param", {}))
+    app.dependency_overrides[get_analysis_service] = lambda: service
+    yield service
+    app.dependency_overrides.pop(get_analysis_service, None)
+
+
+@pytest.fixture()
+def analyze_email(client, fake_analysis_service):
+    """POST /emails/analyze through the fake service; returns the stored email's id."""
+    def analyze(headers, subject, content="body"):
+        r = client.post("/emails/analyze", json={"subject": subject, "content": content}, headers=headers)
+        assert r.status_code == 200, r.text
+        return r.json()["id"]
+    return analyze
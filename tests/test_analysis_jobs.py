@@ -0,0 +1,195 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+def auth_headers(client, email="jobs@example.com"):
+    # Register and verify
+    client.post("/api/auth/register", json={
+        "email": email,
+        "password": "StrongP@ssw0rd",
+        "timezone": "UTC",
+    })
+    from app.database.database import SessionLocal
+    from app.models.models import User
+    db = SessionLocal()
+    u = db.query(User).filter(User.email == email).first()
+    u.is_verified = True
+    db.add(u)
+    db.commit()
+    db.close()
+    # Login
+    r = client.post(
+        "/api/auth/login",
+        data={"username": email, "password": "StrongP@ssw0rd"},
+        headers={"content-type": "application/x-www-form-urlencoded"},
+    )
+    token = r.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_job_is_accepted_then_completed(fake_analysis_service):
+    from app.main import app
+
+    with TestClient(app) as client:
+        # Workers hold the service they were started with; swap in the fake
+        app.state.analysis_worker_pool.service = fake_analysis_service
+        h = auth_headers(client)
+        r = client.post("/emails/analyze/jobs", json={"subject": "Standup", "content": "10am tomorrow"}, headers=h)
+        assert r.status_code == 202
+        accepted = r.json()
+        assert accepted["status"] == "queued"
+
+        for _ in range(50):
+            status = client.get(accepted["status_url"], headers=h).json()
+            if status["status"] in ("done", "failed"):
+                break
+            time.sleep(0.05)
+        assert status["status"] == "done"
+        assert status["data"]["summary"] == "about Standup"
+
+        # The SSE stream of a finished job replays its final state
+        with client.stream("GET", accepted["stream_url"], headers=h) as s:
+            body = "".join(s.iter_text())
+        assert "event: status" in body
+        assert "event: result" in body
+
+
+def test_other_users_cannot_see_job(fake_analysis_service):
+    from app.main import app
+
+    with TestClient(app) as client:
+        app.state.analysis_worker_pool.service = fake_analysis_service
+        owner = auth_headers(client, email="jobs-owner@example.com")
+        other = auth_headers(client, email="jobs-other@example.com")
+        job = client.post("/emails/analyze/jobs", json={"content": "hello"}, headers=owner).json()
+        assert client.get(job["status_url"], headers=other).status_code == 404
+
+
+async def test_database_queue_claims_each_job_once():
+    from app.database.database import SessionLocal
+    from app.models.models import User
+    from app.services.analysis_jobs import DatabaseJobQueue, Job
+
+    db = SessionLocal()
+    user = User(email="jobs-db@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    user_id = user.id
+    db.close()
+
+    queue = DatabaseJobQueue(poll_interval=0.01)
+    job = Job.new(user_id, "s", "body")
+    await queue.put(job)
+    claimed = await queue.claim(timeout=0.1)
+    assert claimed is not None and claimed.id == job.id and claimed.status == "running"
+    assert await queue.claim(timeout=0.05) is None
+
+
+async def test_database_queue_fails_jobs_after_max_stale_reclaims():
+    import asyncio
+
+    from app.database.database import SessionLocal
+    from app.models.models import AnalysisJob, User
+    from app.services.analysis_jobs import DatabaseJobQueue, Job
+
+    db = SessionLocal()
+    db.query(AnalysisJob).delete()  # jobs left running by earlier tests would be reclaimed first
+    user = User(email="jobs-stale@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    user_id = user.id
+    db.close()
+
+    # Every running job is immediately stale, as if each worker died mid-job
+    queue = DatabaseJobQueue(poll_interval=0.01, stale_after_seconds=0, max_attempts=2)
+    job = Job.new(user_id, "s", "body")
+    await queue.put(job)
+    for attempt in (1, 2):
+        claimed = await queue.claim(timeout=0.1)
+        assert claimed.id == job.id and claimed.attempts == attempt
+        await asyncio.sleep(0.01)
+    assert await queue.claim(timeout=0.05) is None
+    failed = await queue.get(job.id)
+    assert failed.status == "failed" and failed.attempts == 2 and failed.content is None
+
+
+@pytest.mark.parametrize("fake_analysis_service", [{"delay": 10}], indirect=True)
+async def test_memory_queue_requeues_a_job_handed_back_on_shutdown(fake_analysis_service):
+    import asyncio
+
+    from app.services.analysis_jobs import AnalysisWorkerPool, InMemoryJobQueue, Job
+
+    queue = InMemoryJobQueue()
+    pool = AnalysisWorkerPool(queue, fake_analysis_service, workers=0)
+    job = Job.new(1, "s", "body")
+    await queue.put(job)
+    claimed = await queue.claim(timeout=0.1)
+    task = asyncio.create_task(pool.process(claimed))
+    await asyncio.sleep(0.01)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    assert (await queue.get(job.id)).status == "queued"
+    again = await queue.claim(timeout=0.1)
+    assert again is not None and again.id == job.id and again.attempts == 2
+
+
+async def test_database_queue_stores_each_job_once(fake_analysis_service):
+    import asyncio
+
+    from app.database.database import SessionLocal
+    from app.models.models import AnalysisJob, Email, User
+    from app.services.analysis_jobs import AnalysisWorkerPool, DatabaseJobQueue, Job
+    from app.services.email_store import AnalyzedEmail
+
+    db = SessionLocal()
+    db.query(AnalysisJob).delete()
+    user = User(email="jobs-once@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    user_id = user.id
+    db.close()
+
+    def emails(subject):
+        db = SessionLocal()
+        try:
+            return db.query(Email).filter(Email.user_id == user_id, Email.subject == subject).count()
+        finally:
+            db.close()
+
+    # Every running job is immediately stale, so only the stored email_id keeps it from being reclaimed
+    queue = DatabaseJobQueue(poll_interval=0.01, stale_after_seconds=0)
+
+    # Worker dies between storing the Email and saving the job
+    crashed = Job.new(user_id, "crashed", "body")
+    await queue.put(crashed)
+    claimed = await queue.claim(timeout=0.1)
+    analysis = await fake_analysis_service.analyze_email_async("body", "crashed")
+    email_id = await queue.persist(claimed, AnalyzedEmail("crashed", "body", analysis, 1))
+    assert await queue.claim(timeout=0.05) is None
+    stored = await queue.get(crashed.id)
+    assert stored.status == "done" and stored.email_id == email_id and stored.content is None
+    assert emails("crashed") == 1
+
+    # Shutdown while the Email is being written: the write finishes and the job is not handed back
+    persist_sync = queue._persist_sync
+
+    def slow_persist(job, item):
+        time.sleep(0.2)
+        return persist_sync(job, item)
+
+    queue._persist_sync = slow_persist
+    pool = AnalysisWorkerPool(queue, fake_analysis_service, workers=0)
+    cancelled = Job.new(user_id, "cancelled", "body")
+    await queue.put(cancelled)
+    task = asyncio.create_task(pool.process(await queue.claim(timeout=0.1)))
+    await asyncio.sleep(0.05)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    stored = await queue.get(cancelled.id)
+    assert stored.status == "done" and stored.email_id is not None
+    assert await queue.claim(timeout=0.05) is None
+    assert emails("cancelled") == 1
@@ -0,0 +1,143 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+from app.models.models import EmailCategory
+from app.schemas.schemas import EmailAnalysis
+from app.services.email_service import EmailAnalysisService, SummaryStreamParser
+
+REPLY = "SUMMARY: Standup moved\nto 10:30.\nCATEGORY: meeting\nCONFIDENCE: 87"
+
+
+def auth_headers(client, email="stream@example.com"):
+    # Register and verify
+    client.post("/api/auth/register", json={
+        "email": email,
+        "password": "StrongP@ssw0rd",
+        "timezone": "UTC",
+    })
+    from app.database.database import SessionLocal
+    from app.models.models import User
+    db = SessionLocal()
+    u = db.query(User).filter(User.email == email).first()
+    u.is_verified = True
+    db.add(u)
+    db.commit()
+    db.close()
+    # Login
+    r = client.post(
+        "/api/auth/login",
+        data={"username": email, "password": "StrongP@ssw0rd"},
+        headers={"content-type": "application/x-www-form-urlencoded"},
+    )
+    token = r.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+class FakeStream:
+    def __init__(self, deltas, delay: float):
+        self.deltas = deltas
+        self.delay = delay
+
+    async def __aiter__(self):
+        for delta in self.deltas:
+            await asyncio.sleep(self.delay)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=delta))])
+
+
+class FakeStreamingCompletions:
+    def __init__(self, reply: str, chunk: int = 4, delay: float = 0.0):
+        self.deltas = [reply[i:i + chunk] for i in range(0, len(reply), chunk)]
+        self.delay = delay
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        assert kwargs.get("stream") is True
+        self.calls += 1
+        return FakeStream(self.deltas, self.delay)
+
+
+def make_service(completions) -> EmailAnalysisService:
+    service = EmailAnalysisService()
+    service.async_client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return service
+
+
+def parse_events(body: str) -> list[tuple[str, dict]]:
+    events = []
+    for block in body.split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines() if line and not line.startswith(":"))
+        if "event" in lines:
+            events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_summary_parser_holds_back_category_marker():
+    parser = SummaryStreamParser()
+    out = [parser.feed(REPLY[i:i + 3]) for i in range(0, len(REPLY), 3)]
+    out.append(parser.finish())
+    assert "".join(out) == "Standup moved\nto 10:30."
+    assert not any("CAT" in part for part in out)
+
+
+async def test_stream_analysis_yields_tokens_then_analysis():
+    completions = FakeStreamingCompletions(REPLY)
+    service = make_service(completions)
+    parts = [p async for p in service.stream_analysis("Standup moves to 10:30 tomorrow", subject="Standup")]
+    analysis = parts[-1]
+    assert isinstance(analysis, EmailAnalysis)
+    assert analysis.category == EmailCategory.MEETING and analysis.confidence_score == 87
+    assert len(parts) > 2
+    assert "".join(parts[:-1]) == analysis.summary
+
+    # Second identical request is served from the cache as one token
+    again = [p async for p in service.stream_analysis("Standup moves to 10:30 tomorrow", subject="Standup")]
+    assert completions.calls == 1
+    assert again == [analysis.summary, analysis]
+
+
+async def test_stream_analysis_stalls_fall_back():
+    service = make_service(FakeStreamingCompletions(REPLY, delay=1.0))
+    parts = [p async for p in service.stream_analysis("Let's schedule a meeting", timeout=0.05)]
+    assert parts[-1].confidence_score == 30
+    assert service.pool_stats()["timeouts"] == 1
+
+
+def test_analyze_stream_persists_before_result(client):
+    from app.main import app
+    from app.services.email_service import get_analysis_service
+
+    service = make_service(FakeStreamingCompletions(REPLY))
+    app.dependency_overrides[get_analysis_service] = lambda: service
+    h = auth_headers(client)
+    try:
+        with client.stream("POST", "/emails/analyze/stream", json={"subject": "Standup", "content": "Moved to 10:30, streamed"}, headers=h) as r:
+            assert r.status_code == 200
+            assert r.headers["content-type"].startswith("text/event-stream")
+            body = "".join(r.iter_text())
+    finally:
+        app.dependency_overrides.pop(get_analysis_service, None)
+
+    events = parse_events(body)
+    names = [name for name, _ in events]
+    assert names[-1] == "result" and names.count("token") >= 2
+    assert "".join(data["text"] for name, data in events if name == "token") == "Standup moved\nto 10:30."
+    result = events[-1][1]
+    assert result["category"] == "meeting" and result["confidence_score"] == 87
+    stored = client.get(f"/emails/{result['id']}", headers=h)
+    assert stored.status_code == 200 and stored.json()["summary"] == result["summary"]
+
+
+def test_demo_analyze_stream(client):
+    from app.main import app
+    from app.services.email_service import get_analysis_service
+
+    service = make_service(FakeStreamingCompletions(REPLY))
+    app.dependency_overrides[get_analysis_service] = lambda: service
+    try:
+        r = client.post("/emails/demo-analyze/stream", json={"content": "Demo standup stream"})
+    finally:
+        app.dependency_overrides.pop(get_analysis_service, None)
+    assert r.status_code == 200
+    events = parse_events(r.text)
+    assert events[-1] == ("result", {"summary": "Standup moved\nto 10:30.", "category": "meeting", "confidence_score": 87, "dropped_tokens": 0})
@@ -0,0 +1,44 @@
+def auth_headers(client, email):
+    client.post("/api/auth/register", json={"email": email, "password": "StrongP@ssw0rd", "timezone": "UTC"})
+    r = client.post(
+        "/api/auth/login",
+        data={"username": email, "password": "StrongP@ssw0rd"},
+        headers={"content-type": "application/x-www-form-urlencoded"},
+    )
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}, r.json()["refresh_token"]
+
+
+def _count_decodes(monkeypatch):
+    from app.core import auth_context
+
+    calls = []
+    decode = auth_context.jwt.decode
+
+    def counting(token, *args, **kwargs):
+        calls.append(token)
+        return decode(token, *args, **kwargs)
+
+    monkeypatch.setattr(auth_context.jwt, "decode", counting)
+    return calls
+
+
+def test_rate_limited_call_and_logout_decode_each_token_once(client, monkeypatch, fake_analysis_service):
+    h, refresh = auth_headers(client, "authctx@example.com")
+    calls = _count_decodes(monkeypatch)
+
+    r = client.post("/emails/analyze", json={"subject": "s", "content": "body"}, headers=h)
+    assert r.status_code == 200, r.text
+    assert len(calls) == 1  # limiter key + get_current_principal share one decode
+
+    calls.clear()
+    r = client.post("/api/auth/logout", json={"refresh_token": refresh}, headers=h)
+    assert r.status_code == 200
+    assert sorted(calls) == sorted([h["Authorization"].split(" ", 1)[1], refresh])
+    assert client.get("/analytics/usage/summary", headers=h).status_code == 401
+
+
+def test_invalid_bearer_falls_back_to_401_and_ip_limits(client):
+    r = client.get("/analytics/usage/summary", headers={"Authorization": "Bearer not-a-jwt"})
+    assert r.status_code == 401
+    r = client.post("/emails/analyze", json={"subject": "s", "content": "body"}, headers={"Authorization": "Bearer x"})
+    assert r.status_code == 401
@@ -0,0 +1,29 @@
+import sqlalchemy as sa
+
+from app.core import compression
+from app.core.compression import ZLIB, CompressedText, compress_text, is_packed, pack_text, unpack_text
+
+
+def test_compressed_text_round_trip_and_legacy_values():
+    engine = sa.create_engine("sqlite://")
+    table = sa.Table("t", sa.MetaData(), sa.Column("id", sa.Integer, primary_key=True), sa.Column("c", CompressedText(min_bytes=64)))
+    big = "Weekly digest: top stories, read more. " * 200
+    with engine.begin() as conn:
+        # Rows written while the column was still TEXT
+        conn.execute(sa.text("CREATE TABLE t (id INTEGER PRIMARY KEY, c TEXT)"))
+        conn.execute(sa.text("INSERT INTO t VALUES (1, 'legacy str'), (2, CAST('legacy bytes' AS BLOB))"))
+        conn.execute(table.insert(), [{"id": 3, "c": big}, {"id": 4, "c": "short"}, {"id": 5, "c": None}])
+
+        stored = dict(conn.execute(sa.text("SELECT id, c FROM t")).all())
+        assert is_packed(stored[3]) and len(stored[3]) < len(big) // 10
+        assert stored[4] == b"\x00rshort"
+
+        values = dict(conn.execute(sa.select(table.c.id, table.c.c)).all())
+    assert values == {1: "legacy str", 2: "legacy bytes", 3: big, 4: "short", 5: None}
+
+
+def test_zstd_falls_back_to_zlib_without_zstandard(monkeypatch):
+    monkeypatch.setattr(compression, "zstandard", None)
+    text = "newsletter " * 500
+    assert compress_text(text, min_bytes=16, codec="zstd")[1] == ZLIB
+    assert unpack_text(pack_text(text, min_bytes=16, codec="zstd")) == text
@@ -0,0 +1,59 @@
+from sqlalchemy import event
+
+
+def auth_headers(client, email):
+    client.post("/api/auth/register", json={"email": email, "password": "StrongP@ssw0rd", "timezone": "UTC"})
+    r = client.post(
+        "/api/auth/login",
+        data={"username": email, "password": "StrongP@ssw0rd"},
+        headers={"content-type": "application/x-www-form-urlencoded"},
+    )
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+def test_polling_endpoints_answer_304_until_data_changes(client, analyze_email):
+    from app.database.database import engine
+
+    h = auth_headers(client, "etag@example.com")
+    email_id = analyze_email(h, "first")
+    urls = ["/emails/?page_size=5", "/analytics/usage/summary", "/analytics/usage/daily?days=7"]
+    etags = {}
+    for url in urls:
+        r = client.get(url, headers=h)
+        assert r.status_code == 200 and r.headers["ETag"].startswith('W/"') and "Last-Modified" in r.headers
+        etags[url] = r.headers["ETag"]
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        for url in urls:
+            r = client.get(url, headers={**h, "If-None-Match": etags[url]})
+            assert r.status_code == 304 and r.content == b"" and r.headers["ETag"] == etags[url]
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    # Only auth and the version stamp are read; no emails/analytics/rollup query runs
+    assert not [s for s in statements if "FROM emails" in s or "email_analytics" in s or "usage_daily" in s]
+
+    # Other query strings are other representations
+    assert client.get("/emails/?page_size=6", headers={**h, "If-None-Match": etags[urls[0]]}).status_code == 200
+
+    # Writes change the validators
+    analyze_email(h, "second")
+    for url in urls:
+        assert client.get(url, headers={**h, "If-None-Match": etags[url]}).status_code == 200
+    listed = client.get(urls[0], headers=h)
+    assert client.delete(f"/emails/{email_id}", headers=h).status_code == 200
+    assert client.get(urls[0], headers={**h, "If-None-Match": listed.headers["ETag"]}).status_code == 200
+
+
+def test_if_modified_since_is_used_without_if_none_match(client, analyze_email):
+    h = auth_headers(client, "etag-ims@example.com")
+    analyze_email(h, "only")
+    r = client.get("/emails/", headers=h)
+    last_modified = r.headers["Last-Modified"]
+    assert client.get("/emails/", headers={**h, "If-Modified-Since": last_modified}).status_code == 304
+    assert client.get("/emails/", headers={**h, "If-Modified-Since": "Thu, 01 Jan 2026 00:00:00 GMT"}).status_code == 200
+    # A non-matching If-None-Match wins over a fresh If-Modified-Since
+    stale = {**h, "If-Modified-Since": last_modified, "If-None-Match": 'W/"other"'}
+    assert client.get("/emails/", headers=stale).status_code == 200
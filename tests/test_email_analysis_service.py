@@ -0,0 +1,121 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.models.models import EmailCategory
+from app.schemas.schemas import EmailAnalysis
+from app.services.email_service import EmailAnalysisService
+
+
+class FakeAsyncCompletions:
+    def __init__(self, reply: str, delay: float = 0.0):
+        self.reply = reply
+        self.delay = delay
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        msg = SimpleNamespace(content=self.reply)
+        return SimpleNamespace(choices=[SimpleNamespace(message=msg)])
+
+
+def make_service(completions) -> EmailAnalysisService:
+    service = EmailAnalysisService()
+    service.async_client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return service
+
+
+async def test_analyze_email_async_parses_completion():
+    service = make_service(FakeAsyncCompletions("SUMMARY: Pay by Friday.\nCATEGORY: invoice\nCONFIDENCE: 88"))
+    result = await service.analyze_email_async("Your invoice is attached", subject="Invoice #12")
+    assert result.category == EmailCategory.INVOICE
+    assert result.confidence_score == 88
+    assert result.summary == "Pay by Friday."
+
+
+async def test_analyze_email_async_times_out_to_fallback():
+    service = make_service(FakeAsyncCompletions("SUMMARY: x\nCATEGORY: spam\nCONFIDENCE: 99", delay=1.0))
+    result = await service.analyze_email_async("Let's schedule a meeting", timeout=0.05)
+    assert result.category == EmailCategory.MEETING
+    assert result.confidence_score == 30
+
+
+def test_demo_analyze_uses_injected_service(client, fake_analysis_service):
+    r = client.post("/emails/demo-analyze", json={"subject": "Hi", "content": "See you at the party"})
+    assert r.status_code == 200
+    assert r.json() == {"summary": "about Hi", "category": "other", "confidence_score": 60, "dropped_tokens": 0}
+
+
+def test_pool_stats_exposed(client):
+    r = client.get("/diag/analysis")
+    assert r.status_code == 200
+    assert "requests_total" in r.json()["pool"]
+
+
+async def test_identical_emails_hit_analysis_cache():
+    completions = FakeAsyncCompletions("SUMMARY: Weekly digest.\nCATEGORY: newsletter\nCONFIDENCE: 93")
+    service = make_service(completions)
+    first = await service.analyze_email_async("Top stories  this week", subject="Digest")
+    second = await service.analyze_email_async("Top stories this week ", subject="Digest")
+    assert completions.calls == 1
+    assert second == first
+    stats = service.cache_stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+
+
+async def test_fallback_results_are_not_cached():
+    service = make_service(FakeAsyncCompletions("SUMMARY: x\nCATEGORY: spam\nCONFIDENCE: 99", delay=1.0))
+    await service.analyze_email_async("Let's schedule a meeting", timeout=0.01)
+    assert service.cache_stats()["entries"] == 0
+
+
+class PackAwareCompletions:
+    """Answers packed prompts partially (item 2 garbled) and single prompts fully."""
+
+    def __init__(self):
+        self.packed_calls = 0
+        self.single_calls = 0
+
+    async def create(self, **kwargs):
+        prompt = kwargs["messages"][-1]["content"]
+        if "<<<EMAIL 1>>>" in prompt:
+            self.packed_calls += 1
+            reply = (
+                "[1]\nSUMMARY: Invoice due.\nCATEGORY: invoice\nCONFIDENCE: 90\n"
+                "[2]\nSUMMARY: ???\nCATEGORY: not-a-category\n"
+                "[3]\nSUMMARY: Lunch plans.\nCATEGORY: social\nCONFIDENCE: 80\n"
+            )
+        else:
+            self.single_calls += 1
+            reply = "SUMMARY: Standup moved.\nCATEGORY: meeting\nCONFIDENCE: 85"
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=reply))])
+
+
+async def test_analyze_many_packs_short_emails_and_retries_unparsed_items():
+    completions = PackAwareCompletions()
+    service = make_service(completions)
+    results = await service.analyze_many_async(
+        [("Invoice attached", "Bill"), ("Standup at 10", "Sync"), ("Pizza?", "Lunch")]
+    )
+    assert completions.packed_calls == 1
+    assert completions.single_calls == 1
+    assert [r.category for r in results] == [EmailCategory.INVOICE, EmailCategory.MEETING, EmailCategory.SOCIAL]
+
+
+async def test_persistent_cache_tier_runs_off_the_event_loop():
+    import threading
+
+    from app.services.analysis_cache import AnalysisCache
+
+    analysis = EmailAnalysis(summary="Pay by Friday.", category=EmailCategory.INVOICE, confidence_score=88)
+    writer = AnalysisCache(persist=True)
+    await writer.aset("async-tier-key", analysis)
+
+    reader = AnalysisCache(persist=True)
+    db_threads = []
+    db_get = reader._db_get
+    reader._db_get = lambda key: db_threads.append(threading.get_ident()) or db_get(key)
+    assert await reader.aget("async-tier-key") == analysis
+    assert await reader.aget("async-tier-key") == analysis
+    assert reader.db_hits == 1 and len(db_threads) == 1
+    assert db_threads[0] != threading.get_ident()
@@ -0,0 +1,102 @@
+from sqlalchemy import text
+
+from app.core.compression import ZLIB, compress_text, decompress_text
+from app.schemas.schemas import EmailAnalysis
+from app.services.email_store import AnalyzedEmail, body_hash, bulk_persist_analyses, persist_analysis
+
+
+def auth_headers(client, email="bodies@example.com"):
+    # Register and verify
+    client.post("/api/auth/register", json={
+        "email": email,
+        "password": "StrongP@ssw0rd",
+        "timezone": "UTC",
+    })
+    from app.database.database import SessionLocal
+    from app.models.models import User
+    db = SessionLocal()
+    u = db.query(User).filter(User.email == email).first()
+    u.is_verified = True
+    db.add(u)
+    db.commit()
+    db.close()
+    # Login
+    r = client.post(
+        "/api/auth/login",
+        data={"username": email, "password": "StrongP@ssw0rd"},
+        headers={"content-type": "application/x-www-form-urlencoded"},
+    )
+    token = r.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _analysis():
+    return EmailAnalysis(summary="s", category="newsletter", confidence_score=80)
+
+
+def test_compress_text_round_trip():
+    text = "Weekly digest. " * 500
+    data, codec = compress_text(text, min_bytes=1024)
+    assert codec == ZLIB and len(data) < len(text) // 10
+    assert decompress_text(data, codec) == text
+    assert compress_text("short", min_bytes=1024) == (b"short", "")
+
+
+def test_body_is_stored_once_and_shared(client):
+    from app.database.database import SessionLocal
+    from app.models.models import EmailAnalytics, EmailBody, User
+
+    db = SessionLocal()
+    try:
+        user = User(email="bodies-store@example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        body = "Top stories this week. " * 400
+        first = persist_analysis(db, user.id, AnalyzedEmail("Digest", body, _analysis(), 5))
+        more = bulk_persist_analyses(db, user.id, [AnalyzedEmail("Digest", body, _analysis(), 5)] * 3)
+        assert [e.content for e in more] == [body] * 3
+        db.commit()
+
+        rows = db.query(EmailBody).filter(EmailBody.hash == body_hash(body)).all()
+        assert len(rows) == 1 and rows[0].text == body and rows[0].size == len(body)
+        # Stored as a zlib CompressedText frame
+        stored = db.execute(text("SELECT data FROM email_bodies WHERE hash = :h"), {"h": rows[0].hash}).scalar()
+        assert bytes(stored[:2]) == b"\x00z" and len(stored) < len(body) // 10
+        assert db.query(EmailAnalytics).filter(EmailAnalytics.body_hash == rows[0].hash).count() == 4
+        assert first.content == body and first.legacy_content is None
+    finally:
+        db.close()
+
+
+def test_list_can_skip_bodies_and_delete_releases_them(client):
+    from app.database.database import SessionLocal
+    from app.models.models import EmailAnalytics, EmailBody, User
+
+    h = auth_headers(client)
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.email == "bodies@example.com").one()
+        email = persist_analysis(db, user.id, AnalyzedEmail("Solo", "A body nobody else has", _analysis(), 5))
+        email_id, digest = email.id, email.body_hash
+    finally:
+        db.close()
+
+    full = client.get("/emails/", headers=h).json()["data"]
+    assert full[0]["content"] == "A body nobody else has"
+    light = client.get("/emails/?include_content=false", headers=h).json()["data"]
+    assert light[0]["content"] is None and light[0]["summary"] == "s"
+    assert client.get(f"/emails/{email_id}", headers=h).json()["content"] == "A body nobody else has"
+
+    db = SessionLocal()
+    try:
+        # Analytics keep the body alive; once they are gone the body goes with the email
+        db.query(EmailAnalytics).filter(EmailAnalytics.body_hash == digest).delete()
+        db.commit()
+    finally:
+        db.close()
+    assert client.delete(f"/emails/{email_id}", headers=h).status_code == 200
+    db = SessionLocal()
+    try:
+        assert db.get(EmailBody, digest) is None
+    finally:
+        db.close()
@@ -0,0 +1,88 @@
+from app.database.database import SessionLocal
+from app.models.models import Email, EmailCategory, User
+
+
+def auth_headers(client, email):
+    client.post("/api/auth/register", json={"email": email, "password": "StrongP@ssw0rd", "timezone": "UTC"})
+    r = client.post(
+        "/api/auth/login",
+        data={"username": email, "password": "StrongP@ssw0rd"},
+        headers={"content-type": "application/x-www-form-urlencoded"},
+    )
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+def _seed(email, rows):
+    db = SessionLocal()
+    user = db.query(User).filter(User.email == email).first()
+    ids = []
+    for subject, summary in rows:
+        e = Email(user_id=user.id, subject=subject, summary=summary, category=EmailCategory.OTHER, confidence_score=50)
+        db.add(e)
+        db.flush()
+        ids.append(e.id)
+    db.commit()
+    db.close()
+    return ids
+
+
+def _search(client, h, query):
+    r = client.get("/emails/search", params={"q": query, "include_content": "false"}, headers=h)
+    assert r.status_code == 200, r.text
+    return [e["id"] for e in r.json()["data"]]
+
+
+def test_full_text_search_ranks_and_matches_prefixes(client):
+    h = auth_headers(client, "fts@example.com")
+    mentions, subject_hit, unrelated, both = _seed("fts@example.com", [
+        ("Weekly digest", "Includes a link to your invoice archive"),
+        ("Invoice #4411 from Acme", "Payment due Friday"),
+        ("Team lunch", "Pizza on Thursday"),
+        ("Invoice reminder", "Second invoice notice, payment overdue"),
+    ])
+    other = auth_headers(client, "fts-other@example.com")
+    _seed("fts-other@example.com", [("Invoice for someone else", None)])
+
+    ranked = _search(client, h, "invoice")
+    assert set(ranked) == {mentions, subject_hit, both}
+    assert ranked[-1] == mentions  # summary-only match ranks last
+    assert _search(client, h, "inv") == ranked  # word prefixes match
+    assert _search(client, h, "invoice payment overdue") == [both]  # every word must match
+    assert _search(client, h, '"invoice*') == ranked  # FTS syntax is not interpreted
+    assert _search(client, h, 'invoice OR lunch') == []  # OR is just another word
+    assert len(_search(client, other, "invoice")) == 1
+
+    by_date = client.get("/emails/search", params={"q": "invoice", "sort_by": "created_at"}, headers=h).json()
+    assert [e["id"] for e in by_date["data"]] == sorted(ranked, reverse=True)
+    # Cursors work for the explicit sorts, not for relevance
+    params = {"q": "invoice", "sort_by": "created_at", "page_size": 1}
+    cursor = client.get("/emails/search", params=params, headers=h).json()["pagination"]["next_cursor"]
+    assert client.get("/emails/search", params={**params, "cursor": cursor}, headers=h).status_code == 200
+    assert client.get("/emails/search", params={"q": "invoice", "cursor": cursor}, headers=h).status_code == 400
+
+
+def test_search_index_follows_updates_and_deletes(client):
+    h = auth_headers(client, "fts-sync@example.com")
+    [email_id] = _seed("fts-sync@example.com", [("Quarterly report", "Numbers attached")])
+    assert _search(client, h, "quarterly") == [email_id]
+
+    db = SessionLocal()
+    db.get(Email, email_id).summary = "Budget figures attached"
+    db.commit()
+    db.close()
+    assert _search(client, h, "budget") == [email_id]
+    assert _search(client, h, "numbers") == []
+
+    assert client.delete(f"/emails/{email_id}", headers=h).status_code == 200
+    assert _search(client, h, "quarterly") == []
+
+
+def test_relevance_ranking_is_capped_to_newest_matches(client, monkeypatch):
+    from app.core.config import settings
+
+    h = auth_headers(client, "fts-cap@example.com")
+    ids = _seed("fts-cap@example.com", [(f"Receipt {n}", "Thanks for your order") for n in range(5)])
+    monkeypatch.setattr(settings, "search_rank_candidates", 2)
+    assert sorted(_search(client, h, "receipt")) == ids[-2:]
+    r = client.get("/emails/search", params={"q": "receipt", "sort_by": "created_at"}, headers=h)
+    assert r.json()["pagination"]["total"] == 5
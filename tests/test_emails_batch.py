@@ -0,0 +1,60 @@
+def auth_headers(client, email="batch@example.com"):
+    # Register and verify
+    client.post("/api/auth/register", json={
+        "email": email,
+        "password": "StrongP@ssw0rd",
+        "timezone": "UTC",
+    })
+    from app.database.database import SessionLocal
+    from app.models.models import User
+    db = SessionLocal()
+    u = db.query(User).filter(User.email == email).first()
+    u.is_verified = True
+    db.add(u)
+    db.commit()
+    db.close()
+    # Login
+    r = client.post(
+        "/api/auth/login",
+        data={"username": email, "password": "StrongP@ssw0rd"},
+        headers={"content-type": "application/x-www-form-urlencoded"},
+    )
+    token = r.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_batch_analyze_persists_items_and_reports_errors(client, fake_analysis_service):
+    h = auth_headers(client)
+    items = [
+        {"subject": "one", "content": "first body"},
+        {"subject": "two", "content": "<b></b>"},
+        {"subject": "three", "content": "third body"},
+    ]
+    r = client.post("/emails/analyze/batch", json={"items": items}, headers=h)
+    assert r.status_code == 200
+    body = r.json()
+    assert body["succeeded"] == 2 and body["failed"] == 1
+    assert [item["success"] for item in body["data"]] == [True, False, True]
+    assert body["data"][1]["error"]
+    assert body["data"][2]["data"]["summary"] == "about three"
+
+    listed = client.get("/emails", headers=h).json()
+    assert {e["subject"] for e in listed["data"]} == {"one", "three"}
+
+
+def test_batch_analyze_checks_quota_once(client):
+    from app.core.config import settings
+
+    h = auth_headers(client, email="batch-quota@example.com")
+    items = [{"content": f"body {i}"} for i in range(settings.free_monthly_analysis_limit + 1)]
+    r = client.post("/emails/analyze/batch", json={"items": items}, headers=h)
+    assert r.status_code == 402
+
+
+def test_batch_over_the_item_limit_is_rejected_by_validation(client):
+    from app.core.config import settings
+
+    h = auth_headers(client, email="batch-max@example.com")
+    items = [{"content": f"body {i}"} for i in range(settings.analysis_batch_max_items + 1)]
+    r = client.post("/emails/analyze/batch", json={"items": items}, headers=h)
+    assert r.status_code == 422
@@ -32,3 +32,69 @@ def test_paginated_emails_empty(client):
     assert body["success"] is True
     assert body["pagination"]["page"] == 1
     assert body["data"] == []
+
+
+def _seed_emails(email, confidences):
+    from datetime import datetime, timezone
+    from app.database.database import SessionLocal
+    from app.models.models import Email, EmailCategory, User
+
+    db = SessionLocal()
+    user = db.query(User).filter(User.email == email).first()
+    same_time = datetime(2026, 10, 1, 12, 0, tzinfo=timezone.utc)
+    for n, conf in enumerate(confidences):
+        email = Email(
+            user_id=user.id,
+            subject=f"Message {n}",
+            legacy_content="body",
+            category=EmailCategory.OTHER,
+            confidence_score=conf,
+        )
+        if n % 2:
+            email.created_at = same_time  # several rows share a timestamp, so the id tiebreak matters
+        db.add(email)
+    db.commit()
+    db.close()
+
+
+def _walk(client, h, url):
+    ids, cursor, pages = [], None, 0
+    while True:
+        r = client.get(url + (f"&cursor={cursor}" if cursor else ""), headers=h)
+        assert r.status_code == 200
+        body = r.json()
+        ids += [e["id"] for e in body["data"]]
+        pages += 1
+        cursor = body["pagination"]["next_cursor"]
+        if cursor is None:
+            assert body["pagination"]["has_next"] is False
+            return ids, body["pagination"], pages
+
+
+def test_cursor_pagination_matches_offset_order(client):
+    h = auth_headers(client, "cursor@example.com")
+    _seed_emails("cursor@example.com", [50, 90, None, 70, 90, 10, None])
+
+    offset_ids = [e["id"] for e in client.get("/emails?page_size=100", headers=h).json()["data"]]
+    ids, last_meta, pages = _walk(client, h, "/emails?page_size=2")
+    assert ids == offset_ids and len(ids) == 7 and pages == 4
+    assert last_meta["total"] is None and last_meta["page"] is None and last_meta["has_prev"] is True
+
+    url = "/emails/search?sort_by=confidence&sort_dir=asc&page_size=100"
+    offset_ids = [e["id"] for e in client.get(url, headers=h).json()["data"]]
+    ids, _, _ = _walk(client, h, url.replace("page_size=100", "page_size=3"))
+    assert ids == offset_ids and len(ids) == 7
+
+    # Page mode still counts by default and hands out a cursor for the next page
+    meta = client.get("/emails?page_size=3", headers=h).json()["pagination"]
+    assert meta["total"] == 7 and meta["pages"] == 3 and meta["next_cursor"]
+    assert client.get("/emails?page_size=3&include_total=false", headers=h).json()["pagination"]["total"] is None
+
+
+def test_invalid_or_mismatched_cursor_is_rejected(client):
+    h = auth_headers(client, "badcursor@example.com")
+    _seed_emails("badcursor@example.com", [10, 20, 30])
+    assert client.get("/emails?cursor=not-a-cursor", headers=h).status_code == 400
+    cursor = client.get("/emails?page_size=1", headers=h).json()["pagination"]["next_cursor"]
+    r = client.get(f"/emails/search?sort_by=confidence&cursor={cursor}", headers=h)
+    assert r.status_code == 400
@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+from app.models.models import EmailCategory
+from app.services.keyword_rules import DEFAULT_RULES, KeywordMatcher, _matcher_for
+
+
+@pytest.mark.parametrize("use_regex", [False, True])
+def test_strategies_return_the_same_weighted_hits(use_regex):
+    matcher = KeywordMatcher.from_rules(DEFAULT_RULES, use_regex=use_regex)
+    scores = matcher.scores("Please pay the INVOICE. Payment due; see the meeting notes.", subject="Invoice 42")
+    assert scores == {EmailCategory.INVOICE: 4.0, EmailCategory.MEETING: 1.0}
+    # "bill" is a substring of "billing": both strategies count it
+    assert matcher.scores("Your billing schedule") == {EmailCategory.INVOICE: 1.0, EmailCategory.MEETING: 1.0}
+
+
+@pytest.mark.parametrize("use_regex", [False, True])
+def test_strategies_agree_on_overlapping_keywords(use_regex):
+    rules = [
+        {"category": "invoice", "keywords": ["bill", "billing", "ill"], "weight": 1.0},
+        {"category": "spam", "keywords": ["aa"], "weight": 1.0},
+    ]
+    matcher = KeywordMatcher.from_rules(rules, use_regex=use_regex)
+    assert matcher.scores("Your Billing bill", subject="aaaa") == {EmailCategory.INVOICE: 5.0, EmailCategory.SPAM: 6.0}
+
+
+def test_categorize_keeps_rule_priority():
+    matcher = KeywordMatcher.from_rules(DEFAULT_RULES)
+    assert matcher.categorize("urgent: invoice attached") == EmailCategory.IMPORTANT
+    # The first matching rule wins, however many hits later rules have
+    assert matcher.categorize("invoice and payment, urgent") == EmailCategory.IMPORTANT
+    assert matcher.categorize("newsletter", subject="Invoice") == EmailCategory.INVOICE
+    assert matcher.categorize("Lunch?", subject="Hello") is None
+
+
+def test_rules_load_from_json(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps([
+        {"category": "promotion", "keywords": ["sale", "% off"], "weight": 2.0},
+        {"category": "social", "keywords": ["party"]},
+    ]))
+    matcher = _matcher_for(str(path))
+    assert matcher.scores("30% off, sale ends at the party") == {
+        EmailCategory.PROMOTION: 4.0,
+        EmailCategory.SOCIAL: 1.0,
+    }
+    # Unreadable files fall back to the built-in rules
+    assert _matcher_for(str(tmp_path / "missing.json")).categorize("phishing attempt") == EmailCategory.SPAM
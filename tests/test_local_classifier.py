@@ -0,0 +1,122 @@
+import random
+from types import SimpleNamespace
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.core.config import settings
+from app.models.models import AnalysisSource, EmailCategory
+from app.services.email_service import EmailAnalysisService
+from app.services.local_classifier import LocalClassifier
+
+VOCAB = {
+    "spam": ["winner", "claim", "prize", "lottery", "wire", "bitcoin"],
+    "newsletter": ["digest", "weekly", "stories", "unsubscribe", "roundup"],
+    "meeting": ["meeting", "calendar", "standup", "agenda", "invite"],
+    "invoice": ["invoice", "payment", "due", "amount", "billing"],
+}
+FILLER = "the a and to of for you your we our this that with on at is".split()
+
+
+def synthetic(n: int, seed: int = 0):
+    rng = random.Random(seed)
+    items, labels = [], []
+    for _ in range(n):
+        label = rng.choice(sorted(VOCAB))
+        words = rng.choices(VOCAB[label], k=5) + rng.choices(FILLER, k=25)
+        rng.shuffle(words)
+        items.append((" ".join(words), " ".join(rng.choices(VOCAB[label], k=2))))
+        labels.append(label)
+    return items, labels
+
+
+@pytest.fixture(scope="module")
+def classifier():
+    items, labels = synthetic(1200)
+    model, report = LocalClassifier.train(items, labels, n_features=2 ** 14, epochs=6)
+    assert report["holdout_accuracy"] > 0.95
+    return model
+
+
+def test_predict_proba_is_a_distribution(classifier):
+    items, labels = synthetic(50, seed=1)
+    probs = classifier.predict_proba(items)
+    assert probs.shape == (50, 4)
+    assert np.allclose(probs.sum(axis=1), 1.0, atol=1e-5)
+    predicted = [c.value for c, _ in classifier.predict(items)]
+    assert sum(p == l for p, l in zip(predicted, labels)) >= 45
+
+
+def test_save_and_load_round_trip(classifier, tmp_path):
+    path = tmp_path / "clf.npz"
+    classifier.save(str(path))
+    loaded = LocalClassifier.load(str(path))
+    items, _ = synthetic(10, seed=2)
+    assert loaded.temperature == classifier.temperature
+    assert np.allclose(loaded.predict_proba(items), classifier.predict_proba(items))
+
+
+class CountingCompletions:
+    def __init__(self):
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        msg = SimpleNamespace(content="SUMMARY: From the model.\nCATEGORY: meeting\nCONFIDENCE: 90")
+        return SimpleNamespace(choices=[SimpleNamespace(message=msg)])
+
+
+async def test_confident_spam_skips_the_model(classifier, monkeypatch):
+    monkeypatch.setattr(settings, "local_classifier_skip_threshold", 0.9)
+    completions = CountingCompletions()
+    service = EmailAnalysisService()
+    service.cache = None
+    service.classifier = classifier
+    service.async_client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+
+    spam = await service.analyze_email_async("claim your prize winner lottery wire", subject="winner prize")
+    assert spam.category == EmailCategory.SPAM and spam.confidence_score >= 90
+    assert spam.source == AnalysisSource.CLASSIFIER
+    assert completions.calls == 0
+
+    meeting = await service.analyze_email_async("standup agenda meeting invite", subject="meeting")
+    assert meeting.summary == "From the model." and meeting.source == AnalysisSource.LLM
+    assert completions.calls == 1
+    assert service.pool_stats()["prescreened"] == 1
+
+
+def test_fallback_uses_classifier(classifier):
+    service = EmailAnalysisService()
+    service.classifier = classifier
+    result = service._fallback_analysis("invoice payment amount due billing", subject="invoice")
+    assert result.category == EmailCategory.INVOICE
+    assert result.confidence_score > 30
+    assert result.source == AnalysisSource.CLASSIFIER
+
+
+def test_training_rows_are_llm_labels_only(client):
+    from app.database.database import SessionLocal
+    from app.models.models import Email, User
+    from app.schemas.schemas import EmailAnalysis
+    from app.services.email_store import AnalyzedEmail, persist_analysis
+    from scripts.train_classifier import load_rows
+
+    client.post("/api/auth/register", json={"email": "train-rows@example.com", "password": "StrongP@ssw0rd", "timezone": "UTC"})
+    db = SessionLocal()
+    try:
+        user_id = db.query(User.id).filter(User.email == "train-rows@example.com").scalar()
+        for subject, source in [("train-llm", AnalysisSource.LLM), ("train-clf", AnalysisSource.CLASSIFIER), ("train-kw", AnalysisSource.KEYWORDS)]:
+            analysis = EmailAnalysis(summary="s", category=EmailCategory.SPAM, confidence_score=95, source=source)
+            persist_analysis(db, user_id, AnalyzedEmail(subject, f"{subject} body", analysis, 1))
+        db.add(Email(user_id=user_id, subject="train-legacy", summary="s", category=EmailCategory.SPAM, confidence_score=95))
+        db.commit()
+        stored = dict(db.query(Email.subject, Email.analysis_source).filter(Email.user_id == user_id))
+    finally:
+        db.close()
+    assert stored == {"train-llm": "llm", "train-clf": "classifier", "train-kw": "keywords", "train-legacy": None}
+
+    subjects = {subject for _, subject in load_rows(60, None)[0]}
+    assert "train-llm" in subjects and not subjects & {"train-clf", "train-kw", "train-legacy"}
+    subjects = {subject for _, subject in load_rows(60, None, include_unattributed=True)[0]}
+    assert {"train-llm", "train-legacy"} <= subjects and not subjects & {"train-clf", "train-kw"}
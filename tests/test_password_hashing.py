@@ -0,0 +1,63 @@
+import asyncio
+import threading
+
+import pytest
+
+
+class SlowContext:
+    def __init__(self):
+        self.release = threading.Event()
+        self.threads = set()
+
+    def verify(self, plain, hashed):
+        self.threads.add(threading.current_thread().name)
+        self.release.wait(5)
+        return plain == hashed
+
+    def hash(self, password):
+        return password
+
+
+async def test_hashing_runs_in_the_pool_and_sheds_beyond_the_queue_bound():
+    from app.services.password_hashing import PasswordHasher, PasswordHashingBusy
+
+    context = SlowContext()
+    hasher = PasswordHasher(context, workers=1, max_pending=2)
+    first = asyncio.create_task(hasher.verify("a", "a"))
+    second = asyncio.create_task(hasher.verify("b", "c"))
+    await asyncio.sleep(0.05)
+
+    # The loop is free while both wait on the pool; a third call is shed at once
+    assert hasher.stats()["pending"] == 2
+    with pytest.raises(PasswordHashingBusy):
+        await hasher.verify("d", "d")
+
+    context.release.set()
+    assert await first is True and await second is False
+    assert context.threads == {"password-hash_0"}
+    assert hasher.stats() == {"workers": 1, "max_pending": 2, "pending": 0, "completed": 2, "shed": 1}
+
+
+def test_login_answers_503_with_retry_after_when_hashing_is_saturated(client, monkeypatch):
+    from app.services import password_hashing
+    from app.services.password_hashing import PasswordHasher
+
+    client.post("/api/auth/register", json={"email": "hash-busy@example.com", "password": "StrongP@ssw0rd"})
+    full = PasswordHasher(SlowContext(), workers=1, max_pending=1)
+    full._pending = 1
+    monkeypatch.setattr(password_hashing, "_hasher", full)
+
+    r = client.post(
+        "/api/auth/login",
+        data={"username": "hash-busy@example.com", "password": "wrong"},
+        headers={"content-type": "application/x-www-form-urlencoded"},
+    )
+    assert r.status_code == 503 and "Retry-After" in r.headers
+    assert r.json()["error"]["code"] == 503
+    # Unknown accounts never reach the hasher
+    r = client.post(
+        "/api/auth/login",
+        data={"username": "nobody@example.com", "password": "x"},
+        headers={"content-type": "application/x-www-form-urlencoded"},
+    )
+    assert r.status_code == 401 and full.stats()["shed"] == 1
@@ -0,0 +1,66 @@
+from sqlalchemy import event
+
+
+def auth_headers(client, email):
+    client.post("/api/auth/register", json={"email": email, "password": "StrongP@ssw0rd", "timezone": "UTC"})
+    r = client.post(
+        "/api/auth/login",
+        data={"username": email, "password": "StrongP@ssw0rd"},
+        headers={"content-type": "application/x-www-form-urlencoded"},
+    )
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+def _make_admin(email):
+    from app.database.database import SessionLocal
+    from app.models.models import User
+
+    db = SessionLocal()
+    db.query(User).filter(User.email == email).update({"is_admin": True})
+    db.commit()
+    db.close()
+
+
+def test_repeat_requests_skip_the_users_lookup(client):
+    from app.database.database import engine
+
+    h = auth_headers(client, "principal@example.com")
+    assert client.get("/analytics/usage/summary", headers=h).status_code == 200
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        for _ in range(3):
+            assert client.get("/analytics/usage/summary", headers=h).status_code == 200
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert not [s for s in statements if "FROM users" in s and "users.email" in s]
+
+    # /me still returns the full, current profile
+    assert client.get("/api/auth/me", headers=h).json()["email"] == "principal@example.com"
+
+
+def test_account_changes_and_logout_invalidate_cached_principals(client):
+    admin = auth_headers(client, "principal-admin@example.com")
+    _make_admin("principal-admin@example.com")
+    h = auth_headers(client, "principal-target@example.com")
+    _make_admin("principal-target@example.com")
+    target_id = client.get("/api/auth/me", headers=h).json()["id"]
+
+    # Cached as admin; demotion applies on the next request
+    assert client.get("/admin/overview", headers=h).status_code == 200
+    r = client.patch(f"/admin/users/{target_id}", json={"is_admin": False}, headers=admin)
+    assert r.status_code == 200
+    assert client.get("/admin/overview", headers=h).status_code == 403
+
+    # Logout revokes the token even though it was cached
+    other = auth_headers(client, "principal-target@example.com")
+    assert client.get("/analytics/usage/summary", headers=other).status_code == 200
+    assert client.post("/api/auth/logout", headers=other).status_code == 200
+    assert client.get("/analytics/usage/summary", headers=other).status_code == 401
+
+    # Deleted users lose access at once
+    assert client.get("/analytics/usage/summary", headers=h).status_code == 200
+    assert client.delete(f"/admin/users/{target_id}", headers=admin).status_code == 200
+    assert client.get("/analytics/usage/summary", headers=h).status_code == 401
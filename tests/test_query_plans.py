@@ -0,0 +1,137 @@
+"""Query-plan regression test for the per-user hot paths.
+
+Runs the list/search/usage endpoints and the quota check, captures every
+statement that reads emails, email_analytics or usage_daily and EXPLAINs it with the
+same parameters: none may fall back to a full table scan. Runs on the
+SQLite test database, and also on Postgres when TEST_POSTGRES_URL is set
+(with enable_seqscan off, since tiny test tables always favour seq scans).
+"""
+import os
+import re
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.database.database import Base, engine as sqlite_engine, get_db
+from app.main import app
+
+HOT_TABLES = re.compile(r"\b(emails|email_analytics|usage_daily)\b")
+
+ENDPOINTS = [
+    "/emails/?page_size=5",
+    "/emails/?page_size=5&include_total=false",
+    "/emails/search?category=newsletter&page_size=5",
+    "/emails/search?sort_by=confidence&sort_dir=desc&min_confidence=50&page_size=5",
+    "/emails/search?date_from=2026-01-01&date_to=2026-12-31&page_size=5",
+    "/emails/search?q=newsletter%20s1&page_size=5",
+    "/analytics/usage/summary",
+    "/analytics/usage/daily",
+    "/analytics/usage/daily?days=7&granularity=hour",
+]
+
+
+def auth_headers(client, email):
+    client.post("/api/auth/register", json={"email": email, "password": "StrongP@ssw0rd", "timezone": "UTC"})
+    r = client.post(
+        "/api/auth/login",
+        data={"username": email, "password": "StrongP@ssw0rd"},
+        headers={"content-type": "application/x-www-form-urlencoded"},
+    )
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+@contextmanager
+def captured(engine):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and HOT_TABLES.search(statement):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def sqlite_full_scans(engine, statement, parameters):
+    conn = engine.raw_connection()
+    try:
+        rows = conn.cursor().execute("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+    finally:
+        conn.close()
+    details = [r[-1] for r in rows]
+    return [d for d in details if re.match(r"SCAN (emails|email_analytics|usage_daily)\b", d) and "INDEX" not in d], details
+
+
+def postgres_full_scans(engine, statement, parameters):
+    conn = engine.raw_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute("SET enable_seqscan = off")
+        cur.execute("EXPLAIN " + statement, parameters)
+        details = [r[0] for r in cur.fetchall()]
+    finally:
+        conn.close()
+    return [d for d in details if re.search(r"Seq Scan on (emails|email_analytics|usage_daily)\b", d)], details
+
+
+@pytest.fixture(params=["sqlite", "postgresql"])
+def backend(request, client):
+    if request.param == "sqlite":
+        yield sqlite_engine, sqlite_full_scans
+        return
+    url = os.getenv("TEST_POSTGRES_URL")
+    if not url:
+        pytest.skip("TEST_POSTGRES_URL not set")
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+
+    def pg_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = pg_db
+    try:
+        yield engine, postgres_full_scans
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+
+
+def test_hot_queries_use_indexes(client, backend):
+    engine, full_scans = backend
+    email = f"plans-{engine.dialect.name}@example.com"
+    h = auth_headers(client, email)
+
+    from app.api.emails import _enforce_free_quota
+    from app.models.models import Email, EmailCategory, User
+
+    db = sessionmaker(bind=engine)()
+    try:
+        user = db.query(User).filter(User.email == email).one()
+        for n in range(3):
+            db.add(Email(user_id=user.id, subject=f"s{n}", category=EmailCategory.NEWSLETTER, confidence_score=60 + n))
+        db.commit()
+
+        with captured(engine) as statements:
+            for url in ENDPOINTS:
+                assert client.get(url, headers=h).status_code == 200, url
+            cursor = client.get("/emails/?page_size=1", headers=h).json()["pagination"]["next_cursor"]
+            assert client.get(f"/emails/?page_size=1&cursor={cursor}", headers=h).status_code == 200
+            _enforce_free_quota(db, user)
+    finally:
+        db.close()
+
+    assert len(statements) >= len(ENDPOINTS)
+    for statement, parameters in statements:
+        scans, plan = full_scans(engine, statement, parameters)
+        assert not scans, f"full scan in plan {plan} for:\n{statement}"
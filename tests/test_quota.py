@@ -0,0 +1,120 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import event
+
+
+def auth_headers(client, email):
+    client.post("/api/auth/register", json={"email": email, "password": "StrongP@ssw0rd", "timezone": "UTC"})
+    r = client.post(
+        "/api/auth/login",
+        data={"username": email, "password": "StrongP@ssw0rd"},
+        headers={"content-type": "application/x-www-form-urlencoded"},
+    )
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+def _user_id(email):
+    from app.database.database import SessionLocal
+    from app.models.models import User
+
+    db = SessionLocal()
+    try:
+        return db.query(User).filter(User.email == email).one().id
+    finally:
+        db.close()
+
+
+def _counter(user_id):
+    from app.database.database import SessionLocal
+    from app.models.models import QuotaCounter
+
+    db = SessionLocal()
+    try:
+        return db.query(QuotaCounter.used).filter(QuotaCounter.user_id == user_id).scalar()
+    finally:
+        db.close()
+
+
+def test_concurrent_reservations_never_exceed_limit(client):
+    from app.database.database import SessionLocal
+    from app.services.quota import QuotaExceeded, reserve_quota
+
+    auth_headers(client, "quota-race@example.com")
+    user_id = _user_id("quota-race@example.com")
+
+    def attempt(_):
+        db = SessionLocal()
+        try:
+            reserve_quota(db, user_id, limit=4)
+            return True
+        except QuotaExceeded:
+            return False
+        finally:
+            db.close()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        granted = list(pool.map(attempt, range(12)))
+    assert granted.count(True) == 4
+    assert _counter(user_id) == 4
+
+
+@pytest.mark.parametrize("fake_analysis_service", [{"fail_subject": "fail"}], indirect=True)
+def test_failed_analyses_hand_quota_back(client, monkeypatch, fake_analysis_service):
+    from app.core.config import settings
+
+    h = auth_headers(client, "quota-release@example.com")
+    user_id = _user_id("quota-release@example.com")
+    monkeypatch.setattr(settings, "free_monthly_analysis_limit", 3)
+    assert client.post("/emails/analyze", json={"subject": "fail", "content": "x"}, headers=h).status_code == 500
+    assert _counter(user_id) == 0
+    items = [{"subject": "ok", "content": "a"}, {"subject": "empty", "content": "<b></b>"}]
+    body = client.post("/emails/analyze/batch", json={"items": items}, headers=h).json()
+    assert body["succeeded"] == 1
+    assert _counter(user_id) == 1
+    for _ in range(2):
+        assert client.post("/emails/analyze", json={"subject": "ok", "content": "y"}, headers=h).status_code == 200
+    r = client.post("/emails/analyze", json={"subject": "ok", "content": "z"}, headers=h)
+    assert r.status_code == 402 and "3/3" in r.json()["error"]["message"]
+
+
+def test_exhausted_quota_is_refused_from_memory_and_reconciled(client, monkeypatch):
+    from app.database.database import SessionLocal, engine
+    from app.models.models import QuotaCounter
+    from app.services.quota import QuotaExceeded, QuotaReservation, month_start, release_quota, reconcile_quotas, reserve_quota
+    from app.services.usage_rollup import record_usage
+
+    auth_headers(client, "quota-cache@example.com")
+    user_id = _user_id("quota-cache@example.com")
+    db = SessionLocal()
+    record_usage(db, user_id, ["other"])
+    db.commit()
+    reserve_quota(db, user_id, limit=2)  # seeded from usage_daily: 1 + 1
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        for _ in range(2):
+            try:
+                reserve_quota(db, user_id, limit=2)
+                assert False, "quota should be exhausted"
+            except QuotaExceeded as exc:
+                assert exc.used == 2
+        assert sum("quota_counters" in s for s in statements) == 2  # UPDATE + SELECT, first refusal only
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    # Releasing a slot forgets the refusal
+    release_quota(db, QuotaReservation(user_id=user_id, month=month_start(), count=1))
+    reserve_quota(db, user_id, limit=2)
+
+    # The second reservation was never stored; reconciling idle counters corrects it
+    db.query(QuotaCounter).filter(QuotaCounter.user_id == user_id).update(
+        {QuotaCounter.updated_at: QuotaCounter.updated_at - timedelta(hours=1)}, synchronize_session=False
+    )
+    db.commit()
+    assert reconcile_quotas(db, idle_seconds=60) == 1
+    assert _counter(user_id) == 1
+    db.close()
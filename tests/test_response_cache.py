@@ -0,0 +1,115 @@
+from sqlalchemy import event
+
+
+def auth_headers(client, email):
+    client.post("/api/auth/register", json={"email": email, "password": "StrongP@ssw0rd", "timezone": "UTC"})
+    r = client.post(
+        "/api/auth/login",
+        data={"username": email, "password": "StrongP@ssw0rd"},
+        headers={"content-type": "application/x-www-form-urlencoded"},
+    )
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+def _statements(engine):
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    return statements, lambda: event.remove(engine, "before_cursor_execute", listener)
+
+
+def test_search_and_series_are_served_from_cache_until_data_changes(client, analyze_email):
+    from app.database.database import engine
+    from app.services.response_cache import get_response_cache
+
+    get_response_cache().clear()
+    h = auth_headers(client, "rcache@example.com")
+    email_id = analyze_email(h, "quarterly report")
+    urls = ["/emails/search?q=quarterly", "/analytics/usage/daily?days=7"]
+    first = [client.get(url, headers=h) for url in urls]
+    assert all(r.status_code == 200 for r in first)
+    assert first[0].json()["pagination"]["total"] == 1
+
+    statements, stop = _statements(engine)
+    try:
+        again = [client.get(url, headers=h) for url in urls]
+    finally:
+        stop()
+    assert [r.content for r in again] == [r.content for r in first]
+    assert again[1].headers["ETag"] == first[1].headers["ETag"]
+    assert not [s for s in statements if "FROM emails" in s or "usage_daily" in s or "email_analytics" in s]
+
+    stats = client.get("/diag/cache").json()
+    assert stats["backend"] == "memory" and stats["entries"] >= 2
+    assert stats["namespaces"]["email-search"] == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+    assert stats["namespaces"]["usage-series"]["hits"] == 1
+
+    # A write is visible on the next read and frees the user's old entries
+    analyze_email(h, "quarterly budget")
+    assert get_response_cache().stats()["entries"] == 0
+    assert client.get(urls[0], headers=h).json()["pagination"]["total"] == 2
+    assert sum(b["count"] for b in client.get(urls[1], headers=h).json()["data"]) == 2
+    assert client.delete(f"/emails/{email_id}", headers=h).status_code == 200
+    assert client.get(urls[0], headers=h).json()["pagination"]["total"] == 1
+
+    # Entries are per user
+    other = auth_headers(client, "rcache-other@example.com")
+    assert client.get(urls[0], headers=other).json()["pagination"]["total"] == 0
+
+
+def test_admin_views_are_cached_for_their_ttl(client):
+    from app.database.database import SessionLocal
+    from app.models.models import User
+    from app.services.response_cache import get_response_cache
+
+    get_response_cache().clear()
+    h = auth_headers(client, "rcache-admin@example.com")
+    db = SessionLocal()
+    db.query(User).filter(User.email == "rcache-admin@example.com").update({"is_admin": True})
+    db.commit()
+    db.close()
+
+    before = client.get("/admin/overview", headers=h).json()
+    auth_headers(client, "rcache-newcomer@example.com")
+    assert client.get("/admin/overview", headers=h).json() == before
+    assert client.get("/admin/usage/daily", headers=h).status_code == 200
+    assert get_response_cache().stats()["namespaces"]["admin-overview"]["hits"] == 1
+
+    get_response_cache().clear()
+    after = client.get("/admin/overview", headers=h).json()
+    assert after["data"]["total_users"] == before["data"]["total_users"] + 1
+
+
+def test_redis_backend_falls_back_to_memory(monkeypatch):
+    from app.core.config import settings
+    from app.services.response_cache import ResponseCache
+
+    monkeypatch.setattr(settings, "response_cache_backend", "redis")
+    monkeypatch.setattr(settings, "redis_url", None)
+    assert ResponseCache.from_settings().backend.name == "memory"
+
+    monkeypatch.setattr(settings, "response_cache_backend", "off")
+    cache = ResponseCache.from_settings()
+    cache.set("ns", 1, ("k",), b"{}")
+    assert cache.get("ns", 1, ("k",)) is None and cache.stats()["backend"] == "off"
+
+
+def test_backend_errors_are_misses():
+    from app.services.response_cache import ResponseCache
+
+    class Broken:
+        name = "broken"
+
+        def get(self, key):
+            raise ConnectionError("down")
+
+        def set(self, key, value, ttl_seconds):
+            raise ConnectionError("down")
+
+        def stats(self):
+            return {}
+
+    cache = ResponseCache(Broken())
+    cache.set("ns", 1, ("k",), b"{}")
+    assert cache.get("ns", 1, ("k",)) is None
+    assert cache.stats()["errors"] == 2 and cache.stats()["misses"] == 1
@@ -0,0 +1,86 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+
+def auth_headers(client, email):
+    client.post("/api/auth/register", json={"email": email, "password": "StrongP@ssw0rd", "timezone": "UTC"})
+    r = client.post(
+        "/api/auth/login",
+        data={"username": email, "password": "StrongP@ssw0rd"},
+        headers={"content-type": "application/x-www-form-urlencoded"},
+    )
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+def _jti(headers):
+    from jose import jwt
+
+    return jwt.get_unverified_claims(headers["Authorization"].split(" ", 1)[1])["jti"]
+
+
+def test_revocations_from_other_workers_apply_after_sync(client):
+    from app.core.jwt_blacklist import revocations, sync_revocations
+    from app.database.database import SessionLocal
+    from app.models.models import BlacklistedToken
+
+    sync_revocations()
+    h = auth_headers(client, "revoke@example.com")
+    assert client.get("/analytics/usage/summary", headers=h).status_code == 200
+
+    # Another worker logs this token out: only the table knows
+    db = SessionLocal()
+    db.add(BlacklistedToken(jti=_jti(h), expires_at=datetime.now(timezone.utc) + timedelta(minutes=30)))
+    db.commit()
+    db.close()
+    assert client.get("/analytics/usage/summary", headers=h).status_code == 200
+
+    assert sync_revocations() >= 1
+    assert client.get("/analytics/usage/summary", headers=h).status_code == 401
+    assert revocations.stats()["high_water_id"] > 0
+
+
+def test_logout_records_the_token_expiry(client):
+    from app.database.database import SessionLocal
+    from app.models.models import BlacklistedToken
+
+    h = auth_headers(client, "revoke-logout@example.com")
+    assert client.post("/api/auth/logout", headers=h).status_code == 200
+    db = SessionLocal()
+    row = db.query(BlacklistedToken).filter(BlacklistedToken.jti == _jti(h)).one()
+    db.close()
+    expires_at = row.expires_at.replace(tzinfo=row.expires_at.tzinfo or timezone.utc)
+    assert expires_at > datetime.now(timezone.utc) + timedelta(minutes=20)
+
+
+def test_index_prunes_expired_entries_and_sees_late_commits():
+    from app.core.jwt_blacklist import RevocationIndex
+    from app.database.database import SessionLocal
+    from app.models.models import BlacklistedToken
+
+    index = RevocationIndex()
+    now = time.time()
+    index.add("gone", now - 1)
+    index.add("kept", now + 60)
+    index.add("extended", now - 1)
+    index.add("extended", now + 60)
+    assert index.prune(now) == 1
+    assert "gone" not in index and "kept" in index and "extended" in index
+
+    db = SessionLocal()
+    try:
+        future = datetime.now(timezone.utc) + timedelta(hours=1)
+        db.add_all([BlacklistedToken(jti="late-a", expires_at=future), BlacklistedToken(jti="late-b", expires_at=future)])
+        db.commit()
+        index.sync(db)
+        assert "late-a" in index and "late-b" in index
+        # An id allocated before the high-water mark but committed after it is still picked up
+        high = index.stats()["high_water_id"]
+        db.add(BlacklistedToken(id=high + 10, jti="late-d", expires_at=future))
+        db.commit()
+        index.sync(db)
+        db.add(BlacklistedToken(id=high + 5, jti="late-c", expires_at=future))
+        db.commit()
+        index.sync(db)
+        assert "late-c" in index and index.stats()["high_water_id"] == high + 10
+    finally:
+        db.close()
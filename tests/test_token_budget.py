@@ -0,0 +1,106 @@
+from types import SimpleNamespace
+
+from app.services.email_service import EmailAnalysisService
+from app.services.token_budget import OMITTED, budget_email, clip_text, estimate_tokens, strip_quoted_replies
+
+
+def test_short_email_is_untouched():
+    budget = budget_email("Lunch at noon?", max_tokens=100)
+    assert budget.content == "Lunch at noon?"
+    assert budget.dropped_tokens == 0
+
+
+def test_quoted_reply_is_stripped():
+    text = "Sounds good, see you then.\n\nOn Mon, Oct 6, 2026 at 9:00 Ann wrote:\n> Can we meet Tuesday?\n> Thanks"
+    assert strip_quoted_replies(text) == "Sounds good, see you then."
+    assert strip_quoted_replies("Top\n> quoted\nbottom") == "Top\nbottom"
+
+
+def test_long_email_keeps_first_and_last_paragraphs():
+    paragraphs = ["Hi team, the launch moves to Friday."]
+    paragraphs += [f"Filler paragraph {n}. " * 20 for n in range(200)]
+    paragraphs += ["Unsubscribe: example.com/u"]
+    text = "\n\n".join(paragraphs)
+
+    budget = budget_email(text, max_tokens=300)
+    assert budget.content.startswith("Hi team, the launch moves to Friday.")
+    assert budget.content.endswith("Unsubscribe: example.com/u")
+    assert OMITTED in budget.content
+    assert budget.tokens <= 300
+    assert budget.original_tokens == estimate_tokens(text)
+    assert budget.dropped_tokens == budget.original_tokens - budget.tokens
+
+
+def test_single_large_body_paragraph_is_clipped_not_dropped():
+    body = "The quarterly numbers are in and revenue is up. " * 400
+    text = f"Hi Sam,\n\n{body}\n\nThanks,\nAlex"
+
+    budget = budget_email(text, max_tokens=500)
+    assert budget.content.startswith("Hi Sam,")
+    assert budget.content.endswith("Thanks,\nAlex")
+    assert "The quarterly numbers are in" in budget.content
+    assert 450 <= budget.tokens <= 500
+
+
+def test_clip_text_keeps_head_and_tail():
+    clipped = clip_text("a" * 50 + "b" * 50, 40)
+    assert len(clipped) <= 40
+    assert clipped.startswith("aaa") and clipped.endswith("bbb")
+
+
+class RecordingCompletions:
+    def __init__(self):
+        self.prompts = []
+
+    async def create(self, **kwargs):
+        self.prompts.append(kwargs["messages"][-1]["content"])
+        msg = SimpleNamespace(content="SUMMARY: Long one.\nCATEGORY: other\nCONFIDENCE: 70")
+        return SimpleNamespace(choices=[SimpleNamespace(message=msg)])
+
+
+async def test_service_budgets_prompt_and_reports_dropped_tokens(monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "analysis_max_input_tokens", 200)
+    completions = RecordingCompletions()
+    service = EmailAnalysisService()
+    service.cache = None
+    service.async_client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+
+    body = "\n\n".join(["Opening line."] + ["x" * 500] * 50 + ["Closing line."])
+    result = await service.analyze_email_async(body, subject="Big")
+    assert result.dropped_tokens > 0
+    assert len(completions.prompts[0]) < len(body) // 5
+    assert "Opening line." in completions.prompts[0] and "Closing line." in completions.prompts[0]
+
+
+def test_analytics_copy_is_clipped(client):
+    # The analytics row no longer keeps a clipped copy: it shares the email's single stored body
+    from app.database.database import SessionLocal
+    from app.models.models import Email, EmailAnalytics, EmailBody, User
+    from app.schemas.schemas import EmailAnalysis
+    from app.services.email_store import AnalyzedEmail, persist_analysis
+
+    db = SessionLocal()
+    try:
+        user = User(email="budget@example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        body = "y" * 30000
+        analysis = EmailAnalysis(summary="s", category="other", confidence_score=50, dropped_tokens=1234)
+        email = persist_analysis(db, user.id, AnalyzedEmail("Big", body, analysis, 5))
+        analytics = db.query(EmailAnalytics).filter(EmailAnalytics.user_id == user.id).one()
+        assert len(db.get(Email, email.id).content) == len(body)
+        assert email.dropped_tokens == 1234
+        assert analytics.email_content is None
+        assert analytics.body_hash == email.body_hash
+        assert db.query(EmailBody).filter(EmailBody.hash == email.body_hash).count() == 1
+    finally:
+        db.close()
+
+
+def test_oversized_content_is_rejected(client):
+    from app.core.config import settings
+
+    r = client.post("/emails/demo-analyze", json={"content": "z" * (settings.email_max_content_chars + 1)})
+    assert r.status_code == 422
@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta, timezone
+
+
+def auth_headers(client, email):
+    client.post("/api/auth/register", json={"email": email, "password": "StrongP@ssw0rd", "timezone": "UTC"})
+    r = client.post(
+        "/api/auth/login",
+        data={"username": email, "password": "StrongP@ssw0rd"},
+        headers={"content-type": "application/x-www-form-urlencoded"},
+    )
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+def test_purge_removes_only_expired_or_spent_rows_in_batches(client):
+    from app.database.database import SessionLocal
+    from app.models.models import BlacklistedToken, PasswordResetToken, RefreshToken, User, VerificationToken
+    from app.services.maintenance import purge_expired_tokens
+
+    h = auth_headers(client, "purge@example.com")
+    now = datetime.now(timezone.utc)
+    past, future = now - timedelta(hours=1), now + timedelta(hours=1)
+    db = SessionLocal()
+    try:
+        user_id = db.query(User.id).filter(User.email == "purge@example.com").scalar()
+        db.add_all([
+            BlacklistedToken(jti="purge-bl-old", expires_at=past),
+            BlacklistedToken(jti="purge-bl-live", expires_at=future),
+            *[RefreshToken(user_id=user_id, jti=f"purge-rt-old-{n}", expires_at=past) for n in range(5)],
+            RefreshToken(user_id=user_id, jti="purge-rt-revoked", expires_at=future, revoked=True),
+            RefreshToken(user_id=user_id, jti="purge-rt-live", expires_at=future),
+            VerificationToken(user_id=user_id, token="purge-vt-used", expires_at=future, used=True),
+            VerificationToken(user_id=user_id, token="purge-vt-live", expires_at=future),
+            PasswordResetToken(user_id=user_id, token="purge-prt-old", expires_at=past),
+            PasswordResetToken(user_id=user_id, token="purge-prt-live", expires_at=future),
+        ])
+        db.commit()
+
+        planned = purge_expired_tokens(db, dry_run=True)
+        assert planned["refresh_tokens"] >= 6 and planned["blacklisted_tokens"] >= 1
+        report = purge_expired_tokens(db, batch_size=2)
+        assert report == planned
+        assert purge_expired_tokens(db, dry_run=True) == {t: 0 for t in report}
+
+        assert db.query(BlacklistedToken.jti).filter(BlacklistedToken.jti.like("purge-%")).all() == [("purge-bl-live",)]
+        assert {r.jti for r in db.query(RefreshToken).filter(RefreshToken.user_id == user_id)} >= {"purge-rt-live"}
+        assert not db.query(RefreshToken).filter(RefreshToken.jti.like("purge-rt-old-%")).count()
+        assert db.query(VerificationToken.token).filter(VerificationToken.user_id == user_id).all() == [("purge-vt-live",)]
+        assert db.query(PasswordResetToken.token).filter(PasswordResetToken.user_id == user_id).all() == [("purge-prt-live",)]
+    finally:
+        db.close()
+
+    # The session's own refresh token was live and survives; the user stays logged in
+    assert client.get("/analytics/usage/summary", headers=h).status_code == 200
+
+
+
+def test_purge_removes_expired_analysis_cache_rows(client):
+    from app.core.config import settings
+    from app.database.database import SessionLocal
+    from app.models.models import AnalysisCacheEntry
+    from app.services.maintenance import purge_expired_analysis_cache
+
+    now = datetime.now(timezone.utc)
+    stale = now - timedelta(seconds=settings.analysis_cache_ttl_seconds + 60)
+    db = SessionLocal()
+    try:
+        db.add_all([
+            *[
+                AnalysisCacheEntry(cache_key=f"purge-ac-old-{n}", summary="s", category="other", confidence_score=80, created_at=stale)
+                for n in range(3)
+            ],
+            AnalysisCacheEntry(cache_key="purge-ac-live", summary="s", category="other", confidence_score=80, created_at=now),
+        ])
+        db.commit()
+
+        assert purge_expired_analysis_cache(db, dry_run=True)["analysis_cache_entries"] >= 3
+        assert purge_expired_analysis_cache(db, batch_size=2)["analysis_cache_entries"] >= 3
+        keys = {k for (k,) in db.query(AnalysisCacheEntry.cache_key).filter(AnalysisCacheEntry.cache_key.like("purge-ac-%"))}
+        assert keys == {"purge-ac-live"}
+    finally:
+        db.close()
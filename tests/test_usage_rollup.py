@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.models.models import EmailCategory
+
+
+def auth_headers(client, email):
+    client.post("/api/auth/register", json={"email": email, "password": "StrongP@ssw0rd", "timezone": "UTC"})
+    r = client.post(
+        "/api/auth/login",
+        data={"username": email, "password": "StrongP@ssw0rd"},
+        headers={"content-type": "application/x-www-form-urlencoded"},
+    )
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+def _rollup(user_id):
+    from app.database.database import SessionLocal
+    from app.models.models import UsageDaily
+
+    db = SessionLocal()
+    try:
+        return {(str(r.day), r.category): r.count for r in db.query(UsageDaily).filter(UsageDaily.user_id == user_id)}
+    finally:
+        db.close()
+
+
+@pytest.mark.parametrize("fake_analysis_service", [{"categories": {"invoice": EmailCategory.INVOICE}}], indirect=True)
+def test_analyses_update_rollup_and_usage_endpoints(client, fake_analysis_service):
+    from app.database.database import SessionLocal
+    from app.models.models import User
+    from app.services.usage_rollup import rebuild_usage
+
+    email = "rollup@example.com"
+    h = auth_headers(client, email)
+    items = [
+        {"subject": "invoice 1", "content": "first body"},
+        {"subject": "lunch", "content": "second body"},
+        {"subject": "invoice 2", "content": "third body"},
+    ]
+    assert client.post("/emails/analyze/batch", json={"items": items}, headers=h).status_code == 200
+    r = client.post("/emails/analyze", json={"subject": "invoice 3", "content": "fourth body"}, headers=h)
+    assert r.status_code == 200, r.text
+
+    db = SessionLocal()
+    user_id = db.query(User).filter(User.email == email).one().id
+    db.close()
+    today = datetime.now(timezone.utc).date().isoformat()
+    expected = {(today, "invoice"): 3, (today, "other"): 1}
+    assert _rollup(user_id) == expected
+
+    summary = client.get("/analytics/usage/summary", headers=h).json()
+    assert summary["total_analyses"] == 4 and summary["month_analyses"] == 4
+    daily = client.get("/analytics/usage/daily", headers=h).json()["data"]
+    assert daily[-1] == {"date": today, "count": 4}
+    assert sum(b["count"] for b in daily) == 4
+
+    # Rebuilding from email_analytics reproduces the incremental counts
+    db = SessionLocal()
+    rebuild_usage(db, user_id)
+    db.commit()
+    db.close()
+    assert _rollup(user_id) == expected
+
+
+def test_free_quota_reads_rollup(client, monkeypatch, fake_analysis_service):
+    from app.core.config import settings
+    from app.database.database import SessionLocal
+    from app.models.models import User
+    from app.services.usage_rollup import record_usage
+
+    email = "rollup-quota@example.com"
+    h = auth_headers(client, email)
+    monkeypatch.setattr(settings, "free_monthly_analysis_limit", 3)
+    db = SessionLocal()
+    user_id = db.query(User).filter(User.email == email).one().id
+    # Last month's usage does not count toward this month's quota
+    record_usage(db, user_id, ["other"] * 5, datetime.now(timezone.utc).replace(day=1) - timedelta(days=1))
+    record_usage(db, user_id, ["other", "spam"])
+    db.commit()
+    db.close()
+
+    body = {"subject": "hello", "content": "some body"}
+    assert client.post("/emails/analyze", json=body, headers=h).status_code == 200
+    assert client.post("/emails/analyze", json=body, headers=h).status_code == 402
@@ -0,0 +1,84 @@
+from datetime import datetime, timezone
+
+
+def auth_headers(client, email, tz="UTC"):
+    client.post("/api/auth/register", json={"email": email, "password": "StrongP@ssw0rd", "timezone": tz})
+    r = client.post(
+        "/api/auth/login",
+        data={"username": email, "password": "StrongP@ssw0rd"},
+        headers={"content-type": "application/x-www-form-urlencoded"},
+    )
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+def _seed(email, instants):
+    from app.database.database import SessionLocal
+    from app.models.models import EmailAnalytics, User
+    from app.services.usage_rollup import record_usage
+
+    db = SessionLocal()
+    user_id = db.query(User).filter(User.email == email).one().id
+    for when in instants:
+        db.add(EmailAnalytics(user_id=user_id, category="other", created_at=when))
+        record_usage(db, user_id, ["other"], when)
+    db.commit()
+    db.close()
+    return user_id
+
+
+def _utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def test_buckets_follow_the_users_timezone_across_dst(client):
+    from app.database.database import SessionLocal
+    from app.services.usage_series import usage_series
+
+    email = "series-ny@example.com"
+    auth_headers(client, email, tz="America/New_York")
+    user_id = _seed(email, [
+        _utc(2026, 10, 31, 3, 30),  # Oct 30, 23:30 EDT
+        _utc(2026, 10, 31, 4, 30),  # Oct 31, 00:30 EDT
+        _utc(2026, 11, 1, 5, 30),   # Nov 1, 01:30 EDT (first 01:30)
+        _utc(2026, 11, 1, 6, 30),   # Nov 1, 01:30 EST (repeated hour)
+        _utc(2026, 11, 2, 4, 30),   # Nov 1, 23:30 EST
+    ])
+    now = _utc(2026, 11, 2, 12)
+    db = SessionLocal()
+    try:
+        daily = dict(usage_series(db, user_id, "America/New_York", days=7, granularity="day", now=now))
+        assert list(daily)[-1] == "2026-11-02" and len(daily) == 7
+        assert daily["2026-10-30"] == 1 and daily["2026-10-31"] == 1 and daily["2026-11-01"] == 3
+        # The UTC view of the same rows is different
+        utc_daily = dict(usage_series(db, user_id, "UTC", days=7, granularity="day", now=now))
+        assert utc_daily["2026-10-31"] == 2 and utc_daily["2026-11-02"] == 1
+
+        hourly = usage_series(db, user_id, "America/New_York", days=7, granularity="hour", now=now)
+        labels = [label for label, _ in hourly]
+        assert len(labels) == len(set(labels)) == 7 * 24 - 1  # the repeated 01:00 is one bucket
+        assert dict(hourly)["2026-11-01T01:00"] == 2
+
+        weekly = usage_series(db, user_id, "America/New_York", days=30, granularity="week", now=now)
+        assert weekly[-1] == ("2026-11-02", 0)
+        assert dict(weekly)["2026-10-26"] == 5  # Monday Oct 26 .. Sunday Nov 1, local
+    finally:
+        db.close()
+
+
+def test_usage_daily_endpoint_windows_and_granularity(client):
+    h = auth_headers(client, "series-api@example.com", tz="Asia/Kolkata")
+    _seed("series-api@example.com", [datetime.now(timezone.utc)])
+
+    r = client.get("/analytics/usage/daily", headers=h)
+    body = r.json()
+    assert r.status_code == 200 and body["timezone"] == "Asia/Kolkata" and body["granularity"] == "day"
+    assert len(body["data"]) == 30 and body["data"][-1]["count"] == 1
+
+    weekly = client.get("/analytics/usage/daily", params={"days": 365, "granularity": "week"}, headers=h).json()["data"]
+    assert sum(b["count"] for b in weekly) == 1 and 52 <= len(weekly) <= 54
+    hourly = client.get("/analytics/usage/daily", params={"days": 7, "granularity": "hour"}, headers=h).json()["data"]
+    assert len(hourly) == 7 * 24 and hourly[-1]["date"].endswith(":00")
+
+    assert client.get("/analytics/usage/daily", params={"days": 12}, headers=h).status_code == 400
+    assert client.get("/analytics/usage/daily", params={"days": 90, "granularity": "hour"}, headers=h).status_code == 400
+    assert client.get("/analytics/usage/daily", params={"granularity": "month"}, headers=h).status_code == 422